@@ -0,0 +1,108 @@
+import os
+import io
+import sys
+import argparse
+import numpy as np
+import yaml
+from PIL import Image
+
+# Writes a synthetic YOLO dataset for benchmarks: data.yaml plus images/<split> and
+# labels/<split> directories. Images are copies of a few random templates, so generating
+# tens of thousands of them only costs the disk writes.
+
+TEMPLATES = 16
+SPLIT_FRACTIONS = {'train': 0.8, 'val': 0.15, 'test': 0.05}
+
+def parse_resolution(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+def template_images(resolution, rng, count=TEMPLATES):
+    # Smooth noise compresses like a photo, unlike white noise or a flat colour
+    templates = []
+    for _ in range(count):
+        small = rng.integers(0, 256, (max(1, resolution[1] // 32), max(1, resolution[0] // 32), 3), dtype=np.uint8)
+        img = Image.fromarray(small).resize(resolution, Image.BILINEAR)
+        buffer = io.BytesIO()
+        img.save(buffer, 'JPEG', quality=85)
+        templates.append(buffer.getvalue())
+    return templates
+
+def label_text(rng, num_boxes, num_classes, polygon_fraction):
+    class_ids = rng.integers(0, num_classes, num_boxes)
+    sizes = rng.uniform(0.02, 0.5, (num_boxes, 2))
+    centers = rng.uniform(sizes / 2, 1 - sizes / 2)
+    polygons = rng.random(num_boxes) < polygon_fraction
+    lines = []
+    for class_id, (x, y), (w, h), polygon in zip(class_ids, centers, sizes, polygons):
+        if polygon:
+            # Points on the ellipse inscribed in the box
+            angles = np.sort(rng.uniform(0, 2 * np.pi, rng.integers(4, 13)))
+            points = np.stack((x + np.cos(angles) * w / 2, y + np.sin(angles) * h / 2), axis=1).ravel()
+            lines.append(f"{class_id} " + " ".join(f"{value:.6f}" for value in points))
+        else:
+            lines.append(f"{class_id} {x:.6f} {y:.6f} {w:.6f} {h:.6f}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+def generate_dataset(output_dir, images=1000, boxes_per_image=8, classes=80, polygon_fraction=0.1, resolution=(640, 480), splits=('train', 'val'), empty_fraction=0.05, seed=0):
+    # Box counts are Poisson around boxes_per_image; empty_fraction of the images get no label file
+    rng = np.random.default_rng(seed)
+    templates = template_images(resolution, rng)
+    fractions = np.array([SPLIT_FRACTIONS.get(split, 1.0) for split in splits])
+    split_of_image = rng.choice(len(splits), images, p=fractions / fractions.sum())
+    box_counts = rng.poisson(boxes_per_image, images)
+    unlabelled = rng.random(images) < empty_fraction
+
+    for split in splits:
+        os.makedirs(os.path.join(output_dir, 'images', split), exist_ok=True)
+        os.makedirs(os.path.join(output_dir, 'labels', split), exist_ok=True)
+    for i in range(images):
+        split = splits[split_of_image[i]]
+        name = f"img_{i:07d}"
+        with open(os.path.join(output_dir, 'images', split, name + '.jpg'), 'wb') as file:
+            file.write(templates[i % len(templates)])
+        if not unlabelled[i]:
+            with open(os.path.join(output_dir, 'labels', split, name + '.txt'), 'w') as file:
+                file.write(label_text(rng, box_counts[i], classes, polygon_fraction))
+
+    data = {'path': '.', 'names': [f"class_{i}" for i in range(classes)]}
+    for split in splits:
+        data[split] = f"images/{split}"
+    with open(os.path.join(output_dir, 'data.yaml'), 'w') as file:
+        yaml.safe_dump(data, file)
+    return output_dir
+
+def add_arguments(parser):
+    parser.add_argument('--images', type=int, default=5000)
+    parser.add_argument('--boxes', type=float, default=8, help="Mean boxes per image")
+    parser.add_argument('--classes', type=int, default=80)
+    parser.add_argument('--polygons', type=float, default=0.1, help="Fraction of annotations written as polygons")
+    parser.add_argument('--resolution', type=parse_resolution, default=(640, 480), help="WIDTHxHEIGHT")
+    parser.add_argument('--splits', default='train,val')
+    parser.add_argument('--seed', type=int, default=0)
+
+def dataset_params(args):
+    return {
+        'images': args.images,
+        'boxes': args.boxes,
+        'classes': args.classes,
+        'polygons': args.polygons,
+        'resolution': list(args.resolution),
+        'splits': args.splits,
+        'seed': args.seed,
+    }
+
+def generate_from_args(output_dir, args):
+    return generate_dataset(output_dir, args.images, args.boxes, args.classes, args.polygons, args.resolution, tuple(args.splits.split(',')), seed=args.seed)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic YOLO dataset.")
+    parser.add_argument('output')
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    generate_from_args(args.output, args)
+    print(f"Wrote {args.images} images to {args.output}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,309 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+import tempfile
+import tracemalloc
+from types import SimpleNamespace
+from benchmarks.generate_dataset import add_arguments, dataset_params, generate_from_args
+from classes.AnnotationStore import AnnotationStore
+from classes.DatasetLoader import DatasetLoader
+from classes.ImageDisplayManager import ImageDisplayManager
+from classes.ImageFilter import ImageFilter
+from classes.ImageMetrics import ImageMetrics
+from classes.StatsManager import StatsManager
+from classes.ThumbnailCache import ThumbnailCache
+from utils.file_utils import load_yaml_data, load_images_and_labels, iter_label_texts
+from utils.label_utils import parse_label_batch
+from utils.label_rewrite import rename_class_in_labels, merge_classes_in_labels
+from utils.split_utils import resolve_splits, stat_splits
+
+# Times the loader, stats, image list and label rewrite hot paths on a synthetic dataset without
+# a display, records their peak Python memory, and compares both against stored baselines:
+#
+#   python -m benchmarks.run_benchmarks                   # run and compare
+#   python -m benchmarks.run_benchmarks --save-baseline   # run and store new baselines
+#
+# The startup benchmark launches the app in a fresh interpreter and must also stay within
+# --startup-budget without importing HEAVY_MODULES before the window is drawn; without a
+# display it covers the imports only.
+#
+# Times are the best of --repeat runs. Peak memory comes from a separate tracemalloc run, so
+# tracing does not skew the times; it excludes the loader's worker processes. Baselines only
+# compare on the machine that recorded them, so re-record them after changing hardware.
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+TIME_TOLERANCE = 0.25  # Slowdown over the baseline reported as a regression
+MEMORY_TOLERANCE = 0.25
+STARTUP_BUDGET = 0.5  # Seconds from launching Python to the main window being drawn
+HEAVY_MODULES = ('numpy', 'PIL')  # Loaded on first use, never at startup
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Exits without joining the worker threads, which start preloading once the window is drawn
+STARTUP_SCRIPT = '''
+import os
+import sys
+import json
+import tkinter as tk
+from main import YOLODatasetManager
+try:
+    root = tk.Tk()
+except tk.TclError:
+    root = None
+if root is not None:
+    YOLODatasetManager(root)
+heavy = [name for name in sys.argv[1:] if name in sys.modules]
+if root is not None:
+    root.update()
+print(json.dumps({'window': root is not None, 'heavy_modules': heavy}), flush=True)
+os._exit(0)
+'''
+
+class HeadlessTask:
+    # Stands in for a scheduler Task; callbacks meant for the Tk thread are dropped
+    cancelled = False
+
+    def post(self, callback, *args, key=None):
+        pass
+
+class HeadlessWidget:
+    def __init__(self, value=''):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+    def config(self, **options):
+        pass
+
+class HeadlessImageList:
+    def __init__(self):
+        self.rows = []
+
+    def set_rows(self, rows):
+        self.rows = list(rows)
+
+    def update_rows(self, rows):
+        self.rows = list(rows)
+
+def make_manager(dataset_dir):
+    data = load_yaml_data(os.path.join(dataset_dir, 'data.yaml'))
+    manager = SimpleNamespace(
+        dataset_dir=dataset_dir,
+        classes=data['names'],
+        splits=resolve_splits(dataset_dir, data),
+        annotations=AnnotationStore(),
+        thumbnail_cache=None,
+        validation=SimpleNamespace(set_report=lambda report: None),
+        scheduler=SimpleNamespace(call_soon=lambda callback, *args, key=None, task=None: None),
+        image_list=HeadlessImageList(),
+        filter_entry=HeadlessWidget(),
+        status_label=HeadlessWidget(),
+        sort_ascending=True,
+        sort_key=None,
+    )
+    manager.sort_metric = lambda: manager.sort_key
+    manager.metric_range = lambda: (None, None)
+    manager.image_filter = ImageFilter(manager)
+    manager.image_metrics = ImageMetrics(manager)
+    return manager
+
+def build_store(manager):
+    image_stats, _, label_files = stat_splits(manager.splits)
+    images = list(image_stats)
+    return AnnotationStore().build_from_batches(images, [parse_label_batch(texts) for _, texts in iter_label_texts(images, label_files)])
+
+# Each benchmark does its setup and returns the callable that is timed
+
+def bench_startup(context):
+    def run():
+        output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, *HEAVY_MODULES], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout
+        context.startup = json.loads(output)
+    return run
+
+def bench_load_images_and_labels(context):
+    images_dir, labels_dir = next(iter(context.manager.splits.values()))
+    return lambda: load_images_and_labels(images_dir, labels_dir)
+
+def bench_load_cold(context):
+    # First load: no snapshot, every label parsed and every thumbnail decoded
+    cache_dir = tempfile.mkdtemp(dir=context.scratch_dir)
+    return lambda: load_dataset(context, cache_dir)
+
+def bench_load_warm(context):
+    # Reopen: snapshot and thumbnails are reused
+    cache_dir = tempfile.mkdtemp(dir=context.scratch_dir)
+    load_dataset(context, cache_dir)
+    return lambda: load_dataset(context, cache_dir)
+
+def load_dataset(context, cache_dir):
+    manager = context.manager
+    cache = ThumbnailCache(cache_dir)
+    try:
+        DatasetLoader(manager).load_images_and_labels_dir(HeadlessTask(), manager.splits, manager.classes, cache)
+    finally:
+        cache.close()
+
+def bench_update_stats(context):
+    stats_manager = StatsManager(context.manager)
+
+    def run():
+        stats_manager.update_stats()
+        stats_manager.format_lines()
+    return run
+
+def bench_update_image_listbox(context):
+    context.manager.sort_key = None
+    display = ImageDisplayManager(context.manager)
+    return lambda: display.update_image_listbox(context.largest_class)
+
+def bench_sort_by_metric(context):
+    manager = context.manager
+    display = ImageDisplayManager(manager)
+
+    def run():
+        manager.sort_key = 'min_area'
+        manager.image_metrics.store = None  # Recompute the metric arrays too
+        display.update_image_listbox(context.largest_class)
+        manager.sort_key = None
+    return run
+
+def copy_labels(context):
+    # Label rewrites run on a scratch copy of the label directories
+    splits = {}
+    for split, (images_dir, labels_dir) in context.manager.splits.items():
+        copy_dir = tempfile.mkdtemp(dir=context.scratch_dir)
+        shutil.copytree(labels_dir, copy_dir, dirs_exist_ok=True)
+        splits[split] = (images_dir, copy_dir)
+    return splits
+
+def bench_rename_class_in_labels(context):
+    # Renaming onto another class's name remaps its id, so every file with the class is rewritten
+    classes = context.manager.classes
+    splits = copy_labels(context)
+    return lambda: rename_class_in_labels(splits, 0, classes[1], classes)
+
+def bench_merge_classes_in_labels(context):
+    splits = copy_labels(context)
+    return lambda: merge_classes_in_labels(splits, 0, 1, len(context.manager.classes))
+
+BENCHMARKS = {
+    'startup': bench_startup,
+    'load_images_and_labels': bench_load_images_and_labels,
+    'load_cold': bench_load_cold,
+    'load_warm': bench_load_warm,
+    'update_stats': bench_update_stats,
+    'update_image_listbox': bench_update_image_listbox,
+    'sort_by_metric': bench_sort_by_metric,
+    'rename_class_in_labels': bench_rename_class_in_labels,
+    'merge_classes_in_labels': bench_merge_classes_in_labels,
+}
+
+def measure(context, name, repeat):
+    bench = BENCHMARKS[name]
+    seconds = []
+    for _ in range(repeat):
+        run = bench(context)
+        start = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - start)
+
+    run = bench(context)
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': min(seconds), 'peak_mb': peak / 2 ** 20}
+
+def compare(results, baseline, time_tolerance, memory_tolerance):
+    # Returns the names of the benchmarks that got slower or bigger than the tolerances allow
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get('results', {}).get(name)
+        if reference is None:
+            continue
+        if result['seconds'] > reference['seconds'] * (1 + time_tolerance) or result['peak_mb'] > reference['peak_mb'] * (1 + memory_tolerance):
+            regressions.append(name)
+    return regressions
+
+def check_startup(result, startup, budget):
+    # Returns the ways startup broke its budget, as messages
+    problems = []
+    if result['seconds'] > budget:
+        problems.append(f"took {result['seconds']:.3f}s, over the {budget:.3f}s budget")
+    if startup['heavy_modules']:
+        problems.append(f"imported {', '.join(startup['heavy_modules'])} before the window was drawn")
+    return problems
+
+def format_report(results, baseline, regressions):
+    lines = [f"{'benchmark':<26}{'seconds':>10}{'peak MB':>10}{'vs baseline':>14}"]
+    for name, result in results.items():
+        reference = baseline.get('results', {}).get(name) if baseline else None
+        change = f"{(result['seconds'] / reference['seconds'] - 1) * 100:+.0f}%" if reference and reference['seconds'] > 0 else "-"
+        flag = "  REGRESSION" if name in regressions else ""
+        lines.append(f"{name:<26}{result['seconds']:>10.4f}{result['peak_mb']:>10.1f}{change:>14}{flag}")
+    return lines
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the dataset manager's hot paths on a synthetic dataset.")
+    parser.add_argument('--dataset', help="Existing dataset to benchmark instead of a generated one")
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="Benchmarks to run (default: all)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--time-tolerance', type=float, default=TIME_TOLERANCE)
+    parser.add_argument('--memory-tolerance', type=float, default=MEMORY_TOLERANCE)
+    parser.add_argument('--startup-budget', type=float, default=STARTUP_BUDGET, help="Seconds the app may take to show its window")
+    parser.add_argument('--output', help="Also write the results as JSON to this file")
+    add_arguments(parser)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    scratch_dir = tempfile.mkdtemp(prefix='yolo-bench-')
+    try:
+        dataset_dir = args.dataset or generate_from_args(os.path.join(scratch_dir, 'dataset'), args)
+        params = {'dataset': args.dataset} if args.dataset else dataset_params(args)
+        manager = make_manager(dataset_dir)
+        manager.annotations = build_store(manager)
+        counts = manager.annotations.class_counts(len(manager.classes))
+        context = SimpleNamespace(manager=manager, scratch_dir=scratch_dir, largest_class=int(counts.argmax()) if len(counts) else 0)
+
+        results = {name: measure(context, name, args.repeat) for name in (args.only or BENCHMARKS)}
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if baseline.get('params') != params:
+            print("Baseline was recorded with other dataset parameters; not comparing.", file=sys.stderr)
+            baseline = {}
+    regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+    print("\n".join(format_report(results, baseline, regressions)))
+    problems = []
+    if 'startup' in results:
+        if not context.startup['window']:
+            print("Startup: no display, so only the imports were timed.", file=sys.stderr)
+        problems = check_startup(results['startup'], context.startup, args.startup_budget)
+        for problem in problems:
+            print(f"Startup: {problem}", file=sys.stderr)
+
+    output = {'params': params, 'results': results}
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(output, file, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            json.dump(output, file, indent=2)
+        return 0
+    return 1 if regressions or problems else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
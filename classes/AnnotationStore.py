@@ -0,0 +1,250 @@
+import numpy as np
+from classes.ClassIndex import ClassIndex
+from utils.label_utils import parse_label_batch, concat_label_batches, format_label_line, ragged_indices
+
+class AnnotationStore:
+    # Columnar storage for every annotation in the dataset.
+    # Rows are grouped by image: rows of image i live in [image_offsets[i], image_offsets[i + 1]).
+    # Polygon rows keep their points in seg_coords[seg_offsets[row]:seg_offsets[row + 1]].
+    # Image ids are stable for the session; removed images keep their id with alive[id] = False.
+    # Every mutation also keeps class_index, the class id -> image ids inverted index, in sync.
+    def __init__(self):
+        self.names = []
+        self.ids = {}
+        self.alive = np.zeros(0, dtype=bool)
+        self.invalid_counts = np.zeros(0, dtype=np.int32)
+        self.image_offsets = np.zeros(1, dtype=np.int64)
+        self.image_idx = np.zeros(0, dtype=np.int32)
+        self.class_ids = np.zeros(0, dtype=np.int32)
+        self.boxes = np.zeros((0, 4), dtype=np.float32)
+        self.seg_offsets = np.zeros(1, dtype=np.int64)
+        self.seg_coords = np.zeros(0, dtype=np.float32)
+        self.class_index = ClassIndex()
+        self.version = 0  # Bumped by every change, so derived arrays know when to recompute
+
+    def build(self, images, image_labels):
+        texts = ['\n'.join(image_labels.get(image, [])) for image in images]
+        return self.build_from_batches(images, [parse_label_batch(texts)])
+
+    def build_from_batches(self, images, batches):
+        # batches are parse_label_batch results covering `images` in order
+        self.version += 1
+        counts, class_ids, boxes, seg_lengths, seg_coords, invalid_counts = concat_label_batches(batches)
+
+        self.names = list(images)
+        self.ids = {image: i for i, image in enumerate(images)}
+        self.alive = np.ones(len(images), dtype=bool)
+        self.invalid_counts = invalid_counts.astype(np.int32)
+        self.image_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self.image_idx = np.repeat(np.arange(len(images), dtype=np.int32), counts)
+        self.class_ids = class_ids.astype(np.int32)
+        self.boxes = boxes.astype(np.float32).reshape(-1, 4)
+        self.seg_offsets = np.concatenate(([0], np.cumsum(seg_lengths))).astype(np.int64)
+        self.seg_coords = seg_coords.astype(np.float32)
+        self.class_index.build(self.image_idx, self.class_ids)
+        return self
+
+    def copy(self):
+        # Independent copy that a worker can read while the Tk thread keeps editing this store
+        store = AnnotationStore()
+        store.names = list(self.names)
+        store.ids = dict(self.ids)
+        for name in ('alive', 'invalid_counts', 'image_offsets', 'image_idx', 'class_ids', 'boxes', 'seg_offsets', 'seg_coords'):
+            setattr(store, name, getattr(self, name).copy())
+        # The index's arrays are replaced on change, never edited in place, so they can be shared
+        store.class_index.images_by_class = dict(self.class_index.images_by_class)
+        store.version = self.version
+        return store
+
+    @property
+    def image_count(self):
+        return int(self.alive.sum())
+
+    @property
+    def annotation_count(self):
+        return len(self.class_ids)
+
+    def image_id(self, image):
+        return self.ids[image]
+
+    def rows(self, image_id):
+        return slice(int(self.image_offsets[image_id]), int(self.image_offsets[image_id + 1]))
+
+    def boxes_per_image(self):
+        return np.diff(self.image_offsets)[self.alive]
+
+    def class_counts(self, num_classes):
+        valid = (self.class_ids >= 0) & (self.class_ids < num_classes)
+        return np.bincount(self.class_ids[valid], minlength=num_classes)
+
+    def images_with_class(self, class_id):
+        return [self.names[i] for i in self.class_index.images(class_id)]
+
+    def images_with_classes(self, class_ids):
+        image_ids = [self.class_index.images(class_id) for class_id in class_ids]
+        image_ids = np.unique(np.concatenate(image_ids)) if image_ids else []
+        return [self.names[i] for i in image_ids]
+
+    def image_class_counts(self, image_id):
+        class_ids, counts = np.unique(self.class_ids[self.rows(image_id)], return_counts=True)
+        return dict(zip(class_ids.tolist(), counts.tolist()))
+
+    def get_image(self, image_id):
+        # Copies of one image's annotations: (class_ids, boxes, segments), segments[i] is None for boxes
+        rows = self.rows(image_id)
+        segments = []
+        for row in range(rows.start, rows.stop):
+            start, end = self.seg_offsets[row], self.seg_offsets[row + 1]
+            segments.append(self.seg_coords[start:end].copy() if end > start else None)
+        return self.class_ids[rows].copy(), self.boxes[rows].copy(), segments
+
+    def image_segments(self, image_id):
+        # Copies of one image's polygons as (seg_lengths per row, flat coords); boxes have length 0
+        rows = self.rows(image_id)
+        offsets = self.seg_offsets[rows.start:rows.stop + 1]
+        return np.diff(offsets), self.seg_coords[offsets[0]:offsets[-1]].copy()
+
+    def label_lines(self, image_id):
+        class_ids, boxes, segments = self.get_image(image_id)
+        return [format_label_line(int(class_id), box, segment) for class_id, box, segment in zip(class_ids, boxes, segments)]
+
+    def set_image(self, image_id, class_ids, boxes, segments):
+        self.version += 1
+        rows = self.rows(image_id)
+        start, end = rows.start, rows.stop
+        seg_start, seg_end = int(self.seg_offsets[start]), int(self.seg_offsets[end])
+        seg_lengths = [0 if segment is None else len(segment) for segment in segments]
+        new_coords = [np.asarray(segment, dtype=np.float32) for segment in segments if segment is not None]
+        new_coords = np.concatenate(new_coords) if new_coords else np.zeros(0, dtype=np.float32)
+        delta = len(class_ids) - (end - start)
+        self.class_index.update_image(image_id, self.class_ids[rows], class_ids)
+
+        self.class_ids = np.concatenate((self.class_ids[:start], np.asarray(class_ids, dtype=np.int32), self.class_ids[end:]))
+        self.boxes = np.concatenate((self.boxes[:start], np.asarray(boxes, dtype=np.float32).reshape(-1, 4), self.boxes[end:]))
+        self.image_idx = np.concatenate((self.image_idx[:start], np.full(len(class_ids), image_id, dtype=np.int32), self.image_idx[end:]))
+        self.seg_coords = np.concatenate((self.seg_coords[:seg_start], new_coords, self.seg_coords[seg_end:]))
+        new_offsets = seg_start + np.concatenate(([0], np.cumsum(seg_lengths, dtype=np.int64)))
+        self.seg_offsets = np.concatenate((self.seg_offsets[:start], new_offsets, self.seg_offsets[end + 1:] + len(new_coords) - (seg_end - seg_start)))
+        self.image_offsets[image_id + 1:] += delta
+
+    def set_labels(self, image_id, lines):
+        self.version += 1
+        _, class_ids, boxes, seg_lengths, seg_coords, invalid = parse_label_batch(['\n'.join(lines)])
+        segments = []
+        offset = 0
+        for length in seg_lengths:
+            segments.append(seg_coords[offset:offset + length] if length else None)
+            offset += length
+        self.set_image(image_id, class_ids, boxes, segments)
+        self.invalid_counts[image_id] = invalid[0]
+
+    def add_image(self, image, lines=()):
+        self.version += 1
+        image_id = len(self.names)
+        self.names.append(image)
+        self.ids[image] = image_id
+        self.alive = np.append(self.alive, True)
+        self.invalid_counts = np.append(self.invalid_counts, np.int32(0))
+        self.image_offsets = np.append(self.image_offsets, self.image_offsets[-1])
+        self.set_labels(image_id, lines)
+        return image_id
+
+    def remove_image(self, image):
+        self.version += 1
+        image_id = self.ids.pop(image)
+        self.set_image(image_id, [], [], [])
+        self.names[image_id] = None
+        self.alive[image_id] = False
+        self.invalid_counts[image_id] = 0
+        return image_id
+
+    def rename_image(self, old_image, new_image):
+        self.version += 1
+        image_id = self.ids.pop(old_image)
+        self.ids[new_image] = image_id
+        self.names[image_id] = new_image
+        return image_id
+
+    def remap_classes(self, mapping):
+        # mapping[old_id] is the new id, or -1 to drop those annotations; ids outside mapping are kept
+        self.version += 1
+        mapping = np.asarray(mapping, dtype=np.int32)
+        in_range = (self.class_ids >= 0) & (self.class_ids < len(mapping))
+        new_ids = self.class_ids.copy()
+        new_ids[in_range] = mapping[self.class_ids[in_range]]
+        keep = ~in_range | (new_ids >= 0)
+        self.class_index.remap(mapping)
+        if keep.all():
+            self.class_ids = new_ids
+            return
+        seg_lengths = np.diff(self.seg_offsets)[keep]
+        seg_keep = np.repeat(keep, np.diff(self.seg_offsets))
+        self.class_ids = new_ids[keep]
+        self.boxes = self.boxes[keep]
+        self.image_idx = self.image_idx[keep]
+        self.seg_coords = self.seg_coords[seg_keep]
+        self.seg_offsets = np.concatenate(([0], np.cumsum(seg_lengths))).astype(np.int64)
+        counts = np.bincount(self.image_idx, minlength=len(self.names))
+        self.image_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+    def add_images(self, images):
+        # Appends images without annotations; returns their ids
+        self.version += 1
+        first_id = len(self.names)
+        self.names.extend(images)
+        self.ids.update((image, first_id + i) for i, image in enumerate(images))
+        self.alive = np.concatenate((self.alive, np.ones(len(images), dtype=bool)))
+        self.invalid_counts = np.concatenate((self.invalid_counts, np.zeros(len(images), dtype=np.int32)))
+        self.image_offsets = np.concatenate((self.image_offsets, np.full(len(images), self.image_offsets[-1], dtype=np.int64)))
+        return np.arange(first_id, len(self.names), dtype=np.int32)
+
+    def replace_images(self, image_ids, batch):
+        # Replaces the annotations of many images at once with a parse_label_batch result covering
+        # image_ids in order. One stable sort regroups the rows instead of one splice per image.
+        self.version += 1
+        counts, class_ids, boxes, seg_lengths, seg_coords, invalid = batch
+        image_ids = np.asarray(image_ids, dtype=np.int32)
+        replaced = np.zeros(len(self.names), dtype=bool)
+        replaced[image_ids] = True
+        keep = ~replaced[self.image_idx]
+
+        old_seg_lengths = np.diff(self.seg_offsets)
+        new_seg_starts = len(self.seg_coords) + np.concatenate(([0], np.cumsum(seg_lengths)[:-1])).astype(np.int64)
+        all_image_idx = np.concatenate((self.image_idx[keep], np.repeat(image_ids, counts)))
+        order = np.argsort(all_image_idx, kind='stable')
+        seg_starts = np.concatenate((self.seg_offsets[:-1][keep], new_seg_starts))[order]
+        seg_lengths = np.concatenate((old_seg_lengths[keep], np.asarray(seg_lengths, dtype=np.int64)))[order]
+
+        self.image_idx = all_image_idx[order]
+        self.class_ids = np.concatenate((self.class_ids[keep], class_ids.astype(np.int32)))[order]
+        self.boxes = np.concatenate((self.boxes[keep], boxes.astype(np.float32).reshape(-1, 4)))[order]
+        self.seg_coords = np.concatenate((self.seg_coords, seg_coords.astype(np.float32)))[ragged_indices(seg_starts, seg_lengths)]
+        self.seg_offsets = np.concatenate(([0], np.cumsum(seg_lengths))).astype(np.int64)
+        self.image_offsets = np.concatenate(([0], np.cumsum(np.bincount(self.image_idx, minlength=len(self.names))))).astype(np.int64)
+        self.invalid_counts[image_ids] = invalid
+        self.class_index.build(self.image_idx, self.class_ids)
+
+    def remove_images(self, images):
+        self.version += 1
+        image_ids = [self.ids.pop(image) for image in images]
+        empty = (np.zeros(len(image_ids), dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros((0, 4), dtype=np.float32),
+                 np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32), np.zeros(len(image_ids), dtype=np.int32))
+        self.replace_images(image_ids, empty)
+        for image_id in image_ids:
+            self.names[image_id] = None
+        self.alive[image_ids] = False
+
+    def compact(self):
+        # Drops removed images so ids are dense again
+        self.version += 1
+        if self.alive.all():
+            return
+        new_ids = np.cumsum(self.alive) - 1
+        self.names = [name for name in self.names if name is not None]
+        self.ids = {image: i for i, image in enumerate(self.names)}
+        self.image_idx = new_ids[self.image_idx].astype(np.int32)
+        self.invalid_counts = self.invalid_counts[self.alive]
+        counts = np.diff(self.image_offsets)[self.alive]
+        self.image_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self.alive = np.ones(len(self.names), dtype=bool)
+        self.class_index.build(self.image_idx, self.class_ids)
@@ -0,0 +1,202 @@
+import numpy as np
+import tkinter as tk
+from PIL import Image, ImageTk
+from utils.image_utils import mask_overlay
+from utils.polygon_utils import offsets_from_lengths, polygon_bounds, scale_polygons
+
+MIN_LABEL_SIZE = 16  # On-screen box size in pixels below which class names are hidden
+DENSITY_BOX_SIZE = 3  # Median on-screen box size below which boxes are drawn as a density overlay
+DENSITY_MIN_BOXES = 200  # Never switch to the overlay for fewer visible boxes than this
+DENSITY_CELL = 8  # Overlay cell size in pixels
+HIT_TOLERANCE = 3  # Distance in pixels from a box outline that still counts as a click on it
+
+class BoxLayer:
+    # Retained canvas items for an image's boxes and polygons. Items are created once per set of
+    # annotations and then only moved with coords() when the zoom changes; panning moves every
+    # item with a single canvas.move. Annotations outside the viewport are hidden, and when they
+    # become too small to read they are replaced by one density overlay image. Polygon masks are
+    # filled into one overlay image for the viewport rather than drawn as canvas items.
+    def __init__(self, canvas, classes):
+        self.canvas = canvas
+        self.classes = classes
+        self.rects = []  # Rectangle or polygon item per annotation
+        self.texts = []
+        self.class_ids = np.zeros(0, dtype=np.int64)
+        self.is_polygon = np.zeros(0, dtype=bool)
+        self.polygon_index = np.zeros(0, dtype=np.int64)  # Position among the polygons, -1 for boxes
+        self.polygon_offsets = np.zeros(1, dtype=np.int64)
+        self.polygon_coords = np.zeros(0, dtype=np.float64)
+        self.xyxy = np.zeros((0, 4), dtype=np.float64)
+        self.screen = np.zeros((0, 4), dtype=np.float64)
+        self.drawable = np.zeros(0, dtype=bool)
+        self.rect_shown = np.zeros(0, dtype=bool)
+        self.text_shown = np.zeros(0, dtype=bool)
+        self.item_generation = np.zeros(0, dtype=np.int64)
+        self.generation = 0
+        self.zoom = None
+        self.density_item = None
+        self.density_photo = None
+        self.scale = np.ones(2, dtype=np.float64)
+        self.pan = np.zeros(2, dtype=np.float64)
+        self.show_masks = False
+        self.mask_item = None
+        self.mask_photo = None
+        self.mask_key = None
+
+    def set_boxes(self, class_ids, boxes, segments):
+        self.canvas.delete("bbox")
+        self.density_item = None
+        self.mask_item = None
+        self.mask_key = None
+        class_ids = np.asarray(class_ids, dtype=np.int64)
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        x_center, y_center, width, height = boxes.T
+        self.xyxy = np.stack((x_center - width / 2, y_center - height / 2, x_center + width / 2, y_center + height / 2), axis=1)
+        self.class_ids = class_ids
+        self.is_polygon = np.array([segment is not None for segment in segments], dtype=bool)
+        self.polygon_index = np.cumsum(self.is_polygon) - 1
+        self.polygon_index[~self.is_polygon] = -1
+        polygons = [np.asarray(segment, dtype=np.float64) for segment in segments if segment is not None]
+        self.polygon_offsets = offsets_from_lengths([len(polygon) for polygon in polygons])
+        self.polygon_coords = np.concatenate(polygons) if polygons else np.zeros(0, dtype=np.float64)
+        self.xyxy[self.is_polygon] = polygon_bounds(self.polygon_offsets, self.polygon_coords)
+        self.drawable = (class_ids >= 0) & (class_ids < len(self.classes))
+
+        count = len(class_ids)
+        self.rects = [None] * count
+        self.texts = [None] * count
+        for index in np.flatnonzero(self.drawable):
+            if self.is_polygon[index]:
+                self.rects[index] = self.canvas.create_polygon(0, 0, 0, 0, 0, 0, outline="red", fill="", state=tk.HIDDEN, tags="bbox")
+            else:
+                self.rects[index] = self.canvas.create_rectangle(0, 0, 0, 0, outline="red", state=tk.HIDDEN, tags="bbox")
+            self.texts[index] = self.canvas.create_text(0, 0, anchor=tk.NW, text=self.classes[class_ids[index]], fill="red", state=tk.HIDDEN, tags="bbox")
+        self.rect_shown = np.zeros(count, dtype=bool)
+        self.text_shown = np.zeros(count, dtype=bool)
+        self.item_generation = np.full(count, -1, dtype=np.int64)
+        self.screen = np.zeros((count, 4), dtype=np.float64)
+        self.zoom = None
+
+    def update(self, zoom, pan_offset, image_size, viewport):
+        # viewport is the visible canvas area (x0, y0, x1, y1) in canvas coordinates
+        if zoom != self.zoom:
+            self.zoom = zoom
+            self.generation += 1
+        self.scale = np.array(image_size, dtype=np.float64) * zoom
+        self.pan = np.array(pan_offset, dtype=np.float64)
+        self.screen = self.xyxy * np.tile(self.scale, 2) + np.tile(self.pan, 2)
+        x1, y1, x2, y2 = self.screen.T
+        view_x0, view_y0, view_x1, view_y1 = viewport
+        valid = self.drawable & (x1 < x2) & (y1 < y2)
+        visible = valid & (x2 >= view_x0) & (x1 <= view_x1) & (y2 >= view_y0) & (y1 <= view_y1)
+        size = np.minimum(x2 - x1, y2 - y1)
+
+        visible_count = np.count_nonzero(visible)
+        if visible_count >= DENSITY_MIN_BOXES and np.median(size[visible]) < DENSITY_BOX_SIZE:
+            self.apply_states(np.zeros_like(visible), np.zeros_like(visible))
+            self.clear_masks()
+            self.draw_density(visible, viewport)
+            return
+        self.clear_density()
+        self.apply_states(visible, visible & (size >= MIN_LABEL_SIZE))
+        if self.show_masks and (visible & self.is_polygon).any():
+            self.draw_masks(visible & self.is_polygon, viewport)
+        else:
+            self.clear_masks()
+
+    def apply_states(self, rect_visible, text_visible):
+        # Only items whose visibility changes, or that are shown with stale coordinates, reach Tk
+        stale = rect_visible & (self.item_generation != self.generation)
+        for index in np.flatnonzero(stale):
+            x1, y1, x2, y2 = self.screen[index]
+            if self.is_polygon[index]:
+                self.canvas.coords(self.rects[index], *self.polygon_points(self.polygon_index[index]).tolist())
+            else:
+                self.canvas.coords(self.rects[index], x1, y1, x2, y2)
+            self.canvas.coords(self.texts[index], x1, y1)
+            self.item_generation[index] = self.generation
+        for index in np.flatnonzero(rect_visible != self.rect_shown):
+            self.canvas.itemconfig(self.rects[index], state=tk.NORMAL if rect_visible[index] else tk.HIDDEN)
+        for index in np.flatnonzero(text_visible != self.text_shown):
+            self.canvas.itemconfig(self.texts[index], state=tk.NORMAL if text_visible[index] else tk.HIDDEN)
+        self.rect_shown = rect_visible
+        self.text_shown = text_visible
+
+    def draw_density(self, visible, viewport):
+        view_x0, view_y0, view_x1, view_y1 = viewport
+        columns = max(1, int((view_x1 - view_x0) // DENSITY_CELL))
+        rows = max(1, int((view_y1 - view_y0) // DENSITY_CELL))
+        centers_x = (self.screen[visible, 0] + self.screen[visible, 2]) / 2
+        centers_y = (self.screen[visible, 1] + self.screen[visible, 3]) / 2
+        counts, _, _ = np.histogram2d(centers_y, centers_x, bins=(rows, columns), range=((view_y0, view_y1), (view_x0, view_x1)))
+        alpha = np.zeros((rows, columns), dtype=np.uint8)
+        if counts.max() > 0:
+            alpha = (np.sqrt(counts / counts.max()) * 200).astype(np.uint8)
+        overlay = np.zeros((rows, columns, 4), dtype=np.uint8)
+        overlay[..., 0] = 255
+        overlay[..., 3] = alpha
+        image = Image.fromarray(overlay, 'RGBA').resize((columns * DENSITY_CELL, rows * DENSITY_CELL), Image.NEAREST)
+        self.density_photo = ImageTk.PhotoImage(image)
+        if self.density_item is None:
+            self.density_item = self.canvas.create_image(view_x0, view_y0, anchor=tk.NW, image=self.density_photo, tags="bbox")
+        else:
+            self.canvas.coords(self.density_item, view_x0, view_y0)
+            self.canvas.itemconfig(self.density_item, image=self.density_photo)
+
+    def polygon_points(self, polygon):
+        # Flat screen coordinates of one polygon
+        start, end = self.polygon_offsets[polygon], self.polygon_offsets[polygon + 1]
+        return (self.polygon_coords[start:end].reshape(-1, 2) * self.scale + self.pan).ravel()
+
+    def set_show_masks(self, show_masks):
+        self.show_masks = show_masks
+        if not show_masks:
+            self.clear_masks()
+
+    def draw_masks(self, visible, viewport):
+        # All visible masks go into one viewport-sized image; redrawn only when the view changes
+        view_x0, view_y0, view_x1, view_y1 = viewport
+        rows = np.flatnonzero(visible)
+        key = (self.generation, tuple(self.pan), viewport, rows.tobytes())
+        if key == self.mask_key:
+            return
+        self.mask_key = key
+        polygons = scale_polygons(self.polygon_offsets, self.polygon_coords, self.scale, self.pan - (view_x0, view_y0))
+        size = (max(1, int(view_x1 - view_x0)), max(1, int(view_y1 - view_y0)))
+        overlay = mask_overlay(size, [polygons[i] for i in self.polygon_index[rows]], self.class_ids[rows])
+        self.mask_photo = ImageTk.PhotoImage(overlay)
+        if self.mask_item is None:
+            self.mask_item = self.canvas.create_image(view_x0, view_y0, anchor=tk.NW, image=self.mask_photo, tags="bbox")
+        else:
+            self.canvas.coords(self.mask_item, view_x0, view_y0)
+            self.canvas.itemconfig(self.mask_item, image=self.mask_photo)
+        # Above the image tiles, below the outlines
+        self.canvas.tag_lower(self.mask_item)
+        self.canvas.tag_lower("tile")
+
+    def clear_masks(self):
+        if self.mask_item is not None:
+            self.canvas.delete(self.mask_item)
+            self.mask_item = None
+            self.mask_photo = None
+            self.mask_key = None
+
+    def clear_density(self):
+        if self.density_item is not None:
+            self.canvas.delete(self.density_item)
+            self.density_item = None
+            self.density_photo = None
+
+    def hit_test(self, x, y):
+        # Index of the smallest shown box whose outline is within HIT_TOLERANCE of (x, y), or of
+        # the smallest shown polygon whose bounds contain it; None if there is neither
+        if not self.rect_shown.any():
+            return None
+        x1, y1, x2, y2 = self.screen.T
+        inside_outer = (x >= x1 - HIT_TOLERANCE) & (x <= x2 + HIT_TOLERANCE) & (y >= y1 - HIT_TOLERANCE) & (y <= y2 + HIT_TOLERANCE)
+        inside_inner = (x > x1 + HIT_TOLERANCE) & (x < x2 - HIT_TOLERANCE) & (y > y1 + HIT_TOLERANCE) & (y < y2 - HIT_TOLERANCE)
+        hits = np.flatnonzero(self.rect_shown & inside_outer & (self.is_polygon | ~inside_inner))
+        if not len(hits):
+            return None
+        areas = (x2[hits] - x1[hits]) * (y2[hits] - y1[hits])
+        return int(hits[np.argmin(areas)])
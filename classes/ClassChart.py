@@ -0,0 +1,178 @@
+import math
+import tkinter as tk
+from tkinter import ttk
+from utils.file_utils import truncate_name
+from utils.stats_utils import ranked_class_counts
+from utils.perf_utils import timed
+
+ROW_HEIGHT = 22
+LABEL_WIDTH = 200  # Class names left of the bars
+VALUE_WIDTH = 110  # Room right of the longest bar for its count
+SCROLL_ROWS = 3  # Rows per mouse wheel notch
+BAR_COLOR = '#4a7ebb'
+OTHER_COLOR = '#a0a0a0'
+
+class ClassChart:
+    # Window with one horizontal bar per class, largest first, drawn on a Canvas. Only the rows
+    # in view have canvas items: they are reused when scrolling and updated in place when the
+    # stats change, so redrawing costs the same for ten classes or ten thousand. The classes
+    # after the top K can be folded into a single "Other" bar.
+    def __init__(self, manager):
+        self.manager = manager
+        self.window = None
+        self.class_ids = []
+        self.counts = []
+        self.other_classes = 0
+        self.other_total = 0
+        self.total = 0
+        self.first_row = 0
+        self.slots = []  # [name item, bar item, value item, last drawn row] per visible row
+
+    def show(self):
+        if self.window is not None:
+            self.window.lift()
+            return
+        self.window = tk.Toplevel(self.manager.root)
+        self.window.title("Class Annotations")
+        self.window.geometry("700x500")
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        controls = tk.Frame(self.window)
+        controls.pack(fill=tk.X, padx=5, pady=5)
+        self.log_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(controls, text="Log scale", variable=self.log_var, command=self.redraw).pack(side=tk.LEFT)
+        tk.Label(controls, text="Top classes (0 = all)").pack(side=tk.LEFT, padx=(10, 0))
+        self.top_k_box = tk.Spinbox(controls, from_=0, to=1000000, width=7, command=self.refresh)
+        self.top_k_box.pack(side=tk.LEFT)
+        self.top_k_box.bind('<Return>', lambda event: self.refresh())
+        self.top_k_box.bind('<FocusOut>', lambda event: self.refresh())
+        self.summary_label = tk.Label(controls, anchor='e')
+        self.summary_label.pack(side=tk.RIGHT)
+
+        self.scrollbar = ttk.Scrollbar(self.window, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas = tk.Canvas(self.window, background='white', highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self.canvas.bind('<Configure>', lambda event: self.redraw())
+        self.canvas.bind('<MouseWheel>', self.on_wheel)
+        self.canvas.bind('<Button-4>', self.on_wheel)
+        self.canvas.bind('<Button-5>', self.on_wheel)
+        self.canvas.bind('<Double-Button-1>', self.on_double_click)
+        self.refresh()
+
+    def on_close(self):
+        self.window.destroy()
+        self.window = None
+        self.slots = []
+
+    def top_k(self):
+        try:
+            return max(0, int(self.top_k_box.get()))
+        except ValueError:
+            return 0
+
+    def refresh(self):
+        # Called after every stats redraw; does nothing while the window is closed
+        if self.window is None:
+            return
+        class_counts = self.manager.stats_manager.combined_class_counts()
+        self.total = int(class_counts.sum())
+        self.class_ids, self.counts, self.other_classes, self.other_total = ranked_class_counts(class_counts, self.top_k())
+        self.redraw()
+
+    def num_rows(self):
+        return len(self.class_ids) + (1 if self.other_classes else 0)
+
+    def row(self, index):
+        # (label, count, colour) of a chart row
+        if index < len(self.class_ids):
+            class_id = int(self.class_ids[index])
+            classes = self.manager.classes
+            name = classes[class_id] if class_id < len(classes) else str(class_id)
+            return truncate_name(name, 28), int(self.counts[index]), BAR_COLOR
+        return f"Other ({self.other_classes} classes)", self.other_total, OTHER_COLOR
+
+    @timed('chart.redraw')
+    def redraw(self):
+        if self.window is None:
+            return
+        canvas = self.canvas
+        width, height = canvas.winfo_width(), canvas.winfo_height()
+        num_rows = self.num_rows()
+        full_rows = max(1, height // ROW_HEIGHT)
+        self.first_row = max(0, min(self.first_row, num_rows - full_rows))
+        while len(self.slots) < full_rows + 1:  # Plus a partly visible row at the bottom
+            self.slots.append([
+                canvas.create_text(5, 0, anchor='w'),
+                canvas.create_rectangle(0, 0, 0, 0, width=0),
+                canvas.create_text(0, 0, anchor='w'),
+                None,
+            ])
+
+        # Scaled to the largest class; a long tail's "Other" bar can be larger and is cut off
+        peak = max(int(self.counts[0]) if len(self.counts) else 0, 1)
+        log_scale = self.log_var.get()
+        bar_width = max(0, width - LABEL_WIDTH - VALUE_WIDTH)
+        for offset, slot in enumerate(self.slots):
+            index = self.first_row + offset
+            if index >= num_rows or offset > full_rows:
+                drawn = None
+            else:
+                label, count, color = self.row(index)
+                scale = min(1, math.log1p(count) / math.log1p(peak) if log_scale else count / peak)
+                share = count / self.total * 100 if self.total else 0
+                drawn = (label, f"{count} ({share:.1f}%)", color, offset * ROW_HEIGHT, round(scale * bar_width))
+            if drawn != slot[3]:
+                self.draw_slot(slot, drawn)
+
+        if num_rows > full_rows:
+            self.scrollbar.set(self.first_row / num_rows, (self.first_row + full_rows) / num_rows)
+        else:
+            self.scrollbar.set(0, 1)
+        scale_text = "log scale" if log_scale else "linear scale"
+        self.summary_label.config(text=f"{len(self.manager.classes)} classes, {self.total} boxes, {scale_text}")
+
+    def draw_slot(self, slot, drawn):
+        # Moves and relabels the items of one visible row; only called when the row changed
+        name_item, bar_item, value_item, _ = slot
+        slot[3] = drawn
+        if drawn is None:
+            for item in (name_item, bar_item, value_item):
+                self.canvas.itemconfigure(item, state=tk.HIDDEN)
+            return
+        label, value, color, y, length = drawn
+        middle = y + ROW_HEIGHT / 2
+        self.canvas.coords(name_item, 5, middle)
+        self.canvas.itemconfigure(name_item, text=label, state=tk.NORMAL)
+        self.canvas.coords(bar_item, LABEL_WIDTH, y + 3, LABEL_WIDTH + length, y + ROW_HEIGHT - 3)
+        self.canvas.itemconfigure(bar_item, fill=color, state=tk.NORMAL)
+        self.canvas.coords(value_item, LABEL_WIDTH + length + 5, middle)
+        self.canvas.itemconfigure(value_item, text=value, state=tk.NORMAL)
+
+    def scroll_to(self, first_row):
+        self.first_row = first_row
+        self.redraw()
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == tk.MOVETO:
+            self.scroll_to(int(float(value) * self.num_rows()))
+        elif action == tk.SCROLL:
+            step = max(1, self.canvas.winfo_height() // ROW_HEIGHT) if unit == tk.PAGES else 1
+            self.scroll_to(self.first_row + int(value) * step)
+
+    def on_wheel(self, event):
+        up = event.num == 4 or event.delta > 0
+        self.scroll_to(self.first_row + (-SCROLL_ROWS if up else SCROLL_ROWS))
+
+    def on_double_click(self, event):
+        # Selects the class in the main window, listing its images
+        index = self.first_row + event.y // ROW_HEIGHT
+        if index >= len(self.class_ids):
+            return
+        class_id = int(self.class_ids[index])
+        class_listbox = self.manager.class_listbox
+        if class_id < class_listbox.size():
+            class_listbox.selection_clear(0, tk.END)
+            class_listbox.selection_set(class_id)
+            class_listbox.see(class_id)
+            class_listbox.event_generate('<<ListboxSelect>>')
@@ -0,0 +1,63 @@
+import numpy as np
+
+EMPTY_IDS = np.zeros(0, dtype=np.int32)
+
+class ClassIndex:
+    # Inverted index from class id to the sorted ids of the images that contain it
+    def __init__(self):
+        self.images_by_class = {}
+
+    def build(self, image_idx, class_ids):
+        valid = class_ids >= 0
+        keys = np.unique(class_ids[valid].astype(np.int64) << 32 | image_idx[valid].astype(np.int64))
+        key_classes = (keys >> 32).astype(np.int32)
+        key_images = (keys & 0xFFFFFFFF).astype(np.int32)
+        classes, starts = np.unique(key_classes, return_index=True)
+        ends = np.append(starts[1:], len(keys))
+        self.images_by_class = {int(class_id): key_images[start:end] for class_id, start, end in zip(classes, starts, ends)}
+        return self
+
+    def images(self, class_id):
+        return self.images_by_class.get(class_id, EMPTY_IDS)
+
+    def image_counts(self):
+        return {class_id: len(image_ids) for class_id, image_ids in self.images_by_class.items()}
+
+    def add(self, class_id, image_id):
+        image_ids = self.images(class_id)
+        position = np.searchsorted(image_ids, image_id)
+        if position < len(image_ids) and image_ids[position] == image_id:
+            return
+        self.images_by_class[class_id] = np.insert(image_ids, position, image_id).astype(np.int32)
+
+    def discard(self, class_id, image_id):
+        image_ids = self.images(class_id)
+        position = np.searchsorted(image_ids, image_id)
+        if position == len(image_ids) or image_ids[position] != image_id:
+            return
+        if len(image_ids) == 1:
+            del self.images_by_class[class_id]
+        else:
+            self.images_by_class[class_id] = np.delete(image_ids, position)
+
+    def update_image(self, image_id, old_class_ids, new_class_ids):
+        # Only classes that appear in or disappear from the image are touched
+        old_classes = {int(class_id) for class_id in old_class_ids if class_id >= 0}
+        new_classes = {int(class_id) for class_id in new_class_ids if class_id >= 0}
+        for class_id in old_classes - new_classes:
+            self.discard(class_id, image_id)
+        for class_id in new_classes - old_classes:
+            self.add(class_id, image_id)
+
+    def remap(self, mapping):
+        # mapping[old_id] is the new id or -1; classes outside the mapping keep their id
+        remapped = {}
+        for class_id, image_ids in self.images_by_class.items():
+            new_id = int(mapping[class_id]) if class_id < len(mapping) else class_id
+            if new_id < 0:
+                continue
+            if new_id in remapped:
+                remapped[new_id] = np.union1d(remapped[new_id], image_ids).astype(np.int32)
+            else:
+                remapped[new_id] = image_ids
+        self.images_by_class = remapped
@@ -1,54 +1,225 @@
 import os
-import threading
+import time
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk
-from utils.file_utils import load_yaml, load_images_and_labels
-from utils.image_utils import create_thumbnail
+from classes.ThumbnailCache import ThumbnailCache
+from classes.AnnotationStore import AnnotationStore
+from classes.DatasetSnapshot import DatasetSnapshot
+from utils.file_utils import load_yaml_data, iter_label_texts
+from utils.label_utils import parse_label_batch, concat_label_batches
+from utils.image_utils import decode_thumbnail
+from utils.cache_utils import get_cache_dir, thumbnail_key
+from utils.split_utils import resolve_splits, stat_splits, split_indices, get_image_path
+from utils.validation_utils import validate_store, find_unpaired_files
+from utils.perf_utils import span
+
+THUMBNAIL_SIZE = (40, 40)
+THUMBNAIL_CHUNKSIZE = 64  # Images handed to a worker process per round trip
+PROGRESS_INTERVAL = 0.25  # Seconds between progress updates while decoding
 
 class DatasetLoader:
+    # Loading runs as one scheduler job; everything it reports to the UI is posted back to the
+    # Tk thread through the job's task, so the worker never touches Tk, the manager or the
+    # loader's own attributes. A cancelled job's posts are dropped, so it cannot overwrite the
+    # state of the load that replaced it.
     def __init__(self, manager):
         self.manager = manager
+        self.total_images = 0
+        self.loaded_labels = 0
+        self.loaded_thumbnails = 0
+        self.image_stats = {}
+        self.label_stats = {}
+        self.load_task = None
 
     def load_dataset(self):
         self.manager.dataset_dir = filedialog.askdirectory(title="Select Dataset Directory")
         if not self.manager.dataset_dir:
             return
-        
+
+        self.manager.watcher.stop()
         self.manager.progress['value'] = 0
-        self.manager.root.update_idletasks()
-        
-        # Start a new thread to load the dataset
-        threading.Thread(target=self.load_dataset_thread).start()
-
-    def load_dataset_thread(self):
-        self.load_yaml()
-        self.load_images_and_labels_dir()
-        self.manager.load_classes()
-        self.manager.stats_manager.update_stats()
-        self.manager.update_class_listbox() 
+        self.manager.image_list.clear()
+        self.manager.image_cache.clear()
+        self.total_images = 0
+        self.loaded_labels = 0
+        self.loaded_thumbnails = 0
+        self.image_stats = {}
+        self.label_stats = {}
+        self.open_thumbnail_cache()
 
-    def load_yaml(self):
-        yaml_path = os.path.join(self.manager.dataset_dir, 'data.yaml')
+        # Submitting under the same key cancels a load that is still running
+        self.load_task = self.manager.scheduler.submit(self.load_dataset_job, self.manager.dataset_dir, self.manager.thumbnail_cache, key='load', on_done=self.finish_loading, on_error=self.on_load_error)
+
+    def load_dataset_job(self, task, dataset_dir, cache):
+        classes, splits = self.load_yaml(task, dataset_dir)
+        if classes is None:
+            classes = []  # Never keep the previous dataset's class names
+        task.post(self.on_classes, classes, splits)
+        self.load_images_and_labels_dir(task, splits, classes, cache)
+
+    def open_thumbnail_cache(self):
+        previous = self.manager.thumbnail_cache
+        if previous is not None:
+            if self.load_task is not None:
+                # A cancelled load may still be writing to the old cache; it is closed once that job returns
+                self.load_task.future.add_done_callback(lambda future: previous.close())
+            else:
+                previous.close()
+        self.manager.thumbnail_cache = ThumbnailCache(get_cache_dir(self.manager.dataset_dir), THUMBNAIL_SIZE)
+
+    def load_yaml(self, task, dataset_dir):
+        # Returns (class names, splits); class names are None without a data.yaml
+        yaml_path = os.path.join(dataset_dir, 'data.yaml')
         if not os.path.exists(yaml_path):
-            messagebox.showerror("Error", "data.yaml file not found in the selected directory.")
+            task.post(messagebox.showerror, "Error", "data.yaml file not found in the selected directory.")
+            return None, resolve_splits(dataset_dir, {})
+
+        data = load_yaml_data(yaml_path)
+        return data['names'], resolve_splits(dataset_dir, data)
+
+    def load_images_and_labels_dir(self, task, splits, classes, cache):
+        if '' in splits and not all(os.path.exists(directory) for directory in splits['']):
+            task.post(messagebox.showerror, "Error", "Images or Labels directory not found.")
+            return
+
+        # One stat pass per split, run concurrently, feeds the snapshot diff and the thumbnail cache.
+        # All splits share one index; image names carry their split as a "split/" prefix.
+        with span('load.stat'):
+            image_stats, label_stats, label_files = stat_splits(splits)
+        if task.cancelled:
             return
+        images = list(image_stats)
+        task.post(self.on_stat, image_stats, label_stats, len(images))
+        image_label_stats = np.array([label_stats.get(os.path.splitext(image)[0], (-1, -1)) for image in images], dtype=np.int64).reshape(-1, 2)
+        label_mtimes, label_sizes = image_label_stats[:, 0], image_label_stats[:, 1]
+
+        snapshot = DatasetSnapshot(cache.cache_dir)
+        with span('load.labels'):
+            store, changed = self.load_labels_from_snapshot(task, snapshot, images, label_files, label_mtimes, label_sizes)
+            if store is None:
+                store, changed = self.load_labels(task, splits, images, label_files), True
+        if task.cancelled:
+            return
+        if changed:
+            with span('load.snapshot_save'):
+                store.compact()
+                position = {image: i for i, image in enumerate(images)}
+                order = np.array([position[image] for image in store.names], dtype=np.int64)
+                snapshot.save(store, classes, label_mtimes[order], label_sizes[order])
+        # Validated here, before the Tk thread can edit the store
+        with span('load.validate'):
+            report = validate_store(store, len(classes))
+            report['missing_labels'], report['orphan_labels'] = find_unpaired_files(images, label_files)
+        task.post(self.on_store, store)
+        task.post(lambda: self.manager.validation.set_report(report))
+
+        if images:
+            with span('load.thumbnails'):
+                self.load_thumbnails(task, splits, images, image_stats, cache)
+
+    def load_labels_from_snapshot(self, task, snapshot, images, label_files, label_mtimes, label_sizes):
+        # Reuses the last snapshot and reparses only label files whose mtime or size changed
+        loaded = snapshot.load()
+        if loaded is None:
+            return None, False
+        store, _, old_mtimes, old_sizes = loaded
+
+        current = set(images)
+        removed = [name for name in store.names if name not in current]
+        if removed:
+            store.remove_images(removed)
+        store.add_images([image for image in images if image not in store.ids])
+
+        image_ids = np.array([store.ids[image] for image in images], dtype=np.int64)
+        is_old = image_ids < len(old_mtimes)
+        changed = ~is_old
+        changed[is_old] = (old_mtimes[image_ids[is_old]] != label_mtimes[is_old]) | (old_sizes[image_ids[is_old]] != label_sizes[is_old])
+        changed_images = [images[i] for i in np.flatnonzero(changed)]
+        if changed_images:
+            batches = [parse_label_batch(texts) for _, texts in iter_label_texts(changed_images, label_files)]
+            store.replace_images([store.ids[image] for image in changed_images], concat_label_batches(batches))
+        task.post(self.set_progress, len(images), 0, key='load-progress')
+        return store, bool(removed or changed_images)
+
+    def load_labels(self, task, splits, images, label_files):
+        # Label files are read by a thread pool and parsed a batch at a time; each parsed
+        # batch is streamed to the Tk thread so the stats fill in while loading continues
+        batches = []
+        loaded = 0
+        for batch_images, texts in iter_label_texts(images, label_files):
+            if task.cancelled:
+                break
+            batch = parse_label_batch(texts)
+            batches.append(batch)
+            loaded += len(batch_images)
+            task.post(self.on_label_batch, loaded, batch, split_indices(batch_images, list(splits)))
+        return AnnotationStore().build_from_batches(images, batches)
+
+    def load_thumbnails(self, task, splits, images, image_stats, cache):
+        # Icons are built lazily from the cache, so only new or changed images are decoded here
+        missing = [image for image in images if cache.lookup(thumbnail_key(image), *image_stats[image]) is None]
+        loaded = len(images) - len(missing)
+        task.post(self.set_progress, len(images), loaded, key='load-progress')
+
+        if missing:
+            img_paths = [get_image_path(splits, image) for image in missing]
+            next_progress = time.monotonic() + PROGRESS_INTERVAL
+            # Spawned workers avoid forking a process that holds the Tk interpreter
+            with ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn')) as executor:
+                thumbnails = executor.map(decode_thumbnail, img_paths, chunksize=THUMBNAIL_CHUNKSIZE)
+                for image, (data, image_hash, image_size) in zip(missing, thumbnails):
+                    if task.cancelled:
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        return  # A new load closes this cache once the job returns
+                    cache.put(thumbnail_key(image), *image_stats[image], data, image_hash, image_size)
+                    loaded += 1
+                    if time.monotonic() >= next_progress:
+                        next_progress = time.monotonic() + PROGRESS_INTERVAL
+                        task.post(self.set_progress, len(images), loaded, key='load-progress')
+            task.post(self.set_progress, len(images), loaded, key='load-progress')
+
+        cache.prune({thumbnail_key(image) for image in images})
+        cache.save()
+
+    def on_classes(self, classes, splits):
+        self.manager.classes = classes
+        self.manager.splits = splits
+        self.manager.load_classes()
+        self.manager.stats_manager.reset()
+
+    def on_stat(self, image_stats, label_stats, total_images):
+        self.image_stats, self.label_stats = image_stats, label_stats  # Baseline for the watcher
+        self.total_images = total_images
+
+    def on_label_batch(self, loaded_labels, batch, image_splits):
+        self.loaded_labels = loaded_labels
+        self.manager.stats_manager.add_batch(batch[0], batch[1], image_splits)
+        self.update_progress()
+
+    def on_store(self, store):
+        # Labels are complete; classes can be browsed while thumbnails are still decoding
+        self.manager.annotations = store
+        self.manager.images = list(store.names)
+        self.manager.stats_manager.update_stats()
+
+    def set_progress(self, loaded_labels, loaded_thumbnails):
+        self.loaded_labels, self.loaded_thumbnails = loaded_labels, loaded_thumbnails
+        self.update_progress()
+
+    def update_progress(self):
+        if self.total_images:
+            # Labels and thumbnails each account for half of the bar
+            self.manager.progress['value'] = (self.loaded_labels + self.loaded_thumbnails) / self.total_images * 50
+
+    def on_load_error(self, error):
+        messagebox.showerror("Error", f"Could not load the dataset: {error}")
+        self.finish_loading()
 
-        self.manager.classes = load_yaml(yaml_path)
-
-    def load_images_and_labels_dir(self):
-        images_dir = os.path.join(self.manager.dataset_dir, 'images')
-        labels_dir = os.path.join(self.manager.dataset_dir, 'labels')
-
-        self.manager.images, self.manager.image_labels = load_images_and_labels(images_dir, labels_dir)
-
-        total_images = len(self.manager.images)
-        self.manager.image_icons = {}
-        for i, image in enumerate(self.manager.images):
-            img_path = os.path.join(images_dir, image)
-            img = Image.open(img_path)
-            img = create_thumbnail(img, size=(40, 40))
-            icon = ImageTk.PhotoImage(img)
-            self.manager.image_icons[image] = icon
-            
-            self.manager.progress['value'] = (i + 1) / total_images * 100
-            self.manager.root.update_idletasks()
\ No newline at end of file
+    def finish_loading(self, result=None):
+        self.update_progress()
+        self.manager.image_metrics.invalidate_files()  # Resolutions of newly decoded images
+        self.manager.update_class_listbox()
+        if self.image_stats:
+            self.manager.watcher.start(self.image_stats, self.label_stats, self.manager.thumbnail_cache)
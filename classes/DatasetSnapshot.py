@@ -0,0 +1,73 @@
+import os
+import json
+import numpy as np
+from classes.AnnotationStore import AnnotationStore
+from utils.file_utils import write_atomic
+
+SNAPSHOT_DIR = 'index'
+META_FILE = 'meta.json'
+SNAPSHOT_VERSION = 1
+STORE_ARRAYS = ('invalid_counts', 'image_offsets', 'image_idx', 'class_ids', 'boxes', 'seg_offsets', 'seg_coords')
+STAT_ARRAYS = ('label_mtimes', 'label_sizes')
+
+class DatasetSnapshot:
+    # Binary snapshot of a loaded dataset: the parsed annotation arrays as .npy files that are
+    # memory-mapped on load, plus a JSON file with the image names, the class table and the array
+    # lengths. meta.json is written last, so an interrupted save is never mistaken for a valid one.
+    def __init__(self, cache_dir):
+        self.snapshot_dir = os.path.join(cache_dir, SNAPSHOT_DIR)
+
+    def save(self, store, classes, label_mtimes, label_sizes):
+        # The store must be compact, so image ids index the saved arrays
+        self.detach(store)
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        meta_path = os.path.join(self.snapshot_dir, META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+
+        arrays = {name: getattr(store, name) for name in STORE_ARRAYS}
+        arrays['label_mtimes'] = np.asarray(label_mtimes, dtype=np.int64)
+        arrays['label_sizes'] = np.asarray(label_sizes, dtype=np.int64)
+        for name, array in arrays.items():
+            tmp_path = os.path.join(self.snapshot_dir, name + '.tmp.npy')
+            np.save(tmp_path, np.ascontiguousarray(array))
+            os.replace(tmp_path, os.path.join(self.snapshot_dir, name + '.npy'))
+
+        meta = {
+            'version': SNAPSHOT_VERSION,
+            'names': store.names,
+            'classes': list(classes),
+            'lengths': {name: len(array) for name, array in arrays.items()},
+        }
+        write_atomic(meta_path, json.dumps(meta))
+
+    def detach(self, store):
+        # Store arrays still mapped from the previous snapshot are copied into memory, so their
+        # files can be replaced; Windows refuses to replace a file that is memory-mapped
+        for name in STORE_ARRAYS:
+            array = getattr(store, name)
+            if isinstance(array, np.memmap):
+                setattr(store, name, np.array(array, copy=True))
+
+    def load(self):
+        # Returns (store, classes, label_mtimes, label_sizes) or None if there is no usable snapshot
+        try:
+            with open(os.path.join(self.snapshot_dir, META_FILE), 'r') as file:
+                meta = json.load(file)
+            if meta.get('version') != SNAPSHOT_VERSION:
+                return None
+            # Copy-on-write maps: pages are read lazily and edits never reach the files
+            arrays = {name: np.load(os.path.join(self.snapshot_dir, name + '.npy'), mmap_mode='c') for name in STORE_ARRAYS + STAT_ARRAYS}
+        except (OSError, ValueError, KeyError):
+            return None
+        if any(len(array) != meta['lengths'].get(name) for name, array in arrays.items()):
+            return None
+
+        store = AnnotationStore()
+        for name in STORE_ARRAYS:
+            setattr(store, name, arrays[name])
+        store.names = meta['names']
+        store.ids = {image: i for i, image in enumerate(store.names)}
+        store.alive = np.ones(len(store.names), dtype=bool)
+        store.class_index.build(store.image_idx, store.class_ids)
+        return store, meta['classes'], arrays['label_mtimes'], arrays['label_sizes']
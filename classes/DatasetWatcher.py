@@ -0,0 +1,302 @@
+import os
+import time
+import errno
+import struct
+import select
+import ctypes
+import ctypes.util
+import threading
+import traceback
+import yaml
+from utils.file_utils import load_yaml_data, read_text, IMAGE_EXTENSIONS
+from utils.label_utils import parse_label_batch, select_label_batch
+from utils.image_utils import decode_thumbnail
+from utils.cache_utils import thumbnail_key
+from utils.split_utils import stat_splits, image_key, split_of, file_name_of, get_image_path
+
+BATCH_DELAY = 0.3  # Seconds of quiet after the first event before a batch is processed
+POLL_INTERVAL = 3.0  # Seconds between directory scans when inotify is unavailable
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+class Inotify:
+    # Minimal inotify binding through ctypes; raises OSError where inotify is not available
+    def __init__(self):
+        path = ctypes.util.find_library('c')
+        if path is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.libc = ctypes.CDLL(path, use_errno=True)
+        if not hasattr(self.libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories = {}
+
+    def add_watch(self, directory, tag):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"Cannot watch {directory}")
+        self.directories[wd] = tag
+
+    def read(self, timeout):
+        # Returns [(tag, name)] of the files touched, or None if the kernel queue overflowed
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if wd in self.directories and name:
+                events.append((self.directories[wd], os.fsdecode(name)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+class DatasetWatcher:
+    # Keeps the loaded dataset in sync with changes made outside the app. A background thread
+    # collects touched files from inotify (or from periodic scans where inotify is missing),
+    # waits for a burst of events to settle, then stats, reparses and re-thumbnails only those
+    # files. The Tk thread applies the result as deltas to the store, stats and image list.
+    def __init__(self, manager):
+        self.manager = manager
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.generation = 0
+        self.enabled = True
+
+    def start(self, image_stats, label_stats, cache):
+        # image_stats and label_stats are the loader's stat pass; changes since then are
+        # picked up by an initial rescan. cache is the thumbnail cache of the same load, passed
+        # in so the thread never reads manager state that a new load may replace.
+        self.stop()
+        if not self.enabled:
+            return
+        self.generation += 1
+        self.stop_event = threading.Event()
+        args = (self.generation, self.stop_event, self.manager.dataset_dir, dict(self.manager.splits), dict(image_stats), dict(label_stats), cache)
+        self.thread = threading.Thread(target=self.run, args=args, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread = None
+        self.generation += 1  # Results of a stopped watcher are dropped
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            self.stop()
+
+    def run(self, generation, stop_event, dataset_dir, splits, image_stats, label_stats, cache):
+        try:
+            self.watch(generation, stop_event, dataset_dir, splits, image_stats, label_stats, cache)
+        except Exception as error:
+            # A daemon thread dies silently, so the failure is printed and shown in the status bar
+            traceback.print_exc()
+            self.post(generation, self.on_failed, error)
+
+    def watch(self, generation, stop_event, dataset_dir, splits, image_stats, label_stats, cache):
+        yaml_path = os.path.join(dataset_dir, 'data.yaml')
+        try:
+            inotify = Inotify()
+            inotify.add_watch(dataset_dir, None)
+            for split, (images_dir, labels_dir) in splits.items():
+                for directory, kind in ((images_dir, 'images'), (labels_dir, 'labels')):
+                    if os.path.isdir(directory):
+                        inotify.add_watch(directory, (split, kind))
+        except OSError:
+            inotify = None
+
+        stems = {os.path.splitext(image)[0]: image for image in image_stats}
+        images, labels = set(), set()
+        rescan = True
+        yaml_changed = False
+        deadline = time.monotonic()
+        try:
+            while not stop_event.is_set():
+                timeout = POLL_INTERVAL if deadline is None else max(0, deadline - time.monotonic())
+                if inotify is None:
+                    stop_event.wait(timeout)
+                    events = None if deadline is None else []
+                else:
+                    events = inotify.read(min(timeout, 1.0))
+                if events is None:
+                    rescan = True
+                else:
+                    for tag, name in events:
+                        if tag is None:
+                            yaml_changed = yaml_changed or name == 'data.yaml'
+                        elif tag[1] == 'images' and name.endswith(IMAGE_EXTENSIONS):
+                            images.add(image_key(tag[0], name))
+                        elif tag[1] == 'labels' and name.endswith('.txt'):
+                            labels.add(image_key(tag[0], name[:-4]))
+                if (rescan or images or labels or yaml_changed) and deadline is None:
+                    deadline = time.monotonic() + BATCH_DELAY
+                if deadline is None or time.monotonic() < deadline or stop_event.is_set():
+                    continue
+
+                if yaml_changed and os.path.exists(yaml_path):
+                    try:
+                        self.post(generation, self.apply_classes, load_yaml_data(yaml_path)['names'])
+                    except (OSError, yaml.YAMLError, KeyError, TypeError):
+                        pass  # Half-written; the next write triggers another event
+                changes = self.collect_changes(splits, image_stats, label_stats, stems, images, labels, rescan, cache, stop_event)
+                if changes is not None:
+                    self.post(generation, self.apply_changes, *changes)
+                images, labels = set(), set()
+                rescan = yaml_changed = False
+                deadline = None
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def collect_changes(self, splits, image_stats, label_stats, stems, images, labels, rescan, cache, stop_event):
+        # Updates the known stats in place and returns (added, removed, modified, reparsed, batch)
+        if rescan:
+            new_image_stats, new_label_stats, _ = stat_splits(splits)
+            images = set(image_stats) | set(new_image_stats)
+            labels = set(label_stats) | set(new_label_stats)
+            current_images = {image: new_image_stats.get(image) for image in images}
+            current_labels = {stem: new_label_stats.get(stem) for stem in labels}
+        else:
+            current_images = {image: self.stat(get_image_path(splits, image)) for image in images}
+            current_labels = {stem: self.stat(self.label_path(splits, stem)) for stem in labels}
+
+        added, removed, modified = [], [], []
+        for image, stat in current_images.items():
+            old = image_stats.get(image)
+            if stat == old:
+                continue
+            if stat is None:
+                removed.append(image)
+                del image_stats[image]
+                stems.pop(os.path.splitext(image)[0], None)
+            else:
+                (added if old is None else modified).append(image)
+                image_stats[image] = stat
+                stems[os.path.splitext(image)[0]] = image
+        reparsed = set(added)
+        for stem, stat in current_labels.items():
+            if stat == label_stats.get(stem):
+                continue
+            if stat is None:
+                label_stats.pop(stem, None)
+            else:
+                label_stats[stem] = stat
+            if stem in stems:
+                reparsed.add(stems[stem])
+        if not (added or removed or modified or reparsed):
+            return None
+
+        reparsed = sorted(reparsed)
+        batch = parse_label_batch([read_text(self.label_path(splits, os.path.splitext(image)[0])) for image in reparsed])
+        if cache is not None and not stop_event.is_set():
+            # A new load closes this cache; writes after that are ignored by the cache
+            for image in added + modified:
+                if stop_event.is_set():
+                    break
+                try:
+                    data, image_hash, image_size = decode_thumbnail(get_image_path(splits, image), cache.size)
+                    cache.put(thumbnail_key(image), *image_stats[image], data, image_hash, image_size)
+                except (OSError, ValueError):
+                    continue  # Only this image's thumbnail is skipped; its annotations still sync
+            for image in removed:
+                cache.remove(thumbnail_key(image))
+            cache.save()
+        return sorted(added), sorted(removed), modified, reparsed, batch
+
+    def stat(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def label_path(self, splits, stem):
+        return os.path.join(splits[split_of(stem)][1], file_name_of(stem) + '.txt')
+
+    def post(self, generation, callback, *args):
+        self.manager.scheduler.call_soon(self.deliver, generation, callback, args)
+
+    def deliver(self, generation, callback, args):
+        # Runs on the Tk thread; results of a stopped watcher are dropped
+        if generation == self.generation:
+            callback(*args)
+
+    def on_failed(self, error):
+        self.thread = None
+        self.manager.status_label.config(text=f"File watcher stopped: {error}")
+
+    def apply_classes(self, classes):
+        if classes == self.manager.classes:
+            return  # Our own data.yaml rewrite
+        self.manager.classes = list(classes)
+        self.manager.update_class_listbox()
+        self.manager.stats_manager.update_stats()
+        self.manager.status_label.config(text="Reloaded classes from data.yaml")
+
+    def apply_changes(self, added, removed, modified, reparsed, batch):
+        manager = self.manager
+        store = manager.annotations
+        stats = manager.stats_manager
+
+        # Files the app itself deleted or created are already in the store
+        removed = [image for image in removed if image in store.ids]
+        added = [image for image in added if image not in store.ids]
+        for image in removed:
+            old_class_ids = store.class_ids[store.rows(store.image_id(image))]
+            stats.add_image_contribution(old_class_ids, -1, stats.split_index(image))
+        if removed:
+            store.remove_images(removed)
+            manager.image_list.remove_rows(removed)
+        store.add_images(added)
+        for image in added:
+            stats.add_image_contribution([], 1, stats.split_index(image))
+
+        present = [i for i, image in enumerate(reparsed) if image in store.ids]
+        if len(present) < len(reparsed):
+            batch = select_label_batch(batch, present)
+            reparsed = [reparsed[i] for i in present]
+        image_ids = [store.ids[image] for image in reparsed]
+        old_class_ids = [store.class_ids[store.rows(image_id)].copy() for image_id in image_ids]
+        store.replace_images(image_ids, batch)
+        for image, image_id, old in zip(reparsed, image_ids, old_class_ids):
+            split = stats.split_index(image)
+            stats.add_image_contribution(old, -1, split)
+            stats.add_image_contribution(store.class_ids[store.rows(image_id)], 1, split)
+
+        for image in removed + modified + reparsed:
+            manager.image_cache.discard(get_image_path(manager.splits, image))
+        for image in modified:
+            manager.image_list.invalidate(image)
+        if added or modified:
+            manager.image_metrics.invalidate_files()
+        if removed or added:
+            gone = set(removed)
+            manager.images = [image for image in manager.images if image not in gone] + added
+        stats.refresh_display()
+
+        selection = manager.class_listbox.curselection()
+        if selection and (added or removed or reparsed):
+            manager.image_display_manager.update_image_listbox(selection[0], reset=False)
+        changed = len(added) + len(removed) + len(set(modified) | set(reparsed))
+        manager.status_label.config(text=f"Synced {changed} externally changed images")
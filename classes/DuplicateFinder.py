@@ -0,0 +1,95 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from utils.cache_utils import thumbnail_key
+from utils.hash_utils import find_duplicate_groups, MAX_HASH_DISTANCE
+
+class DuplicateFinder:
+    # Window listing groups of identical or near-identical images, found from the perceptual
+    # hashes stored with the thumbnails. Extra copies can be selected and deleted in one go.
+    def __init__(self, manager):
+        self.manager = manager
+        self.window = None
+
+    def show(self):
+        if self.window is not None:
+            self.window.lift()
+            return
+        self.window = tk.Toplevel(self.manager.root)
+        self.window.title("Duplicate Images")
+        self.window.geometry("500x600")
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        controls = tk.Frame(self.window)
+        controls.pack(fill=tk.X, padx=5, pady=5)
+        tk.Label(controls, text="Max distance:").pack(side=tk.LEFT)
+        self.distance = tk.Spinbox(controls, from_=0, to=10, width=4, command=self.scan)
+        self.distance.delete(0, tk.END)
+        self.distance.insert(0, str(MAX_HASH_DISTANCE))
+        self.distance.pack(side=tk.LEFT, padx=5)
+        tk.Button(controls, text="Rescan", command=self.scan).pack(side=tk.RIGHT)
+
+        self.tree = ttk.Treeview(self.window, show='tree', selectmode='extended')
+        scrollbar = ttk.Scrollbar(self.window, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=5)
+        self.tree.bind('<Double-Button-1>', self.on_double_click)
+
+        buttons = tk.Frame(self.window)
+        buttons.pack(fill=tk.X, padx=5, pady=5)
+        tk.Button(buttons, text="Select All But First", command=self.select_extra_copies).pack(side=tk.LEFT)
+        tk.Button(buttons, text="Delete Selected", command=self.delete_selected).pack(side=tk.RIGHT)
+
+        self.summary_label = tk.Label(self.window, anchor='w')
+        self.summary_label.pack(fill=tk.X, padx=5, pady=5)
+        self.scan()
+
+    def scan(self):
+        cache = self.manager.thumbnail_cache
+        images = []
+        hashes = []
+        unhashed = 0
+        for image in self.manager.images:
+            image_hash = cache.get_hash(thumbnail_key(image)) if cache is not None else None
+            if image_hash is None:
+                unhashed += 1  # Not decoded yet, or unreadable
+                continue
+            images.append(image)
+            hashes.append(image_hash)
+
+        try:
+            max_distance = int(self.distance.get())
+        except ValueError:
+            max_distance = MAX_HASH_DISTANCE
+        groups = [sorted(images[i] for i in group) for group in find_duplicate_groups(hashes, max_distance)]
+
+        self.tree.delete(*self.tree.get_children())
+        for number, group in enumerate(groups, start=1):
+            parent = self.tree.insert('', 'end', text=f"Group {number} ({len(group)} images)", open=True)
+            for image in group:
+                self.tree.insert(parent, 'end', image, text=image)
+        summary = f"{len(groups)} groups, {sum(len(group) for group in groups)} images"
+        if unhashed:
+            summary += f" ({unhashed} images not hashed yet)"
+        self.summary_label.config(text=summary)
+
+    def select_extra_copies(self):
+        extra = [child for group in self.tree.get_children() for child in self.tree.get_children(group)[1:]]
+        self.tree.selection_set(extra)
+
+    def delete_selected(self):
+        # Group rows are not images; only their children can be deleted
+        images = [item for item in self.tree.selection() if self.tree.parent(item)]
+        if not images or not messagebox.askyesno("Delete Images", f"Delete {len(images)} images and their labels?", parent=self.window):
+            return
+        self.manager.delete_images(images)
+        self.scan()
+
+    def on_double_click(self, event):
+        item = self.tree.focus()
+        if item and self.tree.parent(item):
+            self.manager.image_display_manager.show_preview(item)
+
+    def on_close(self):
+        self.window.destroy()
+        self.window = None
@@ -0,0 +1,42 @@
+from collections import OrderedDict
+from PIL import ImageTk
+from utils.cache_utils import thumbnail_key
+from utils.image_utils import thumbnail_from_bytes
+
+DEFAULT_CAPACITY = 512
+
+class IconCache:
+    # Bounded LRU of PhotoImages built on demand from the thumbnail cache
+    def __init__(self, manager, capacity=DEFAULT_CAPACITY, size=(40, 40), on_evict=None):
+        self.manager = manager
+        self.capacity = capacity
+        self.size = size
+        self.on_evict = on_evict
+        self.icons = OrderedDict()
+
+    def get(self, image):
+        icon = self.icons.get(image)
+        if icon is not None:
+            self.icons.move_to_end(image)
+            return icon
+
+        data = None
+        if self.manager.thumbnail_cache is not None:
+            data = self.manager.thumbnail_cache.get(thumbnail_key(image))
+        icon = ImageTk.PhotoImage(thumbnail_from_bytes(data, self.size))
+        self.icons[image] = icon
+        while len(self.icons) > self.capacity:
+            evicted, _ = self.icons.popitem(last=False)
+            if self.on_evict is not None:
+                self.on_evict(evicted)
+        return icon
+
+    def discard(self, image):
+        self.icons.pop(image, None)
+
+    def rename(self, old_image, new_image):
+        if old_image in self.icons:
+            self.icons[new_image] = self.icons.pop(old_image)
+
+    def clear(self):
+        self.icons.clear()
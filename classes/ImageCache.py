@@ -0,0 +1,72 @@
+import threading
+from collections import OrderedDict
+from PIL import Image
+from utils.image_utils import render_preview
+
+DEFAULT_BUDGET = 512 * 1024 * 1024  # Bytes of decoded pixels kept in memory
+MAX_PREVIEWS = 64
+
+class ImageCache:
+    # Thread-safe LRU of decoded images, bounded by their pixel memory, plus an LRU of rendered
+    # previews. Previews are keyed by the annotations drawn on them, so edited labels never hit
+    # a stale preview. Shared by the preview pane, the prefetch worker and the image viewer.
+    def __init__(self, budget=DEFAULT_BUDGET, max_previews=MAX_PREVIEWS):
+        self.budget = budget
+        self.max_previews = max_previews
+        self.lock = threading.Lock()
+        self.images = OrderedDict()
+        self.used = 0
+        self.previews = OrderedDict()
+
+    def get(self, path):
+        with self.lock:
+            img = self.images.get(path)
+            if img is not None:
+                self.images.move_to_end(path)
+                return img
+
+        # Decode outside the lock so the Tk thread never waits on a background decode
+        img = Image.open(path)
+        img.load()
+        size = img.width * img.height * len(img.getbands())
+        if size > self.budget:
+            return img  # Too large to keep; the caller still gets the decoded image
+
+        with self.lock:
+            if path not in self.images:
+                self.images[path] = img
+                self.used += size
+            while self.used > self.budget:
+                _, evicted = self.images.popitem(last=False)
+                self.used -= evicted.width * evicted.height * len(evicted.getbands())
+        return img
+
+    def get_preview(self, path, class_ids, boxes, class_names, size=(400, 400), segments=None, show_masks=False):
+        segment_key = None if segments is None else (segments[0].tobytes(), segments[1].tobytes())
+        key = (path, size, class_ids.tobytes(), boxes.tobytes(), segment_key, show_masks, tuple(class_names))
+        with self.lock:
+            preview = self.previews.get(key)
+            if preview is not None:
+                self.previews.move_to_end(key)
+                return preview
+
+        preview = render_preview(self.get(path), class_ids, boxes, class_names, size, segments, show_masks)
+        with self.lock:
+            self.previews[key] = preview
+            while len(self.previews) > self.max_previews:
+                self.previews.popitem(last=False)
+        return preview
+
+    def discard(self, path):
+        with self.lock:
+            img = self.images.pop(path, None)
+            if img is not None:
+                self.used -= img.width * img.height * len(img.getbands())
+            for key in [key for key in self.previews if key[0] == path]:
+                del self.previews[key]
+
+    def clear(self):
+        with self.lock:
+            self.images.clear()
+            self.previews.clear()
+            self.used = 0
@@ -1,12 +1,25 @@
-import os
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk, ImageDraw
-from utils.image_utils import draw_bbox, convert_polygon_to_bbox
+from PIL import ImageTk
+from classes.ImagePyramid import ImagePyramid
+from classes.BoxLayer import BoxLayer
+from utils.split_utils import get_image_path, get_label_path
+from utils.file_utils import read_text, write_atomic
+from utils.label_utils import split_label_lines, format_label_line
+from utils.metrics_utils import sort_order
+from utils.perf_utils import timed
+
+REFINE_DELAY_MS = 200  # Idle time after zooming or panning before tiles are re-rendered with LANCZOS
+PREFETCH_NEIGHBOURS = 3  # Images rendered ahead on each side of the selection in the image list
+PREFETCH_WORKERS = 2
+PREVIEW_SIZE = (400, 400)
 
 class ImageDisplayManager:
     def __init__(self, manager):
         self.manager = manager
+        self.prefetch_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix='preview')
+        self.prefetch_futures = []
 
     def display_class_images(self, event):
         selected_class_index = self.manager.class_listbox.curselection()
@@ -15,60 +28,93 @@ class ImageDisplayManager:
         selected_class = selected_class_index[0]
         self.update_image_listbox(selected_class)
 
-    def update_image_listbox(self, selected_class):
-        self.manager.image_listbox.delete(*self.manager.image_listbox.get_children())
-        self.manager.filtered_images = [image for image, labels in self.manager.image_labels.items() if any(len(label.split()) > 1 and int(label.split()[0]) == selected_class for label in labels)]
-        self.manager.filtered_images.sort(reverse=not self.manager.sort_ascending)
-        self.display_filtered_images()
-
-    def display_filtered_images(self):
-        filter_text = self.manager.filter_entry.get().lower()
-        self.manager.image_listbox.delete(*self.manager.image_listbox.get_children())
-        for image in self.manager.filtered_images:
-            if filter_text in image.lower():
-                self.manager.image_listbox.insert('', 'end', image, text=image, image=self.manager.image_icons[image])
-
+    def update_image_listbox(self, selected_class, reset=True):
+        # reset=False keeps the list's scroll position, for updates to the same class
+        store = self.manager.annotations
+        image_ids = store.class_index.images(selected_class)
+        metric = self.manager.sort_metric()
+        values = None
+        if metric is None:
+            images = [store.names[i] for i in image_ids]
+            images.sort(reverse=not self.manager.sort_ascending)
+        else:
+            values = self.manager.image_metrics.get(metric)[image_ids]
+            order = sort_order(values, self.manager.sort_ascending)
+            images = [store.names[i] for i in image_ids[order]]
+            values = values[order]
+        self.manager.filtered_images = images
+        self.manager.image_filter.set_images(images, values)
+        self.manager.image_filter.apply(reset=reset)
+
+    @timed('display_image_with_bboxes')
     def display_image_with_bboxes(self, event):
         selected_item = self.manager.image_listbox.selection()
         if not selected_item:
             return
         image_name = self.manager.image_listbox.item(selected_item, 'text')
-        img_path = os.path.join(self.manager.dataset_dir, 'images', image_name)
-        img = Image.open(img_path)
-
-        draw = ImageDraw.Draw(img)
-        labels = self.manager.image_labels[image_name]
-        for label in labels:
-            parts = label.split()
-            if len(parts) > 5:  # Handle polygon segments
-                class_id, polygon = int(parts[0]), list(map(float, parts[1:]))
-                bbox = convert_polygon_to_bbox(polygon)
-            elif len(parts) == 5:  # Handle normal bounding boxes
-                class_id = int(parts[0])
-                bbox = list(map(float, parts[1:]))
-            else:
-                continue  # Skip invalid labels
-
-            draw_bbox(draw, bbox, img.size, class_id, self.manager.classes[class_id])
+        self.show_preview(image_name)
+        self.prefetch_neighbours(image_name)
 
-        img = img.resize((400, 400), Image.LANCZOS)
+    def show_preview(self, image_name):
+        # Usually already rendered by the prefetch workers; rendered here on a miss
+        img = self.manager.image_cache.get_preview(*self.preview_args(image_name))
         img = ImageTk.PhotoImage(img)
         self.manager.img_label.config(image=img)
         self.manager.img_label.image = img
 
+    def preview_args(self, image_name):
+        # Copies of the image's rows, so workers never read the store while the Tk thread edits it
+        img_path = get_image_path(self.manager.splits, image_name)
+        store = self.manager.annotations
+        image_id = store.image_id(image_name)
+        rows = store.rows(image_id)
+        return (img_path, store.class_ids[rows].copy(), store.boxes[rows].copy(), tuple(self.manager.classes), PREVIEW_SIZE,
+                store.image_segments(image_id), self.manager.masks_var.get())
+
+    def prefetch_neighbours(self, image_name):
+        # Decode and render the images around the selection so stepping through the list is instant
+        for future in self.prefetch_futures:
+            future.cancel()
+        self.prefetch_futures = []
+        rows = self.manager.image_list.rows
+        position = self.manager.image_list.position(image_name)
+        if position is None:
+            return
+        for offset in range(1, PREFETCH_NEIGHBOURS + 1):
+            for index in (position + offset, position - offset):
+                if 0 <= index < len(rows):
+                    future = self.prefetch_executor.submit(self.prefetch_preview, *self.preview_args(rows[index]))
+                    self.prefetch_futures.append(future)
+
+    def prefetch_preview(self, *args):
+        try:
+            self.manager.image_cache.get_preview(*args)
+        except (OSError, ValueError):
+            pass  # The image will report its error when it is actually selected
+
     def open_image_viewer(self):
         selected_item = self.manager.image_listbox.selection()
         if not selected_item:
             return
         image_name = self.manager.image_listbox.item(selected_item, 'text')
-        img_path = os.path.join(self.manager.dataset_dir, 'images', image_name)
-        ImageViewer(self.manager, img_path, self.manager.image_labels[image_name])
+        store = self.manager.annotations
+        ImageViewer(self.manager, image_name, store.get_image(store.image_id(image_name)))
 
 class ImageViewer:
-    def __init__(self, manager, img_path, labels):
+    def __init__(self, manager, image_name, annotations):
         self.manager = manager
-        self.img_path = img_path
-        self.labels = labels.copy()  # Make a copy of the labels to ensure changes are not saved unless intended
+        self.image_name = image_name
+        self.img_path = get_image_path(manager.splits, image_name)
+        # Work on copies so changes are not saved unless intended
+        class_ids, boxes, segments = annotations
+        self.class_ids = [int(class_id) for class_id in class_ids]
+        self.boxes = [list(box) for box in boxes]
+        self.segments = list(segments)
+        # Each annotation's line as written in the label file, or None once it is edited, so saving
+        # rewrites only what changed. Lines the parser rejected are kept and written back as well.
+        self.label_path = get_label_path(manager.splits, image_name)
+        lines, self.rejected_lines = split_label_lines(read_text(self.label_path).splitlines())
+        self.lines = lines if len(lines) == len(self.class_ids) else [None] * len(self.class_ids)
         self.zoom_level = 1.0
         self.pan_start = None
         self.pan_offset = [0, 0]  # Track panning offset
@@ -83,15 +129,20 @@ class ImageViewer:
         self.canvas = tk.Canvas(self.window, bg="black")
         self.canvas.pack(fill=tk.BOTH, expand=True)
 
-        self.img = Image.open(self.img_path)
-        self.tk_img = ImageTk.PhotoImage(self.img)
-        self.image_on_canvas = self.canvas.create_image(0, 0, anchor=tk.NW, image=self.tk_img)
+        self.img = self.manager.image_cache.get(self.img_path)
+        self.pyramid = ImagePyramid(self.img)
+        self.tile_items = {}  # Visible tile key -> (canvas item, PhotoImage)
+        self.refine_job = None
+        self.box_layer = BoxLayer(self.canvas, self.manager.classes)
+        self.box_layer.set_show_masks(self.manager.masks_var.get())
+        self.refresh_boxes()
 
         self.canvas.bind("<Button-4>", self.zoom_in)  # For scrolling up
         self.canvas.bind("<Button-5>", self.zoom_out)  # For scrolling down
         self.canvas.bind("<ButtonPress-1>", self.on_left_button_press)
         self.canvas.bind("<B1-Motion>", self.on_mouse_drag)
         self.canvas.bind("<ButtonRelease-1>", self.on_left_button_release)
+        self.canvas.bind("<Configure>", lambda event: self.update_image())
 
         self.zoom_in_button = tk.Button(self.window, text="+", command=self.zoom_in_button_click)
         self.zoom_in_button.place(relx=1.0, rely=0.0, anchor='ne')
@@ -105,6 +156,9 @@ class ImageViewer:
         self.save_button = tk.Button(self.window, text="Save", command=self.save_changes)
         self.save_button.place(relx=1.0, rely=0.15, anchor='ne')
 
+        self.masks_button = tk.Button(self.window, text="Masks", command=self.toggle_masks)
+        self.masks_button.place(relx=1.0, rely=0.2, anchor='ne')
+
         self.window.geometry("800x800")  # Set default window size
         self.update_image()  # Draw image and bounding boxes
 
@@ -125,6 +179,11 @@ class ImageViewer:
     def on_left_button_press(self, event):
         if self.drawing_bbox:
             self.new_bbox_start = (self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+            return
+        # One handler hit-tests every box instead of a tag binding per box
+        index = self.box_layer.hit_test(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+        if index is not None:
+            self.on_bbox_click(event, index)
         else:
             self.pan_start = (event.x, event.y)
 
@@ -137,11 +196,13 @@ class ImageViewer:
         elif self.pan_start is not None:
             x_diff = event.x - self.pan_start[0]
             y_diff = event.y - self.pan_start[1]
-            self.canvas.move(self.image_on_canvas, x_diff, y_diff)
+            self.canvas.move("tile", x_diff, y_diff)
             self.canvas.move("bbox", x_diff, y_diff)
             self.pan_offset[0] += x_diff
             self.pan_offset[1] += y_diff
             self.pan_start = (event.x, event.y)
+            self.render_tiles()  # Fill in tiles uncovered by the pan
+            self.draw_bboxes()  # Show boxes that scrolled into view
 
     def on_left_button_release(self, event):
         if self.drawing_bbox and self.new_bbox_start is not None:
@@ -152,6 +213,10 @@ class ImageViewer:
             self.drawing_bbox = False
             self.new_bbox_start = None
 
+    def toggle_masks(self):
+        self.box_layer.set_show_masks(not self.box_layer.show_masks)
+        self.draw_bboxes()
+
     def start_drawing_bbox(self):
         self.drawing_bbox = True
 
@@ -175,8 +240,12 @@ class ImageViewer:
                 y_center = (y1 + y2 - 2 * self.pan_offset[1]) / 2 / (self.img.height * self.zoom_level)
                 width = (x2 - x1) / (self.img.width * self.zoom_level)
                 height = (y2 - y1) / (self.img.height * self.zoom_level)
-                self.labels.append(f"{selected_class_index} {x_center} {y_center} {width} {height}")
+                self.class_ids.append(selected_class_index)
+                self.boxes.append([x_center, y_center, width, height])
+                self.segments.append(None)
+                self.lines.append(None)
                 self.changes_made = True  # Mark changes as made
+                self.refresh_boxes()
             self.update_image()
 
         ok_button = tk.Button(top, text="OK", command=on_ok)
@@ -186,37 +255,30 @@ class ImageViewer:
         top.grab_set()
         self.window.wait_window(top)
 
+    @timed('viewer.draw_bboxes')
     def draw_bboxes(self):
-        self.canvas.delete("bbox")
-        img_width, img_height = self.img.size
-        for index, label in enumerate(self.labels):
-            parts = label.split()
-            if len(parts) > 1:
-                class_id, bbox = int(parts[0]), list(map(float, parts[1:]))
-                if len(bbox) == 4:
-                    x_center, y_center, width, height = bbox
-                    x1 = (x_center - width / 2) * img_width * self.zoom_level + self.pan_offset[0]
-                    y1 = (y_center - height / 2) * img_height * self.zoom_level + self.pan_offset[1]
-                    x2 = (x_center + width / 2) * img_width * self.zoom_level + self.pan_offset[0]
-                    y2 = (y_center + height / 2) * img_height * self.zoom_level + self.pan_offset[1]
-                    if x1 < x2 and y1 < y2:  # Ensure valid coordinates
-                        bbox_tag = f"bbox_{index}"
-                        self.canvas.create_rectangle(x1, y1, x2, y2, outline="red", tags=(bbox_tag, "bbox"))
-                        self.canvas.create_text(x1, y1, anchor=tk.NW, text=self.manager.classes[class_id], fill="red", tags=(bbox_tag, "bbox"))
-                        self.canvas.tag_bind(bbox_tag, "<Button-1>", lambda event, lbl=label: self.on_bbox_click(event, lbl))
-
-    def on_bbox_click(self, event, label):
+        self.box_layer.update(self.zoom_level, self.pan_offset, self.img.size, self.viewport())
+
+    def refresh_boxes(self):
+        # The box layer recreates its items only when the annotations themselves change
+        self.box_layer.set_boxes(self.class_ids, self.boxes, self.segments)
+
+    def on_bbox_click(self, event, index):
         menu = tk.Menu(self.window, tearoff=0)
-        menu.add_command(label="Delete", command=lambda: self.delete_bbox(label))
-        menu.add_command(label="Change Class", command=lambda: self.change_bbox_class(label))
+        menu.add_command(label="Delete", command=lambda: self.delete_bbox(index))
+        menu.add_command(label="Change Class", command=lambda: self.change_bbox_class(index))
         menu.post(event.x_root, event.y_root)
 
-    def delete_bbox(self, label):
-        self.labels = [lbl for lbl in self.labels if lbl != label]
+    def delete_bbox(self, index):
+        del self.class_ids[index]
+        del self.boxes[index]
+        del self.segments[index]
+        del self.lines[index]
         self.changes_made = True  # Mark changes as made
+        self.refresh_boxes()
         self.update_image()
 
-    def change_bbox_class(self, label):
+    def change_bbox_class(self, index):
         top = tk.Toplevel(self.window)
         top.title("Change Class")
 
@@ -229,11 +291,10 @@ class ImageViewer:
 
         def on_ok():
             top.destroy()
-            new_class_id = self.manager.classes.index(selected_class.get())
-            parts = label.split()
-            new_label = f"{new_class_id} " + ' '.join(parts[1:])
-            self.labels = [new_label if lbl == label else lbl for lbl in self.labels]
+            self.class_ids[index] = self.manager.classes.index(selected_class.get())
+            self.lines[index] = None
             self.changes_made = True  # Mark changes as made
+            self.refresh_boxes()
             self.update_image()
 
         ok_button = tk.Button(top, text="OK", command=on_ok)
@@ -243,32 +304,85 @@ class ImageViewer:
         top.grab_set()
         self.window.wait_window(top)
 
+    @timed('viewer.update_image')
     def update_image(self):
-        width, height = self.img.size
-        new_size = int(width * self.zoom_level), int(height * self.zoom_level)
-        resized_img = self.img.resize(new_size, Image.LANCZOS)
-        self.tk_img = ImageTk.PhotoImage(resized_img)
-        self.canvas.itemconfig(self.image_on_canvas, image=self.tk_img)
-        self.canvas.config(scrollregion=self.canvas.bbox(self.image_on_canvas))
+        self.render_tiles()
 
         # Redraw bounding boxes
         self.draw_bboxes()
 
+    def viewport(self):
+        # Visible canvas area in canvas coordinates; the window may not be mapped yet on first draw
+        view_width = self.canvas.winfo_width() if self.canvas.winfo_width() > 1 else 800
+        view_height = self.canvas.winfo_height() if self.canvas.winfo_height() > 1 else 800
+        view_x, view_y = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        return view_x, view_y, view_x + view_width, view_y + view_height
+
+    @timed('viewer.render_tiles')
+    def render_tiles(self, high_quality=False):
+        # Only tiles intersecting the viewport are drawn, from the nearest pyramid level.
+        # Fast renders use NEAREST and schedule a LANCZOS refinement once the view settles.
+        pan_x, pan_y = self.pan_offset
+        view_x0, view_y0, view_x1, view_y1 = self.viewport()
+        viewport = (view_x0 - pan_x, view_y0 - pan_y, view_x1 - pan_x, view_y1 - pan_y)
+
+        visible = {}
+        for key, (x, y, width, height) in self.pyramid.tile_layout(self.zoom_level, viewport):
+            photo = self.pyramid.get_tile(key, (width, height), high_quality)
+            item, _ = self.tile_items.pop(key, (None, None))
+            if item is None:
+                item = self.canvas.create_image(x + pan_x, y + pan_y, anchor=tk.NW, image=photo, tags="tile")
+            else:
+                self.canvas.coords(item, x + pan_x, y + pan_y)
+                self.canvas.itemconfig(item, image=photo)
+            visible[key] = (item, photo)
+        for item, _ in self.tile_items.values():
+            self.canvas.delete(item)
+        self.tile_items = visible
+        self.canvas.tag_lower("tile")
+
+        width, height = self.img.size
+        self.canvas.config(scrollregion=(pan_x, pan_y, pan_x + width * self.zoom_level, pan_y + height * self.zoom_level))
+
+        if self.refine_job is not None:
+            self.window.after_cancel(self.refine_job)
+            self.refine_job = None
+        if not high_quality:
+            self.refine_job = self.window.after(REFINE_DELAY_MS, self.refine_tiles)
+
+    def refine_tiles(self):
+        self.refine_job = None
+        self.render_tiles(high_quality=True)
+
     def save_changes(self):
-        label_path = os.path.join(self.manager.dataset_dir, 'labels', os.path.splitext(os.path.basename(self.img_path))[0] + '.txt')
-        with open(label_path, 'w') as file:
-            for label in self.labels:
-                file.write(label + '\n')
-        self.manager.image_labels[os.path.basename(self.img_path)] = self.labels.copy()  # Save the changes to the main label list
+        label_path = self.label_path
+        lines = [line if line is not None else format_label_line(class_id, box, segment)
+                 for line, class_id, box, segment in zip(self.lines, self.class_ids, self.boxes, self.segments)]
+        lines += self.rejected_lines
+        store = self.manager.annotations
+        image_id = store.image_id(self.image_name)
+        old_class_ids = store.class_ids[store.rows(image_id)].copy()
+        store.set_labels(image_id, lines)  # Save the changes to the annotation store, including its invalid line count
+        stats_manager = self.manager.stats_manager
+        stats_manager.image_changed(old_class_ids, self.class_ids, split=stats_manager.split_index(self.image_name))
+        text = ''.join(line + '\n' for line in lines)
+        self.manager.scheduler.submit(lambda task: write_atomic(label_path, text), key=f"save:{label_path}", on_error=self.manager.show_error)
         self.manager.image_display_manager.display_image_with_bboxes(None)  # Update main screen preview
         if self.manager.class_listbox.curselection():
             self.manager.image_display_manager.update_image_listbox(self.manager.class_listbox.curselection()[0])  # Update image list
         self.changes_made = False  # Reset changes made flag
-        self.window.destroy()
+        self.close()
 
     def on_close(self):
         if self.changes_made:
             if messagebox.askokcancel("Quit", "Do you want to close without saving?"):
-                self.window.destroy()
+                self.close()
         else:
-            self.window.destroy()
\ No newline at end of file
+            self.close()
+
+    def close(self):
+        # A pending refine would render tiles into the destroyed canvas
+        if self.refine_job is not None:
+            self.window.after_cancel(self.refine_job)
+            self.refine_job = None
+        self.window.destroy()
\ No newline at end of file
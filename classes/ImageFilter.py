@@ -0,0 +1,58 @@
+import re
+from utils.filter_utils import build_name_index, parse_filter, match_names, narrows
+from utils.metrics_utils import range_mask
+
+FILTER_DELAY_MS = 150  # Typing pause before the filter runs
+
+class ImageFilter:
+    # Filters the selected class's images by name and by the range of the sorted-on metric.
+    # Keystrokes are debounced, names are searched in a lowercase index built once per class, a
+    # growing substring only searches the previous matches, and the image list is diffed
+    # rather than rebuilt.
+    def __init__(self, manager):
+        self.manager = manager
+        self.pending = None
+        self.set_images([])
+
+    def set_images(self, images, values=None):
+        # values holds the sort metric of each image, for the range filter
+        self.images = images
+        self.values = values
+        self.index = build_name_index(images)
+        self.last_filter = None
+        self.last_matches = None
+
+    def discard(self, removed):
+        keep = [i for i, image in enumerate(self.images) if image not in removed]
+        self.set_images([self.images[i] for i in keep], None if self.values is None else self.values[keep])
+
+    def schedule(self, event=None):
+        if self.pending is not None:
+            self.manager.root.after_cancel(self.pending)
+        self.pending = self.manager.root.after(FILTER_DELAY_MS, self.apply)
+
+    def apply(self, reset=False):
+        # reset=True starts the list from the top, for a new class or sort order
+        if self.pending is not None:
+            self.manager.root.after_cancel(self.pending)
+            self.pending = None
+        try:
+            kind, pattern = parse_filter(self.manager.filter_entry.get())
+            low, high = self.manager.metric_range()
+        except re.error as error:
+            self.manager.status_label.config(text=f"Invalid filter: {error}")
+            return
+        except ValueError:
+            self.manager.status_label.config(text="Invalid range: enter numbers")
+            return
+        candidates = self.last_matches if narrows(self.last_filter, kind, pattern) else None
+        matches = match_names(self.index, kind, pattern, candidates)
+        self.last_filter, self.last_matches = (kind, pattern), matches
+        if self.values is not None and (low is not None or high is not None):
+            matches = matches[range_mask(self.values[matches], low, high)]
+
+        rows = [self.images[i] for i in matches]
+        if reset:
+            self.manager.image_list.set_rows(rows)
+        else:
+            self.manager.image_list.update_rows(rows)
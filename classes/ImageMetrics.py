@@ -0,0 +1,29 @@
+from utils.cache_utils import thumbnail_key
+from utils.metrics_utils import annotation_metrics, file_metrics
+
+class ImageMetrics:
+    # Metric arrays indexed by image id, kept next to the annotation store. Annotation metrics
+    # are recomputed when the store's version changes; file metrics come from the thumbnail
+    # cache index and are recomputed after the store changes or new thumbnails are decoded.
+    def __init__(self, manager):
+        self.manager = manager
+        self.store = None
+        self.version = None
+        self.annotation = {}
+        self.files = None
+
+    def invalidate_files(self):
+        self.files = None
+
+    def get(self, key):
+        store = self.manager.annotations
+        if store is not self.store or store.version != self.version:
+            self.annotation = annotation_metrics(store)
+            self.store, self.version = store, store.version
+            self.files = None
+        if key in self.annotation:
+            return self.annotation[key]
+        if self.files is None:
+            cache = self.manager.thumbnail_cache
+            self.files = file_metrics([cache.get_info(thumbnail_key(name)) if cache is not None and name is not None else None for name in store.names])
+        return self.files[key]
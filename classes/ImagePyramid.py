@@ -0,0 +1,67 @@
+import math
+from collections import OrderedDict
+from PIL import Image, ImageTk
+
+TILE_SIZE = 256
+MAX_CACHED_TILES = 256
+
+class ImagePyramid:
+    # Multi-resolution copy of an image, each level half the size of the previous one.
+    # Rendering picks the smallest level that is still at least as detailed as the zoom,
+    # and only the tiles intersecting the viewport are resized and turned into PhotoImages.
+    def __init__(self, img, tile_size=TILE_SIZE, max_tiles=MAX_CACHED_TILES):
+        if img.mode not in ('RGB', 'RGBA', 'L'):
+            img = img.convert('RGBA' if 'A' in img.getbands() else 'RGB')
+        self.tile_size = tile_size
+        self.max_tiles = max_tiles
+        self.levels = [img]
+        while max(self.levels[-1].size) > tile_size:
+            self.levels.append(self.levels[-1].reduce(2))
+        self.tiles = OrderedDict()
+
+    @property
+    def size(self):
+        return self.levels[0].size
+
+    def level_for_zoom(self, zoom):
+        if zoom >= 1:
+            return 0
+        return min(len(self.levels) - 1, int(math.floor(math.log2(1 / zoom))))
+
+    def tile_layout(self, zoom, viewport):
+        # viewport is (x0, y0, x1, y1) in screen pixels relative to the image's top-left corner.
+        # Yields ((level, tx, ty), (x, y, width, height)) for every visible tile, in screen pixels.
+        level = self.level_for_zoom(zoom)
+        scale = zoom * (self.size[0] / self.levels[level].size[0])
+        level_width, level_height = self.levels[level].size
+        tile = self.tile_size
+        x0, y0, x1, y1 = viewport
+        tx_range = range(max(0, int(x0 / scale // tile)), min(math.ceil(level_width / tile), int(x1 / scale // tile) + 1))
+        ty_range = range(max(0, int(y0 / scale // tile)), min(math.ceil(level_height / tile), int(y1 / scale // tile) + 1))
+        for ty in ty_range:
+            for tx in tx_range:
+                # Round both tile edges so neighbouring tiles meet without seams
+                sx0, sx1 = round(tx * tile * scale), round(min((tx + 1) * tile, level_width) * scale)
+                sy0, sy1 = round(ty * tile * scale), round(min((ty + 1) * tile, level_height) * scale)
+                if sx1 > sx0 and sy1 > sy0:
+                    yield (level, tx, ty), (sx0, sy0, sx1 - sx0, sy1 - sy0)
+
+    def get_tile(self, key, screen_size, high_quality):
+        # A refined tile is always good enough for a fast render at the same size
+        for cache_key in ((key, screen_size, True), (key, screen_size, high_quality)):
+            photo = self.tiles.get(cache_key)
+            if photo is not None:
+                self.tiles.move_to_end(cache_key)
+                return photo
+
+        level, tx, ty = key
+        level_img = self.levels[level]
+        tile = self.tile_size
+        crop = level_img.crop((tx * tile, ty * tile, min((tx + 1) * tile, level_img.width), min((ty + 1) * tile, level_img.height)))
+        if crop.size != screen_size:
+            crop = crop.resize(screen_size, Image.LANCZOS if high_quality else Image.NEAREST)
+        photo = ImageTk.PhotoImage(crop)
+        self.tiles[(key, screen_size, high_quality)] = photo
+        while len(self.tiles) > self.max_tiles:
+            self.tiles.popitem(last=False)
+        return photo
@@ -0,0 +1,66 @@
+import tkinter as tk
+from tkinter import filedialog
+from utils import perf_utils
+
+REFRESH_MS = 1000
+
+class PerformancePanel:
+    # Optional pane beside the stats text listing p50/p95/max per instrumented stage. Timings
+    # are only recorded while the pane is open; they can be exported as JSON or as a Chrome trace.
+    def __init__(self, manager):
+        self.manager = manager
+        self.frame = None
+        self.refresh_job = None
+
+    def toggle(self):
+        if self.frame is None:
+            self.show()
+        else:
+            self.hide()
+
+    def show(self):
+        perf_utils.set_enabled(True)
+        self.frame = tk.Frame(self.manager.stats_frame)
+        self.frame.pack(side=tk.RIGHT, fill=tk.Y, padx=5, pady=5, before=self.manager.stats_text)
+
+        buttons = tk.Frame(self.frame)
+        buttons.pack(fill=tk.X)
+        tk.Button(buttons, text="Reset", command=self.reset).pack(side=tk.LEFT)
+        tk.Button(buttons, text="Export Trace", command=self.export_trace).pack(side=tk.RIGHT)
+        tk.Button(buttons, text="Export JSON", command=self.export_json).pack(side=tk.RIGHT)
+
+        self.text = tk.Text(self.frame, wrap=tk.NONE, width=66, font='TkFixedFont', state=tk.DISABLED)
+        self.text.pack(fill=tk.BOTH, expand=True)
+        self.refresh()
+
+    def hide(self):
+        perf_utils.set_enabled(False)
+        if self.refresh_job is not None:
+            self.manager.root.after_cancel(self.refresh_job)
+            self.refresh_job = None
+        self.frame.destroy()
+        self.frame = None
+
+    def refresh(self):
+        lines = perf_utils.format_summary(perf_utils.summary())
+        self.text.config(state=tk.NORMAL)
+        self.text.delete(1.0, tk.END)
+        self.text.insert(tk.END, '\n'.join(lines))
+        self.text.config(state=tk.DISABLED)
+        self.refresh_job = self.manager.root.after(REFRESH_MS, self.refresh)
+
+    def reset(self):
+        perf_utils.reset()
+        if self.refresh_job is not None:
+            self.manager.root.after_cancel(self.refresh_job)
+        self.refresh()
+
+    def export_json(self):
+        path = filedialog.asksaveasfilename(title="Export Timings", defaultextension='.json', filetypes=[("JSON", "*.json")])
+        if path:
+            self.manager.scheduler.submit(lambda task: perf_utils.export_json(path), on_error=self.manager.show_error)
+
+    def export_trace(self):
+        path = filedialog.asksaveasfilename(title="Export Chrome Trace", defaultextension='.json', filetypes=[("Chrome trace", "*.json")])
+        if path:
+            self.manager.scheduler.submit(lambda task: perf_utils.export_chrome_trace(path), on_error=self.manager.show_error)
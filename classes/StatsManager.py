@@ -1,45 +1,139 @@
 import numpy as np
 import tkinter as tk
 from utils.file_utils import truncate_name
+from utils.stats_utils import summarize_stats, split_aggregates, split_class_counts, store_split_aggregates
+from utils.split_utils import split_of, split_indices
+from utils.perf_utils import timed
 
 class StatsManager:
+    # Stats are kept as running aggregates per split: per-class counters plus the sum and sum of
+    # squares of boxes per image. The combined stats are their sums. update_stats recomputes them
+    # from the annotation store; image_changed applies the delta of a single image. Only lines
+    # whose text changed are redrawn.
     def __init__(self, manager):
         self.manager = manager
+        self.split_names = ['']
+        self.split_positions = {'': 0}
+        self.reset_aggregates()
+        self.lines = []
 
+    def reset_aggregates(self):
+        self.split_names = list(self.manager.splits) or ['']
+        self.split_positions = {split: i for i, split in enumerate(self.split_names)}
+        num_splits = len(self.split_names)
+        self.class_counts = np.zeros((num_splits, len(self.manager.classes)), dtype=np.int64)
+        self.total_images = np.zeros(num_splits, dtype=np.int64)
+        self.total_bboxes = np.zeros(num_splits, dtype=np.int64)
+        self.bbox_sq_sum = np.zeros(num_splits, dtype=np.int64)
+        self.empty_images = np.zeros(num_splits, dtype=np.int64)
+
+    def split_index(self, image_name):
+        return self.split_positions.get(split_of(image_name), 0)
+
+    @timed('stats.update')
     def update_stats(self):
-        total_images = len(self.manager.images)
-        total_bboxes = sum(len(labels) for labels in self.manager.image_labels.values())
-        counts_per_class = {cls: 0 for cls in self.manager.classes}
-        
-        bboxes_per_image = [len(labels) for labels in self.manager.image_labels.values()]
-        average_bboxes_per_image = np.mean(bboxes_per_image)
-        std_bboxes_per_image = np.std(bboxes_per_image)
-        no_bboxes_images = sum(1 for count in bboxes_per_image if count == 0)
-        percentage_no_bboxes_images = (no_bboxes_images / total_images) * 100 if total_images > 0 else 0
-
-        for labels in self.manager.image_labels.values():
-            for label in labels:
-                class_id = int(label.split()[0])
-                counts_per_class[self.manager.classes[class_id]] += 1
-
-        sorted_counts = sorted(counts_per_class.items(), key=lambda x: x[1], reverse=True)
-
-        # Clear the text widget
-        self.manager.stats_text.delete(1.0, tk.END)
-
-        # Add the header
-        self.manager.stats_text.insert(tk.END, f"Total Images: {total_images}\n")
-        self.manager.stats_text.insert(tk.END, f"Total BBoxes: {total_bboxes}\n")
-        self.manager.stats_text.insert(tk.END, f"Average BBoxes per Image: {average_bboxes_per_image:.2f}\n")
-        self.manager.stats_text.insert(tk.END, f"Std Dev of BBoxes per Image: {std_bboxes_per_image:.2f}\n")
-        self.manager.stats_text.insert(tk.END, f"Percentage of Images with No BBoxes: {percentage_no_bboxes_images:.2f}%\n")
-        self.manager.stats_text.insert(tk.END, f"Number of Classes: {len(self.manager.classes)}\n\n")
-
-        self.manager.stats_text.insert(tk.END, "\nBBoxes per Class:\n\n")
-        for cls, count in sorted_counts:
+        self.reset_aggregates()
+        store = self.manager.annotations
+        image_splits = np.maximum(split_indices(store.names, self.split_names), 0)
+        aggregates, self.class_counts = store_split_aggregates(store, image_splits, len(self.split_names), len(self.manager.classes))
+        self.total_images, self.total_bboxes, self.bbox_sq_sum, self.empty_images = aggregates
+        self.refresh_display()
+
+    def reset(self):
+        self.reset_aggregates()
+        self.refresh_display()
+
+    def add_batch(self, bboxes_per_image, class_ids, image_splits):
+        # Accumulates a batch of newly loaded images while the dataset is still streaming in
+        num_splits = len(self.split_names)
+        aggregates = split_aggregates(bboxes_per_image, image_splits, num_splits)
+        for total, delta in zip((self.total_images, self.total_bboxes, self.bbox_sq_sum, self.empty_images), aggregates):
+            total += delta
+        row_splits = np.repeat(image_splits, bboxes_per_image)
+        self.class_counts += split_class_counts(row_splits, class_ids, num_splits, self.class_counts.shape[1])
+        self.refresh_display()
+
+    def image_changed(self, old_class_ids, new_class_ids, was_present=True, is_present=True, split=0):
+        # Delta update for one image; pass was_present=False for added and is_present=False for removed images
+        if was_present:
+            self.add_image_contribution(old_class_ids, -1, split)
+        if is_present:
+            self.add_image_contribution(new_class_ids, 1, split)
+        self.refresh_display()
+
+    def add_image_contribution(self, class_ids, sign, split=0):
+        class_ids = np.asarray(class_ids, dtype=np.int64)
+        count = len(class_ids)
+        self.total_images[split] += sign
+        self.total_bboxes[split] += sign * count
+        self.bbox_sq_sum[split] += sign * count * count
+        self.empty_images[split] += sign * (count == 0)
+        valid = class_ids[(class_ids >= 0) & (class_ids < self.class_counts.shape[1])]
+        np.add.at(self.class_counts[split], valid, sign)
+
+    def combined_class_counts(self):
+        return self.class_counts.sum(axis=0)
+
+    def format_lines(self):
+        stats = summarize_stats(int(self.total_images.sum()), int(self.total_bboxes.sum()), int(self.bbox_sq_sum.sum()), int(self.empty_images.sum()))
+        total_bboxes = stats['total_bboxes']
+
+        lines = [
+            f"Total Images: {stats['total_images']}",
+            f"Total BBoxes: {total_bboxes}",
+            f"Average BBoxes per Image: {stats['average_bboxes_per_image']:.2f}",
+            f"Std Dev of BBoxes per Image: {stats['std_bboxes_per_image']:.2f}",
+            f"Percentage of Images with No BBoxes: {stats['percentage_no_bboxes_images']:.2f}%",
+            f"Number of Classes: {len(self.manager.classes)}",
+            "",
+        ]
+        named_splits = self.split_names != ['']
+        if named_splits:
+            lines.append("Images per Split:")
+            for index, split in enumerate(self.split_names):
+                lines.append(f"{split:<10} : {int(self.total_images[index]):>6} images, {int(self.total_bboxes[index]):>7} bboxes")
+        lines += [
+            "",
+            "BBoxes per Class:",
+            "",
+        ]
+
+        class_counts = self.combined_class_counts()
+        order = np.argsort(-class_counts, kind='stable')
+        for class_id in order:
+            cls = self.manager.classes[class_id]
+            count = int(class_counts[class_id])
             percentage = (count / total_bboxes) * 100 if total_bboxes > 0 else 0
             truncated_name = truncate_name(cls, 30)
-            self.manager.stats_text.insert(tk.END, f"{truncated_name:<30} : {count:>5} ({percentage:>6.2f}%)\n")
-        
-        self.manager.stats_text.config(state=tk.DISABLED)
-        self.manager.stats = counts_per_class  # Store the stats for the graph
\ No newline at end of file
+            line = f"{truncated_name:<30} : {count:>5} ({percentage:>6.2f}%)"
+            if named_splits:
+                # Share of each split's boxes, to compare class balance across splits
+                shares = [self.class_counts[index, class_id] / self.total_bboxes[index] * 100 if self.total_bboxes[index] else 0 for index in range(len(self.split_names))]
+                line += "  " + " | ".join(f"{split} {share:>6.2f}%" for split, share in zip(self.split_names, shares))
+            lines.append(line)
+        return lines
+
+    def refresh_display(self):
+        # Coalesced: a burst of updates within one frame redraws the pane once
+        self.manager.scheduler.call_soon(self.redraw, key='stats-display')
+
+    @timed('stats.redraw')
+    def redraw(self):
+        lines = self.format_lines()
+        stats_text = self.manager.stats_text
+        stats_text.config(state=tk.NORMAL)
+        if len(lines) != len(self.lines):
+            stats_text.delete(1.0, tk.END)
+            stats_text.insert(tk.END, '\n'.join(lines) + '\n')
+        else:
+            # Same layout: rewrite only the lines whose text changed
+            for number, (old_line, new_line) in enumerate(zip(self.lines, lines), start=1):
+                if old_line != new_line:
+                    stats_text.delete(f"{number}.0", f"{number}.end")
+                    stats_text.insert(f"{number}.0", new_line)
+        stats_text.config(state=tk.DISABLED)
+        self.lines = lines
+
+        # The chart is built on first use; refreshing it here would build it on every redraw
+        if 'class_chart' in self.manager.__dict__:
+            self.manager.class_chart.refresh()
@@ -0,0 +1,123 @@
+import time
+import queue
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 4
+FRAME_MS = 16  # Drain interval while callbacks are arriving, about 60 frames per second
+IDLE_MS = 50  # Drain interval when the queue has been empty
+FRAME_BUDGET = 0.008  # Seconds of callbacks run per frame; the rest waits for the next frame
+
+class Task:
+    # Handle for a submitted job. The job receives it as its first argument to post callbacks
+    # to the Tk thread and to check for cancellation.
+    def __init__(self, scheduler, key=None):
+        self.scheduler = scheduler
+        self.key = key
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def post(self, callback, *args, key=None):
+        # Runs callback(*args) on the Tk thread unless the task is cancelled first
+        self.scheduler.call_soon(callback, *args, key=key, task=self)
+
+class TaskScheduler:
+    # Runs I/O and CPU jobs on a worker pool and is the only way their results reach Tk: every
+    # callback goes through a queue that the Tk thread drains from its own root.after loop, a
+    # frame's worth at a time, so workers never call into Tk. Callbacks posted with a key are
+    # coalesced, so only the latest of a burst of redundant UI updates runs. Submitting a job
+    # with the key of a running one cancels the older job.
+    def __init__(self, root, max_workers=MAX_WORKERS, on_error=None):
+        self.root = root
+        self.on_error = on_error  # Tk-thread handler for jobs submitted without their own on_error
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='task')
+        self.callbacks = queue.Queue()
+        self.lock = threading.Lock()
+        self.latest = {}  # Coalescing key -> newest (callback, args, task)
+        self.tasks = {}  # Job key -> running Task
+        self.root.after(IDLE_MS, self.drain)
+
+    def submit(self, job, *args, key=None, on_done=None, on_error=None):
+        # Runs job(task, *args) on a worker; on_done(result) or on_error(exception) run on the Tk thread
+        task = Task(self, key)
+        if key is not None:
+            with self.lock:
+                previous = self.tasks.get(key)
+                self.tasks[key] = task
+            if previous is not None:
+                previous.cancel()
+        task.future = self.executor.submit(self.run, task, job, args, on_done, on_error)
+        return task
+
+    def run(self, task, job, args, on_done, on_error):
+        if task.cancelled:
+            return
+        try:
+            result = job(task, *args)
+        except Exception as error:
+            if on_error is None:
+                # Nothing reads the future, so the traceback is printed here
+                traceback.print_exc()
+                on_error = self.on_error
+            if on_error is not None:
+                task.post(on_error, error)
+        else:
+            if on_done is not None:
+                task.post(on_done, result)
+        finally:
+            with self.lock:
+                if self.tasks.get(task.key) is task:
+                    del self.tasks[task.key]
+
+    def cancel(self, key):
+        with self.lock:
+            task = self.tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def call_soon(self, callback, *args, key=None, task=None):
+        # Thread-safe; may be called from workers and from the Tk thread
+        if key is None:
+            self.callbacks.put((None, callback, args, task))
+        else:
+            with self.lock:
+                pending = key in self.latest
+                self.latest[key] = (callback, args, task)
+            if not pending:
+                self.callbacks.put((key, None, None, None))
+
+    def drain(self):
+        deadline = time.perf_counter() + FRAME_BUDGET
+        busy = False
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    key, callback, args, task = self.callbacks.get_nowait()
+                except queue.Empty:
+                    break
+                if key is not None:
+                    with self.lock:
+                        callback, args, task = self.latest.pop(key)
+                busy = True
+                if task is None or not task.cancelled:
+                    callback(*args)
+        finally:
+            # A failing callback is reported by Tk; the loop keeps running
+            self.root.after(FRAME_MS if busy else IDLE_MS, self.drain)
+
+    def shutdown(self):
+        with self.lock:
+            tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
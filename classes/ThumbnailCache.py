@@ -0,0 +1,175 @@
+import os
+import json
+import mmap
+import heapq
+import threading
+from utils.file_utils import write_atomic
+
+PACK_FILE = 'thumbnails.pack'
+INDEX_FILE = 'thumbnails.json'
+INDEX_VERSION = 3
+DEFAULT_MAX_ENTRIES = 500000
+GROW_SLOTS = 4096  # Slots added to the pack file each time it fills up
+EVICT_FRACTION = 0.1  # Share of entries dropped when the cache is full
+
+class ThumbnailCache:
+    # Fixed-size RGBA thumbnails stored in slots of a single memory-mapped pack file.
+    # The JSON index maps a dataset-relative path to [mtime_ns, file_size, slot, last_used, hash,
+    # width, height], where hash and the full resolution come from the same decode pass.
+    def __init__(self, cache_dir, size=(40, 40), max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.size = tuple(size)
+        self.slot_bytes = size[0] * size[1] * 4
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.free_slots = []
+        self.clock = 0
+        self.capacity = 0
+        self.dirty = False
+        self.file = None
+        self.map = None
+        self.closed = False
+        self.open()
+
+    def open(self):
+        pack_path = os.path.join(self.cache_dir, PACK_FILE)
+        index_path = os.path.join(self.cache_dir, INDEX_FILE)
+        try:
+            with open(index_path, 'r') as file:
+                index = json.load(file)
+            if index.get('version') != INDEX_VERSION or tuple(index.get('size', ())) != self.size:
+                raise ValueError("Thumbnail cache format changed")
+            self.entries = index['entries']
+            self.clock = index.get('clock', 0)
+        except (OSError, ValueError, KeyError):
+            self.entries = {}
+            self.clock = 0
+
+        self.file = open(pack_path, 'a+b')
+        self.file.seek(0, os.SEEK_END)
+        self.capacity = self.file.tell() // self.slot_bytes
+        # Drop entries whose slot lies beyond a truncated pack file
+        self.entries = {key: entry for key, entry in self.entries.items() if entry[2] < self.capacity}
+        used = {entry[2] for entry in self.entries.values()}
+        self.free_slots = [slot for slot in range(self.capacity - 1, -1, -1) if slot not in used]
+        self.remap()
+
+    def remap(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        if self.capacity:
+            self.map = mmap.mmap(self.file.fileno(), self.capacity * self.slot_bytes)
+
+    def grow(self):
+        new_capacity = self.capacity + GROW_SLOTS
+        self.file.truncate(new_capacity * self.slot_bytes)
+        self.free_slots.extend(range(new_capacity - 1, self.capacity - 1, -1))
+        self.capacity = new_capacity
+        self.remap()
+
+    def lookup(self, key, mtime_ns, file_size):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != mtime_ns or entry[1] != file_size:
+                return None
+            self.clock += 1
+            entry[3] = self.clock
+            self.dirty = True
+            offset = entry[2] * self.slot_bytes
+            return self.map[offset:offset + self.slot_bytes]
+
+    def get(self, key):
+        # Unvalidated read for keys the loader has already checked this session
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            offset = entry[2] * self.slot_bytes
+            return self.map[offset:offset + self.slot_bytes]
+
+    def get_hash(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            return None if entry is None else entry[4]
+
+    def get_info(self, key):
+        # (file size, width, height) of the image, or None; width and height are None if unknown
+        with self.lock:
+            entry = self.entries.get(key)
+            return None if entry is None else (entry[1], entry[5], entry[6])
+
+    def put(self, key, mtime_ns, file_size, data, image_hash=None, image_size=None):
+        if data is None or len(data) != self.slot_bytes:
+            return
+        with self.lock:
+            if self.closed:
+                return  # A background writer finishing after a new load replaced this cache
+            entry = self.entries.get(key)
+            if entry is None:
+                if len(self.entries) >= self.max_entries:
+                    self.evict()
+                if not self.free_slots:
+                    self.grow()
+                entry = [0, 0, self.free_slots.pop(), 0, None, None, None]
+                self.entries[key] = entry
+            self.clock += 1
+            entry[0], entry[1], entry[3], entry[4] = mtime_ns, file_size, self.clock, image_hash
+            entry[5], entry[6] = image_size if image_size is not None else (None, None)
+            offset = entry[2] * self.slot_bytes
+            self.map[offset:offset + self.slot_bytes] = data
+            self.dirty = True
+
+    def evict(self):
+        count = max(1, int(self.max_entries * EVICT_FRACTION))
+        for key in heapq.nsmallest(count, self.entries, key=lambda k: self.entries[k][3]):
+            self.free_slots.append(self.entries.pop(key)[2])
+
+    def remove(self, key):
+        with self.lock:
+            if self.closed:
+                return
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                self.free_slots.append(entry[2])
+                self.dirty = True
+
+    def rename(self, old_key, new_key):
+        with self.lock:
+            entry = self.entries.pop(old_key, None)
+            if entry is None:
+                return
+            stale = self.entries.pop(new_key, None)
+            if stale is not None:
+                self.free_slots.append(stale[2])
+            self.entries[new_key] = entry
+            self.dirty = True
+
+    def prune(self, live_keys):
+        # Forget thumbnails of files that no longer exist in the dataset
+        with self.lock:
+            for key in [key for key in self.entries if key not in live_keys]:
+                self.free_slots.append(self.entries.pop(key)[2])
+                self.dirty = True
+
+    def save(self):
+        with self.lock:
+            if not self.dirty or self.closed:
+                return
+            if self.map is not None:
+                self.map.flush()
+            index = {'version': INDEX_VERSION, 'size': list(self.size), 'clock': self.clock, 'entries': self.entries}
+            write_atomic(os.path.join(self.cache_dir, INDEX_FILE), json.dumps(index))
+            self.dirty = False
+
+    def close(self):
+        self.save()
+        with self.lock:
+            self.closed = True
+            if self.map is not None:
+                self.map.close()
+                self.map = None
+            if self.file is not None:
+                self.file.close()
+                self.file = None
@@ -0,0 +1,116 @@
+import tkinter as tk
+from tkinter import ttk
+from utils.split_utils import stat_splits
+from utils.validation_utils import validate_store, find_unpaired_files, issue_counts, ISSUE_TYPES
+
+MAX_ROWS = 5000  # Issues listed at once; narrow the filter to see the rest
+ALL_ISSUES = "All issues"
+
+class ValidationReport:
+    # Window listing the issues found by the last validation run, filterable by issue type and
+    # image name. Double-clicking an issue shows its image in the preview pane.
+    def __init__(self, manager):
+        self.manager = manager
+        self.window = None
+
+    def run(self):
+        # Re-validates a copy of the loaded dataset on a worker; a newer rescan cancels an older one
+        self.manager.status_label.config(text="Validation: scanning...")
+        self.manager.scheduler.submit(self.validate_job, self.manager.annotations.copy(), len(self.manager.classes), dict(self.manager.splits), key='validate', on_done=self.set_report, on_error=self.manager.show_error)
+
+    def validate_job(self, task, store, num_classes, splits):
+        report = validate_store(store, num_classes)
+        if splits and not task.cancelled:
+            image_stats, _, label_files = stat_splits(splits)
+            report['missing_labels'], report['orphan_labels'] = find_unpaired_files(list(image_stats), label_files)
+        return report
+
+    def set_report(self, report):
+        self.manager.validation_report = report
+        total = sum(issue_counts(report).values())
+        self.manager.status_label.config(text=f"Validation: {total} issues found" if total else "Validation: no issues found")
+        if self.window is not None:
+            self.refresh()
+
+    def show(self):
+        if self.window is not None:
+            self.window.lift()
+            return
+        if self.manager.validation_report is None:
+            self.run()
+        self.window = tk.Toplevel(self.manager.root)
+        self.window.title("Validation Report")
+        self.window.geometry("700x500")
+        self.window.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        filter_frame = tk.Frame(self.window)
+        filter_frame.pack(fill=tk.X, padx=5, pady=5)
+        self.issue_filter = ttk.Combobox(filter_frame, state='readonly', width=30)
+        self.issue_filter.pack(side=tk.LEFT)
+        self.issue_filter.bind('<<ComboboxSelected>>', lambda event: self.refresh())
+        self.name_filter = tk.Entry(filter_frame)
+        self.name_filter.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.name_filter.bind('<KeyRelease>', lambda event: self.refresh())
+        tk.Button(filter_frame, text="Rescan", command=self.run).pack(side=tk.RIGHT)
+
+        self.tree = ttk.Treeview(self.window, columns=('issue', 'annotation'), show='tree headings')
+        self.tree.heading('#0', text='File')
+        self.tree.heading('issue', text='Issue')
+        self.tree.heading('annotation', text='Annotation')
+        self.tree.column('annotation', width=90, anchor='e')
+        scrollbar = ttk.Scrollbar(self.window, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=5)
+        self.tree.bind('<Double-Button-1>', self.on_double_click)
+
+        self.summary_label = tk.Label(self.window, anchor='w')
+        self.summary_label.pack(fill=tk.X, padx=5, pady=5)
+        self.refresh()
+
+    def refresh(self):
+        report = self.manager.validation_report
+        if report is None:
+            self.summary_label.config(text="Scanning...")
+            return  # set_report refreshes the window when the scan is done
+        counts = issue_counts(report)
+        choices = [f"{ALL_ISSUES} ({sum(counts.values())})"] + [f"{name} ({count})" for name, count in counts.items() if count]
+        selected = self.issue_filter.get().rsplit(' (', 1)[0]
+        self.issue_filter['values'] = choices
+        self.issue_filter.set(next((choice for choice in choices if choice.rsplit(' (', 1)[0] == selected), choices[0]))
+        selected = self.issue_filter.get().rsplit(' (', 1)[0]
+        name_filter = self.name_filter.get().lower()
+
+        rows = []
+        matched = 0
+        names = self.manager.annotations.names
+        for code, image_id, annotation in zip(report['issue'], report['image_id'], report['annotation']):
+            name = names[image_id] if image_id < len(names) else None
+            if name is None or (selected != ALL_ISSUES and ISSUE_TYPES[code] != selected) or name_filter not in name.lower():
+                continue  # Removed since the scan, or filtered out
+            matched += 1
+            if len(rows) < MAX_ROWS:
+                rows.append((name, ISSUE_TYPES[code], annotation + 1 if annotation >= 0 else ''))
+        for issue, key in (('missing_label', 'missing_labels'), ('orphan_label', 'orphan_labels')):
+            if selected in (ALL_ISSUES, issue):
+                files = [name for name in report.get(key, ()) if name_filter in name.lower()]
+                matched += len(files)
+                rows.extend((name, issue, '') for name in files[:MAX_ROWS - len(rows)])
+
+        self.tree.delete(*self.tree.get_children())
+        for name, issue, annotation in rows:
+            self.tree.insert('', 'end', text=name, values=(issue, annotation))
+        suffix = f" (showing the first {MAX_ROWS})" if matched > MAX_ROWS else ""
+        self.summary_label.config(text=f"{matched} issues{suffix}")
+
+    def on_double_click(self, event):
+        item = self.tree.focus()
+        if not item:
+            return
+        name = self.tree.item(item, 'text')
+        if self.tree.set(item, 'issue') != 'orphan_label' and name in self.manager.annotations.ids:
+            self.manager.image_display_manager.show_preview(name)
+
+    def on_close(self):
+        self.window.destroy()
+        self.window = None
@@ -0,0 +1,144 @@
+import math
+from classes.IconCache import IconCache
+from utils.perf_utils import timed
+
+PAGE_SIZE = 200  # Rows inserted into the Treeview at a time
+PREFETCH_ROWS = 20  # Rows above and below the viewport that also get icons
+LOAD_MORE_THRESHOLD = 0.9  # Scroll fraction that triggers inserting the next page
+
+class VirtualImageList:
+    # Feeds a ttk.Treeview page by page and only keeps icons for rows near the viewport
+    def __init__(self, manager):
+        self.manager = manager
+        self.tree = manager.image_listbox
+        self.rows = []
+        self.positions = None  # Image -> index in rows, built on demand and dropped when rows change
+        self.inserted = 0
+        self.with_icon = set()
+        self.icons = IconCache(manager, on_evict=self.on_icon_evicted)
+        self.refresh_pending = False
+        self.tree.configure(yscrollcommand=self.on_scroll)
+
+    def set_rows(self, rows):
+        self.tree.delete(*self.tree.get_children())
+        self.rows = list(rows)
+        self.positions = None
+        self.inserted = 0
+        self.with_icon.clear()
+        self.insert_page()
+        self.schedule_refresh()
+
+    @timed('list.update_rows')
+    def update_rows(self, rows):
+        # Applies only the difference to the Treeview, keeping scroll position and icons of
+        # rows that stay. Both lists must share one order, as filters of the same list do.
+        rows = list(rows)
+        count = min(len(rows), max(self.inserted, PAGE_SIZE))
+        shown = self.rows[:self.inserted]
+        target = rows[:count]
+        target_set = set(target)
+        shown_set = set(shown)
+        if [image for image in shown if image in target_set] != [image for image in target if image in shown_set]:
+            self.set_rows(rows)
+            return
+
+        gone = [image for image in shown if image not in target_set]
+        if gone:
+            self.tree.delete(*gone)
+            self.with_icon.difference_update(gone)
+        for position, image in enumerate(target):
+            if image not in shown_set:
+                self.tree.insert('', position, image, text=image)
+        self.rows = rows
+        self.positions = None
+        self.inserted = count
+        self.schedule_refresh()
+
+    @timed('list.insert_page')
+    def insert_page(self):
+        end = min(len(self.rows), self.inserted + PAGE_SIZE)
+        for image in self.rows[self.inserted:end]:
+            self.tree.insert('', 'end', image, text=image)
+        self.inserted = end
+
+    def position(self, image):
+        # Index of the image in rows, or None
+        if self.positions is None:
+            self.positions = {row: i for i, row in enumerate(self.rows)}
+        return self.positions.get(image)
+
+    def remove(self, image):
+        self.remove_rows([image])
+
+    def remove_rows(self, images):
+        # One pass over rows however many images are removed
+        removed = set(images)
+        shown = [image for image in self.rows[:self.inserted] if image in removed]
+        if shown:
+            self.tree.delete(*shown)
+        self.inserted -= len(shown)
+        self.rows = [image for image in self.rows if image not in removed]
+        self.positions = None
+        self.with_icon.difference_update(removed)
+        for image in removed:
+            self.icons.discard(image)
+        self.schedule_refresh()
+
+    def invalidate(self, image):
+        # The thumbnail changed; the icon is rebuilt the next time the row is visible
+        self.icons.discard(image)
+        if image in self.with_icon:
+            self.with_icon.discard(image)
+            self.schedule_refresh()
+
+    def rename(self, old_image, new_image):
+        # The row keeps its place; a shown row is re-inserted, since a Treeview item id can't change
+        self.icons.rename(old_image, new_image)
+        index = self.position(old_image)
+        if index is None:
+            return
+        self.rows[index] = new_image
+        self.positions = None
+        if index < self.inserted:
+            selected = old_image in self.tree.selection()
+            self.tree.delete(old_image)
+            self.tree.insert('', index, new_image, text=new_image)
+            self.with_icon.discard(old_image)
+            if selected:
+                self.tree.selection_set(new_image)
+            self.schedule_refresh()
+
+    def clear(self):
+        self.set_rows([])
+        self.icons.clear()
+
+    def on_scroll(self, first, last):
+        if float(last) >= LOAD_MORE_THRESHOLD and self.inserted < len(self.rows):
+            self.insert_page()
+        self.schedule_refresh()
+
+    def schedule_refresh(self):
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.tree.after_idle(self.refresh_icons)
+
+    @timed('list.refresh_icons')
+    def refresh_icons(self):
+        self.refresh_pending = False
+        if not self.inserted:
+            return
+        first, last = self.tree.yview()
+        start = max(0, int(first * self.inserted) - PREFETCH_ROWS)
+        end = min(self.inserted, math.ceil(last * self.inserted) + PREFETCH_ROWS)
+        for image in self.rows[start:end]:
+            icon = self.icons.get(image)
+            if image not in self.with_icon:
+                self.tree.item(image, image=icon)
+                self.with_icon.add(image)
+
+    def on_icon_evicted(self, image):
+        # Called while the evicted PhotoImage is still referenced, so the row can drop it first
+        if image in self.with_icon:
+            self.with_icon.discard(image)
+            if self.tree.exists(image):
+                self.tree.item(image, image='')
@@ -0,0 +1,140 @@
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from classes.AnnotationStore import AnnotationStore
+from utils.file_utils import load_yaml_data, update_yaml, LABEL_BATCH_SIZE
+from utils.label_utils import parse_label_files
+from utils.label_rewrite import merge_mapping, delete_mapping, remap_class_names, list_label_files, remap_classes_in_label_files
+from utils.stats_utils import compute_stats
+from utils.split_utils import resolve_splits, stat_splits, split_indices
+from utils.validation_utils import validate_store, find_unpaired_files, issue_counts, ISSUE_TYPES, IOU_THRESHOLD
+
+# Headless entry point for servers and CI: the same loading, stats and class maintenance as the
+# GUI, without importing Tk. Label files are read, parsed and rewritten in worker processes.
+
+def load_classes(dataset_dir):
+    # Returns (class names, splits) from data.yaml
+    yaml_path = os.path.join(dataset_dir, 'data.yaml')
+    if not os.path.exists(yaml_path):
+        raise FileNotFoundError("data.yaml file not found in the selected directory.")
+    data = load_yaml_data(yaml_path)
+    return data['names'], resolve_splits(dataset_dir, data)
+
+def load_store(splits, workers=None):
+    # Returns (store, label_files); label_files maps image names without extension to label paths
+    if '' in splits and not all(os.path.exists(directory) for directory in splits['']):
+        raise FileNotFoundError("Images or Labels directory not found.")
+
+    image_stats, _, label_files = stat_splits(splits)
+    images = list(image_stats)
+    paths = [label_files.get(os.path.splitext(image)[0]) for image in images]
+    chunks = [paths[start:start + LABEL_BATCH_SIZE] for start in range(0, len(paths), LABEL_BATCH_SIZE)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        batches = list(executor.map(parse_label_files, chunks))
+    return AnnotationStore().build_from_batches(images, batches), label_files
+
+def class_id(classes, name):
+    if name not in classes:
+        raise ValueError(f"Unknown class '{name}'.")
+    return classes.index(name)
+
+def remap_dataset(dataset_dir, splits, classes, mapping, workers=None, preferred_ids=()):
+    result = remap_classes_in_label_files(list_label_files(splits), mapping, max_workers=workers, use_processes=True)
+    new_classes = remap_class_names(classes, mapping, preferred_ids)
+    update_yaml(os.path.join(dataset_dir, 'data.yaml'), new_classes)
+    result['classes'] = new_classes
+    return result
+
+def run_stats(args):
+    classes, splits = load_classes(args.dataset)
+    store, _ = load_store(splits, args.workers)
+    return compute_stats(store, classes, list(splits), split_indices(store.names, list(splits)))
+
+def run_validate(args):
+    classes, splits = load_classes(args.dataset)
+    store, label_files = load_store(splits, args.workers)
+    report = validate_store(store, len(classes), args.iou_threshold)
+    missing, orphans = find_unpaired_files(store.names, label_files)
+    report['missing_labels'], report['orphan_labels'] = missing, orphans
+    issues = [
+        {'file': store.names[image_id], 'issue': ISSUE_TYPES[code], 'annotation': int(annotation)}
+        for code, image_id, annotation in zip(report['issue'], report['image_id'], report['annotation'])
+    ]
+    issues += [{'file': image, 'issue': 'missing_label', 'annotation': -1} for image in missing]
+    issues += [{'file': stem + '.txt', 'issue': 'orphan_label', 'annotation': -1} for stem in orphans]
+    return {'counts': issue_counts(report), 'issues': issues}
+
+def run_rename_class(args):
+    classes, splits = load_classes(args.dataset)
+    old_id = class_id(classes, args.old_name)
+    if args.new_name in classes:
+        # Renaming onto an existing class merges the two, like in the GUI
+        target_id = classes.index(args.new_name)
+        return remap_dataset(args.dataset, splits, classes, merge_mapping(len(classes), [old_id], target_id), args.workers, [target_id])
+    classes[old_id] = args.new_name
+    update_yaml(os.path.join(args.dataset, 'data.yaml'), classes)
+    return {'files': 0, 'changed_files': 0, 'changed_lines': 0, 'classes': classes}
+
+def run_merge_classes(args):
+    classes, splits = load_classes(args.dataset)
+    merged_ids = [class_id(classes, name) for name in args.classes]
+    target_id = class_id(classes, args.into)
+    return remap_dataset(args.dataset, splits, classes, merge_mapping(len(classes), merged_ids, target_id), args.workers, [target_id])
+
+def run_delete_class(args):
+    classes, splits = load_classes(args.dataset)
+    return remap_dataset(args.dataset, splits, classes, delete_mapping(len(classes), class_id(classes, args.name)), args.workers)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Headless YOLO dataset statistics and maintenance.")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--output', help="Write the JSON result to this file instead of stdout")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    stats = subparsers.add_parser('stats', help="Print dataset statistics as JSON")
+    stats.add_argument('dataset')
+    stats.set_defaults(run=run_stats)
+
+    validate = subparsers.add_parser('validate', help="Report malformed, duplicate and unpaired annotations as JSON")
+    validate.add_argument('dataset')
+    validate.add_argument('--iou-threshold', type=float, default=IOU_THRESHOLD)
+    validate.set_defaults(run=run_validate)
+
+    rename = subparsers.add_parser('rename-class', help="Rename a class; merges into NEW_NAME if it already exists")
+    rename.add_argument('dataset')
+    rename.add_argument('old_name')
+    rename.add_argument('new_name')
+    rename.set_defaults(run=run_rename_class)
+
+    merge = subparsers.add_parser('merge-classes', help="Merge classes into another class")
+    merge.add_argument('dataset')
+    merge.add_argument('classes', nargs='+')
+    merge.add_argument('--into', required=True)
+    merge.set_defaults(run=run_merge_classes)
+
+    delete = subparsers.add_parser('delete-class', help="Delete a class and its annotations")
+    delete.add_argument('dataset')
+    delete.add_argument('name')
+    delete.set_defaults(run=run_delete_class)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        result = args.run(args)
+    except (OSError, ValueError) as error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
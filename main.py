@@ -1,12 +1,34 @@
 import os
 import tkinter as tk
-from tkinter import ttk, simpledialog
+from tkinter import ttk, simpledialog, messagebox
 from tkinter import HORIZONTAL, VERTICAL, PanedWindow
-from classes.DatasetLoader import DatasetLoader
-from classes.ImageDisplayManager import ImageDisplayManager
-from classes.StatsManager import StatsManager
-from utils.show_graph import show_class_annotations_graph
-from utils.file_utils import delete_files, rename_file, rename_class_in_labels, update_yaml, merge_classes_in_labels
+import importlib
+from classes.TaskScheduler import TaskScheduler
+from utils.file_utils import delete_files, rename_file, update_yaml
+from utils.split_utils import get_image_path, get_label_path, split_of, file_name_of, image_key
+from utils.label_rewrite import merge_mapping, changed_class_ids, remap_class_names, remap_classes_in_label_files
+from utils.cache_utils import thumbnail_key
+
+# Collaborators that pull in NumPy or PIL are imported and built on first access
+# (see __getattr__), so the window opens before they load: attribute -> (module, class, built
+# with the manager)
+LAZY_COMPONENTS = {
+    'annotations': ('classes.AnnotationStore', 'AnnotationStore', False),
+    'image_cache': ('classes.ImageCache', 'ImageCache', False),
+    'dataset_loader': ('classes.DatasetLoader', 'DatasetLoader', True),
+    'image_display_manager': ('classes.ImageDisplayManager', 'ImageDisplayManager', True),
+    'stats_manager': ('classes.StatsManager', 'StatsManager', True),
+    'validation': ('classes.ValidationReport', 'ValidationReport', True),
+    'duplicate_finder': ('classes.DuplicateFinder', 'DuplicateFinder', True),
+    'watcher': ('classes.DatasetWatcher', 'DatasetWatcher', True),
+    'image_filter': ('classes.ImageFilter', 'ImageFilter', True),
+    'image_metrics': ('classes.ImageMetrics', 'ImageMetrics', True),
+    'performance_panel': ('classes.PerformancePanel', 'PerformancePanel', True),
+    'class_chart': ('classes.ClassChart', 'ClassChart', True),
+    'image_list': ('classes.VirtualImageList', 'VirtualImageList', True),
+}
+# Imported on a worker once the window is up, so the first click does not wait for them
+PRELOAD_MODULES = sorted({module for module, _, _ in LAZY_COMPONENTS.values()} | {'utils.metrics_utils'})
 
 class YOLODatasetManager:
     def __init__(self, root):
@@ -15,14 +37,17 @@ class YOLODatasetManager:
         self.dataset_dir = ""
         self.classes = []
         self.images = []
-        self.image_labels = {}
-        self.stats = {}
-        self.image_icons = {}
+        self.filtered_images = []
+        self.thumbnail_cache = None
+        self.splits = {}  # Split name -> (images dir, labels dir), from data.yaml
+        self.validation_report = None
         self.sort_ascending = True
 
-        self.dataset_loader = DatasetLoader(self)
-        self.image_display_manager = ImageDisplayManager(self)
-        self.stats_manager = StatsManager(self)
+        # File I/O and heavy work run on the scheduler's workers; Tk is only touched from this thread
+        self.scheduler = TaskScheduler(self.root, on_error=self.show_error)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        self.metric_keys = {}  # Sort combobox label -> metric key, filled when it is first opened
 
         # Create main paned window
         self.main_paned = PanedWindow(self.root, orient=HORIZONTAL, sashrelief=tk.RAISED)
@@ -36,15 +61,30 @@ class YOLODatasetManager:
         self.main_paned.add(self.right_frame, minsize=600)
 
         # Left frame components
-        self.load_dataset_btn = tk.Button(self.left_frame, text="Load Dataset", command=self.dataset_loader.load_dataset)
+        self.load_dataset_btn = tk.Button(self.left_frame, text="Load Dataset", command=lambda: self.dataset_loader.load_dataset())
         self.load_dataset_btn.pack(fill=tk.X, padx=5, pady=5)
 
         self.progress = ttk.Progressbar(self.left_frame, orient=HORIZONTAL, mode='determinate')
         self.progress.pack(fill=tk.X, padx=5, pady=5)
 
+        self.status_label = tk.Label(self.left_frame, anchor='w')
+        self.status_label.pack(fill=tk.X, padx=5)
+
+        self.watch_var = tk.BooleanVar(value=True)
+        self.watch_check = tk.Checkbutton(self.left_frame, text="Sync External Changes", variable=self.watch_var, command=self.toggle_watcher)
+        self.watch_check.pack(anchor='w', padx=5)
+
+        self.perf_check = tk.Checkbutton(self.left_frame, text="Performance Panel", command=lambda: self.performance_panel.toggle())
+        self.perf_check.pack(anchor='w', padx=5)
+
+        # Filled polygon masks in the preview; the image viewer has its own toggle
+        self.masks_var = tk.BooleanVar(value=False)
+        self.masks_check = tk.Checkbutton(self.left_frame, text="Show Masks", variable=self.masks_var, command=self.toggle_masks)
+        self.masks_check.pack(anchor='w', padx=5)
+
         self.class_listbox = tk.Listbox(self.left_frame, selectmode=tk.SINGLE, height=10)
         self.class_listbox.pack(fill=tk.BOTH, expand=False, padx=5, pady=5)
-        self.class_listbox.bind('<<ListboxSelect>>', self.image_display_manager.display_class_images)
+        self.class_listbox.bind('<<ListboxSelect>>', lambda event: self.image_display_manager.display_class_images(event))
 
         self.filter_frame = tk.Frame(self.left_frame)
         self.filter_frame.pack(fill=tk.X, padx=5, pady=5)
@@ -52,10 +92,26 @@ class YOLODatasetManager:
         self.filter_entry = tk.Entry(self.filter_frame)
         self.filter_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
         self.filter_entry.bind('<KeyRelease>', self.filter_images)
+        self.filter_entry.bind('<Return>', lambda event: self.image_filter.apply())
 
         self.sort_btn = tk.Button(self.filter_frame, text="⇵", command=self.sort_images)
         self.sort_btn.pack(side=tk.RIGHT)
 
+        # Sort key, and a min/max range on it
+        self.metric_frame = tk.Frame(self.left_frame)
+        self.metric_frame.pack(fill=tk.X, padx=5)
+        self.sort_metric_box = ttk.Combobox(self.metric_frame, state='readonly', width=16, values=["Name"], postcommand=self.fill_sort_metrics)
+        self.sort_metric_box.set("Name")
+        self.sort_metric_box.pack(side=tk.LEFT)
+        self.sort_metric_box.bind('<<ComboboxSelected>>', self.change_sort_metric)
+        self.range_max_entry = tk.Entry(self.metric_frame, width=7, state=tk.DISABLED)
+        self.range_max_entry.pack(side=tk.RIGHT)
+        tk.Label(self.metric_frame, text="to").pack(side=tk.RIGHT)
+        self.range_min_entry = tk.Entry(self.metric_frame, width=7, state=tk.DISABLED)
+        self.range_min_entry.pack(side=tk.RIGHT)
+        for entry in (self.range_min_entry, self.range_max_entry):
+            entry.bind('<KeyRelease>', self.filter_images)
+
         self.image_list_frame = tk.Frame(self.left_frame)
         self.image_list_frame.pack(fill=tk.BOTH, expand=True)
 
@@ -66,7 +122,7 @@ class YOLODatasetManager:
         self.image_listbox = ttk.Treeview(self.image_list_frame, columns=('Image', 'Checkbox'), show='tree', height=1)
         self.image_listbox.heading('#0', text='Image')
         self.image_listbox.pack(fill=tk.BOTH, expand=True)
-        self.image_listbox.bind('<Double-Button-1>', self.image_display_manager.display_image_with_bboxes)
+        self.image_listbox.bind('<Double-Button-1>', lambda event: self.image_display_manager.display_image_with_bboxes(event))
 
         self.delete_btn = tk.Button(self.left_frame, text="Delete Selected Images", command=self.delete_selected_images)
         self.delete_btn.pack(fill=tk.X, padx=5, pady=5)
@@ -77,11 +133,17 @@ class YOLODatasetManager:
         self.rename_class_btn = tk.Button(self.left_frame, text="Rename Selected Class", command=self.rename_class)
         self.rename_class_btn.pack(fill=tk.X, padx=5, pady=5)
 
+        self.validation_btn = tk.Button(self.left_frame, text="Validation Report", command=lambda: self.validation.show())
+        self.validation_btn.pack(fill=tk.X, padx=5, pady=5)
+
+        self.duplicates_btn = tk.Button(self.left_frame, text="Find Duplicate Images", command=lambda: self.duplicate_finder.show())
+        self.duplicates_btn.pack(fill=tk.X, padx=5, pady=5)
+
         # Right frame components
         self.img_label = tk.Label(self.right_frame)
         self.right_frame.add(self.img_label, height=600)
 
-        self.view_image_btn = tk.Button(self.img_label, text="Image Viewer", command=self.image_display_manager.open_image_viewer)
+        self.view_image_btn = tk.Button(self.img_label, text="Image Viewer", command=lambda: self.image_display_manager.open_image_viewer())
         self.view_image_btn.place(relx=1.0, rely=1.0, anchor='se', x=-10, y=-10)
 
         self.stats_frame = tk.Frame(self.right_frame)
@@ -90,9 +152,24 @@ class YOLODatasetManager:
         self.stats_text = tk.Text(self.stats_frame, wrap=tk.WORD)
         self.stats_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
-        self.show_graph_btn = tk.Button(self.right_frame, text="Show Class Annotations Graph", command=self.show_graph)
+        self.show_graph_btn = tk.Button(self.right_frame, text="Show Class Annotations Graph", command=lambda: self.class_chart.show())
         self.show_graph_btn.place(relx=1.0, rely=1.0, anchor='se', x=-10, y=-10)
 
+        self.root.after_idle(self.preload_modules)
+
+    def __getattr__(self, name):
+        # Only called for attributes not set yet; builds a lazy component and keeps it
+        if name not in LAZY_COMPONENTS:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        module, class_name, with_manager = LAZY_COMPONENTS[name]
+        component_class = getattr(importlib.import_module(module), class_name)
+        component = component_class(self) if with_manager else component_class()
+        setattr(self, name, component)
+        return component
+
+    def preload_modules(self):
+        self.scheduler.submit(lambda task: [importlib.import_module(module) for module in PRELOAD_MODULES])
+
     def load_classes(self):
         self.update_class_listbox()
 
@@ -101,34 +178,80 @@ class YOLODatasetManager:
         for cls in self.classes:
             self.class_listbox.insert(tk.END, cls)
 
+    def toggle_watcher(self):
+        self.watcher.set_enabled(self.watch_var.get())
+        if self.watch_var.get() and self.annotations.names:
+            # Rescans from the load-time baseline, so edits made while paused are picked up
+            self.watcher.start(self.dataset_loader.image_stats, self.dataset_loader.label_stats, self.thumbnail_cache)
+
+    def toggle_masks(self):
+        if self.image_listbox.selection():
+            self.image_display_manager.display_image_with_bboxes(None)
+
     def filter_images(self, event=None):
-        self.image_display_manager.display_filtered_images()
+        # Plain text matches anywhere in the name, *?[ make it a glob, 're:' a regular expression
+        self.image_filter.schedule()
 
     def sort_images(self):
         self.sort_ascending = not self.sort_ascending
-        self.image_display_manager.update_image_listbox(self.class_listbox.curselection()[0])
+        if self.class_listbox.curselection():
+            self.image_display_manager.update_image_listbox(self.class_listbox.curselection()[0])
+
+    def fill_sort_metrics(self):
+        if not self.metric_keys:
+            from utils.metrics_utils import METRICS
+            self.metric_keys = {text: key for key, text in METRICS.items()}
+            self.sort_metric_box.config(values=["Name"] + list(self.metric_keys))
+
+    def sort_metric(self):
+        # Key into METRICS, or None to sort by name
+        return self.metric_keys.get(self.sort_metric_box.get())
+
+    def metric_range(self):
+        # (low, high) of the range filter; None where the field is empty. Raises ValueError.
+        if self.sort_metric() is None:
+            return None, None
+        low, high = self.range_min_entry.get().strip(), self.range_max_entry.get().strip()
+        return (float(low) if low else None), (float(high) if high else None)
+
+    def change_sort_metric(self, event=None):
+        state = tk.DISABLED if self.sort_metric() is None else tk.NORMAL
+        for entry in (self.range_min_entry, self.range_max_entry):
+            entry.config(state=tk.NORMAL)
+            entry.delete(0, tk.END)
+            entry.config(state=state)
+        if self.class_listbox.curselection():
+            self.image_display_manager.update_image_listbox(self.class_listbox.curselection()[0])
 
     def delete_selected_images(self):
         selected_items = self.image_listbox.selection()
+        self.delete_images([self.image_listbox.item(item, 'text') for item in selected_items])
+
+    def delete_images(self, image_names):
         image_paths = []
         label_paths = []
-        for item in selected_items:
-            image_name = self.image_listbox.item(item, 'text')
-            img_path = os.path.join(self.dataset_dir, 'images', image_name)
-            label_path = os.path.join(self.dataset_dir, 'labels', os.path.splitext(image_name)[0] + '.txt')
+        for image_name in image_names:
+            img_path = get_image_path(self.splits, image_name)
+            label_path = get_label_path(self.splits, image_name)
 
             image_paths.append(img_path)
             label_paths.append(label_path)
-
-            # Remove from the list and internal data structures
-            self.images.remove(image_name)
-            del self.image_labels[image_name]
-            del self.image_icons[image_name]
-            self.image_listbox.delete(item)
-
-        delete_files(image_paths, label_paths)
-        
-        self.stats_manager.update_stats()
+            self.image_cache.discard(img_path)
+
+            old_class_ids = self.annotations.class_ids[self.annotations.rows(self.annotations.image_id(image_name))].copy()
+            self.stats_manager.image_changed(old_class_ids, [], is_present=False, split=self.stats_manager.split_index(image_name))
+            if self.thumbnail_cache is not None:
+                self.thumbnail_cache.remove(thumbnail_key(image_name))
+
+        # Remove from the list and internal data structures, once for the whole selection
+        self.annotations.remove_images(image_names)
+        self.image_list.remove_rows(image_names)
+        removed = set(image_names)
+        self.images = [image for image in self.images if image not in removed]
+        self.image_filter.discard(removed)
+        self.filtered_images = self.image_filter.images
+        self.scheduler.submit(lambda task: delete_files(image_paths, label_paths), on_error=self.show_error)
+        self.save_thumbnail_cache()
 
     def rename_class(self):
         selected_class_index = self.class_listbox.curselection()
@@ -139,25 +262,54 @@ class YOLODatasetManager:
         if new_class_name:
             if new_class_name in self.classes:
                 merge_class_index = self.classes.index(new_class_name)
-                # Merge and remap images to the existing class
-                for image, labels in self.image_labels.items():
-                    updated_labels = []
-                    for label in labels:
-                        parts = label.split()
-                        if int(parts[0]) == selected_class_index[0]:
-                            parts[0] = str(merge_class_index)
-                        updated_labels.append(' '.join(parts))
-                    self.image_labels[image] = updated_labels
-                merge_classes_in_labels(self.dataset_dir, selected_class_index[0], merge_class_index)
-                self.classes.pop(selected_class_index[0])
+                # Merge into the existing class; ids above the merged class shift down by one
+                self.remap_classes(merge_mapping(len(self.classes), [selected_class_index[0]], merge_class_index), [merge_class_index])
             else:
-                # Rename the class
+                # Rename the class; ids are unchanged so no label file needs rewriting
                 self.classes[selected_class_index[0]] = new_class_name
-                rename_class_in_labels(self.dataset_dir, selected_class_index[0], new_class_name, self.classes)
-            
-            update_yaml(os.path.join(self.dataset_dir, 'data.yaml'), self.classes)
-            self.update_class_listbox()
-            self.stats_manager.update_stats()
+                self.save_classes()
+
+    def save_classes(self):
+        classes = list(self.classes)
+        yaml_path = os.path.join(self.dataset_dir, 'data.yaml')
+        self.scheduler.submit(lambda task: update_yaml(yaml_path, classes), key='save-yaml', on_error=self.show_error)
+        self.update_class_listbox()
+        self.stats_manager.update_stats()
+
+    def remap_classes(self, mapping, preferred_ids=()):
+        # Only label files of images containing a class whose id changes are rewritten. The
+        # rewrite runs on a worker; the store and class list change once it has finished.
+        affected_images = self.annotations.images_with_classes(changed_class_ids(mapping))
+        label_paths = [get_label_path(self.splits, image) for image in affected_images]
+        self.rename_class_btn.config(state=tk.DISABLED)
+        self.watcher.stop()  # Its reparse of the rewritten files would apply the mapping twice
+        self.scheduler.submit(self.remap_job, label_paths, mapping, key='remap', on_done=lambda result: self.finish_remap(mapping, preferred_ids, result), on_error=self.show_error)
+
+    def remap_job(self, task, label_paths, mapping):
+        return remap_classes_in_label_files(label_paths, mapping, progress=lambda done, total: task.post(self.show_progress, done, total, key='progress'))
+
+    def finish_remap(self, mapping, preferred_ids, result):
+        self.rename_class_btn.config(state=tk.NORMAL)
+        self.annotations.remap_classes(mapping)
+        self.classes = remap_class_names(self.classes, mapping, preferred_ids)
+        self.status_label.config(text=f"Rewrote {result['changed_files']} label files ({result['files_per_second']:.0f} files/s)")
+        self.save_classes()
+        self.toggle_watcher()
+
+    def show_progress(self, done, total):
+        self.progress['value'] = done / total * 100
+
+    def show_error(self, error):
+        if self.rename_class_btn['state'] == tk.DISABLED:
+            # A failed remap may have rewritten some files; the restarted watcher reloads them
+            self.rename_class_btn.config(state=tk.NORMAL)
+            self.toggle_watcher()
+        messagebox.showerror("Error", str(error))
+
+    def save_thumbnail_cache(self):
+        cache = self.thumbnail_cache
+        if cache is not None:
+            self.scheduler.submit(lambda task: cache.save(), key='save-thumbnails')
 
     def rename_image(self):
         selected_item = self.image_listbox.selection()
@@ -165,17 +317,33 @@ class YOLODatasetManager:
             return
         old_image_name = self.image_listbox.item(selected_item, 'text')
         file_extension = os.path.splitext(old_image_name)[1]  # Get the file extension (e.g., .jpg, .png)
-        new_image_base_name = simpledialog.askstring("Rename Image", f"Enter new name for image '{old_image_name}':", parent=self.root)
-        if new_image_base_name and f"{new_image_base_name}{file_extension}" not in self.images:
-            new_image_name = f"{new_image_base_name}{file_extension}"  # Append the file extension to the new name
-            rename_file(self.dataset_dir, old_image_name, new_image_name, self.image_labels)
-            self.images[self.images.index(old_image_name)] = new_image_name
-            self.image_icons[new_image_name] = self.image_icons.pop(old_image_name)
+        new_image_base_name = simpledialog.askstring("Rename Image", f"Enter new name for image '{file_name_of(old_image_name)}':", parent=self.root)
+        # The image stays in its split
+        new_image_name = image_key(split_of(old_image_name), f"{new_image_base_name}{file_extension}")
+        if new_image_base_name and '/' not in new_image_base_name and new_image_name not in self.annotations.ids:
+            paths = (get_image_path(self.splits, old_image_name), get_image_path(self.splits, new_image_name), get_label_path(self.splits, old_image_name), get_label_path(self.splits, new_image_name))
+            self.scheduler.submit(lambda task: rename_file(*paths), on_done=lambda result: self.finish_rename_image(old_image_name, new_image_name), on_error=self.show_error)
+
+    def finish_rename_image(self, old_image_name, new_image_name):
+        if old_image_name not in self.annotations.ids or new_image_name in self.annotations.ids:
+            return  # Already picked up from the file system
+        self.image_cache.discard(get_image_path(self.splits, old_image_name))
+        self.annotations.rename_image(old_image_name, new_image_name)
+        self.images[self.images.index(old_image_name)] = new_image_name
+        self.image_list.rename(old_image_name, new_image_name)
+        if self.thumbnail_cache is not None:
+            self.thumbnail_cache.rename(thumbnail_key(old_image_name), thumbnail_key(new_image_name))
+            self.save_thumbnail_cache()
+        if self.class_listbox.curselection():
             self.image_display_manager.update_image_listbox(self.class_listbox.curselection()[0])
-            self.stats_manager.update_stats()
 
-    def show_graph(self):
-        show_class_annotations_graph(self.classes, self.stats)
+    def on_close(self):
+        if 'watcher' in self.__dict__:  # Never built, nothing to stop
+            self.watcher.stop()
+        self.scheduler.shutdown()
+        if self.thumbnail_cache is not None:
+            self.thumbnail_cache.close()
+        self.root.destroy()
 
 if __name__ == "__main__":
     root = tk.Tk()
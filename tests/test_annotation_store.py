@@ -0,0 +1,175 @@
+import numpy as np
+from classes.AnnotationStore import AnnotationStore
+from classes.ClassIndex import ClassIndex
+from utils.label_utils import parse_label_batch
+
+LABELS = {
+    'a.jpg': ['0 0.5 0.5 0.2 0.2', '1 0.25 0.25 0.1 0.1'],
+    'b.jpg': ['2 0.1 0.1 0.3 0.1 0.3 0.3 0.1 0.3', 'not a label'],
+    'c.jpg': [],
+    'd.jpg': ['1 0.6 0.6 0.1 0.1', '1 0.7 0.7 0.1 0.1', '3 0.4 0.4 0.2 0.2'],
+}
+
+def build_store(labels=LABELS):
+    return AnnotationStore().build(list(labels), labels)
+
+def assert_consistent(store):
+    # Offsets, row order and the inverted index must all agree with the rows themselves
+    assert np.all(np.diff(store.image_idx) >= 0)
+    counts = np.bincount(store.image_idx, minlength=len(store.names))
+    assert np.array_equal(store.image_offsets, np.concatenate(([0], np.cumsum(counts))))
+    assert len(store.seg_offsets) == len(store.class_ids) + 1
+    assert store.seg_offsets[-1] == len(store.seg_coords)
+    assert len(store.boxes) == len(store.class_ids) == len(store.image_idx)
+    assert len(store.alive) == len(store.invalid_counts) == len(store.names)
+    assert not counts[~store.alive].any()
+    assert store.ids == {name: i for i, name in enumerate(store.names) if name is not None}
+    expected = ClassIndex().build(store.image_idx, store.class_ids).images_by_class
+    assert store.class_index.images_by_class.keys() == expected.keys()
+    for class_id, image_ids in expected.items():
+        assert np.array_equal(store.class_index.images(class_id), image_ids)
+
+def image_classes(store, image):
+    return store.class_ids[store.rows(store.image_id(image))].tolist()
+
+def test_build():
+    store = build_store()
+    assert_consistent(store)
+    assert store.image_count == 4
+    assert store.annotation_count == 6
+    assert store.invalid_counts.tolist() == [0, 1, 0, 0]
+    assert image_classes(store, 'd.jpg') == [1, 1, 3]
+    assert store.boxes_per_image().tolist() == [2, 1, 0, 3]
+    assert store.class_counts(3).tolist() == [1, 3, 1]
+    assert store.images_with_class(1) == ['a.jpg', 'd.jpg']
+    assert store.image_class_counts(store.image_id('d.jpg')) == {1: 2, 3: 1}
+    assert store.images_with_classes([0, 3]) == ['a.jpg', 'd.jpg']
+    assert store.images_with_classes([]) == []
+    # Polygons get their bounding box
+    class_ids, boxes, segments = store.get_image(store.image_id('b.jpg'))
+    assert np.allclose(boxes[0], [0.2, 0.2, 0.2, 0.2])
+    assert segments[0] is not None and len(segments[0]) == 8
+
+def test_label_lines_round_trip():
+    store = build_store()
+    lines = store.label_lines(store.image_id('b.jpg'))
+    assert lines == ['2 0.100000 0.100000 0.300000 0.100000 0.300000 0.300000 0.100000 0.300000']
+    rebuilt = build_store({name: store.label_lines(store.image_id(name)) for name in LABELS})
+    assert np.array_equal(rebuilt.class_ids, store.class_ids)
+    assert np.allclose(rebuilt.boxes, store.boxes)
+    assert np.allclose(rebuilt.seg_coords, store.seg_coords)
+
+def test_set_labels():
+    store = build_store()
+    store.set_labels(store.image_id('a.jpg'), ['3 0.5 0.5 0.2 0.2', 'bad', '3 0.1 0.1 0.1 0.1', '4 0.9 0.9 0.1 0.1'])
+    assert_consistent(store)
+    assert image_classes(store, 'a.jpg') == [3, 3, 4]
+    assert store.invalid_counts[store.image_id('a.jpg')] == 1
+    assert store.images_with_class(0) == []
+    assert store.images_with_class(3) == ['a.jpg', 'd.jpg']
+    assert image_classes(store, 'd.jpg') == [1, 1, 3]
+
+def test_set_image_keeps_polygons_of_other_images():
+    store = build_store()
+    store.set_image(store.image_id('a.jpg'), [5], [[0.5, 0.5, 0.1, 0.1]], [None])
+    assert_consistent(store)
+    _, _, segments = store.get_image(store.image_id('b.jpg'))
+    assert np.allclose(segments[0], [0.1, 0.1, 0.3, 0.1, 0.3, 0.3, 0.1, 0.3])
+
+def test_add_image():
+    store = build_store()
+    image_id = store.add_image('e.jpg', ['0 0.5 0.5 0.5 0.5'])
+    assert_consistent(store)
+    assert image_id == 4
+    assert store.images_with_class(0) == ['a.jpg', 'e.jpg']
+
+def test_remove_image():
+    store = build_store()
+    store.remove_image('a.jpg')
+    assert_consistent(store)
+    assert store.image_count == 3
+    assert store.images_with_class(0) == []
+    assert store.images_with_class(1) == ['d.jpg']
+    assert 'a.jpg' not in store.ids
+
+def test_rename_image():
+    store = build_store()
+    image_id = store.rename_image('a.jpg', 'z.jpg')
+    assert_consistent(store)
+    assert store.image_id('z.jpg') == image_id
+    assert store.images_with_class(0) == ['z.jpg']
+
+def test_remap_classes():
+    store = build_store()
+    # 0 -> 1, 1 dropped, 2 -> 0; class 3 lies outside the mapping and is kept
+    store.remap_classes([1, -1, 0])
+    assert_consistent(store)
+    assert image_classes(store, 'a.jpg') == [1]
+    assert image_classes(store, 'b.jpg') == [0]
+    assert image_classes(store, 'd.jpg') == [3]
+    assert store.images_with_class(1) == ['a.jpg']
+    _, _, segments = store.get_image(store.image_id('b.jpg'))
+    assert len(segments[0]) == 8
+
+def test_remap_classes_without_drops():
+    store = build_store()
+    store.remap_classes([3, 2, 1, 0])
+    assert_consistent(store)
+    assert image_classes(store, 'd.jpg') == [2, 2, 0]
+    assert store.images_with_class(2) == ['a.jpg', 'd.jpg']
+
+def test_build_from_batches_matches_build():
+    images = list(LABELS)
+    texts = ['\n'.join(LABELS[image]) for image in images]
+    store = AnnotationStore().build_from_batches(images, [parse_label_batch(texts[:1]), parse_label_batch(texts[1:3]), parse_label_batch(texts[3:])])
+    expected = build_store()
+    assert_consistent(store)
+    for name in ('invalid_counts', 'image_offsets', 'image_idx', 'class_ids', 'boxes', 'seg_offsets', 'seg_coords'):
+        assert np.array_equal(getattr(store, name), getattr(expected, name))
+    assert AnnotationStore().build_from_batches([], []).image_count == 0
+
+def test_replace_images():
+    store = build_store()
+    texts = ['3 0.5 0.5 0.1 0.1\n3 0.2 0.2 0.1 0.1\nbad', '', '0 0.1 0.1 0.3 0.1 0.3 0.3']
+    store.replace_images([store.image_id(name) for name in ('d.jpg', 'a.jpg', 'c.jpg')], parse_label_batch(texts))
+    assert_consistent(store)
+    assert image_classes(store, 'a.jpg') == []
+    assert image_classes(store, 'c.jpg') == [0]
+    assert image_classes(store, 'd.jpg') == [3, 3]
+    assert store.invalid_counts.tolist() == [0, 1, 0, 1]
+    # Untouched polygons keep their points, new ones are appended
+    _, _, segments = store.get_image(store.image_id('b.jpg'))
+    assert np.allclose(segments[0], [0.1, 0.1, 0.3, 0.1, 0.3, 0.3, 0.1, 0.3])
+    _, _, segments = store.get_image(store.image_id('c.jpg'))
+    assert np.allclose(segments[0], [0.1, 0.1, 0.3, 0.1, 0.3, 0.3])
+
+def test_remove_images_and_compact():
+    store = build_store()
+    store.remove_images(['a.jpg', 'c.jpg'])
+    assert_consistent(store)
+    assert store.names == [None, 'b.jpg', None, 'd.jpg']
+    assert store.images_with_class(1) == ['d.jpg']
+    store.compact()
+    assert_consistent(store)
+    assert store.names == ['b.jpg', 'd.jpg']
+    assert image_classes(store, 'd.jpg') == [1, 1, 3]
+    assert store.invalid_counts.tolist() == [1, 0]
+    assert store.images_with_class(3) == ['d.jpg']
+
+def test_add_images():
+    store = build_store()
+    image_ids = store.add_images(['e.jpg', 'f.jpg'])
+    assert image_ids.tolist() == [4, 5]
+    assert_consistent(store)
+    store.replace_images(image_ids[1:], parse_label_batch(['2 0.5 0.5 0.1 0.1']))
+    assert_consistent(store)
+    assert store.images_with_class(2) == ['b.jpg', 'f.jpg']
+
+def test_copy_is_independent():
+    store = build_store()
+    copy = store.copy()
+    store.set_labels(store.image_id('a.jpg'), [])
+    store.remove_image('d.jpg')
+    assert_consistent(copy)
+    assert image_classes(copy, 'a.jpg') == [0, 1]
+    assert copy.images_with_class(1) == ['a.jpg', 'd.jpg']
@@ -0,0 +1,88 @@
+import tkinter as tk
+from classes.BoxLayer import BoxLayer
+
+class FakeCanvas:
+    # Records canvas calls instead of drawing
+    def __init__(self):
+        self.items = {}
+        self.coord_calls = 0
+        self.config_calls = 0
+
+    def create_item(self, **options):
+        item = len(self.items) + 1
+        self.items[item] = {'coords': None, 'state': options.get('state')}
+        return item
+
+    def create_rectangle(self, *coords, **options):
+        return self.create_item(**options)
+
+    def create_text(self, *coords, **options):
+        return self.create_item(**options)
+
+    def create_polygon(self, *coords, **options):
+        return self.create_item(**options)
+
+    def delete(self, tag):
+        self.items.clear()
+
+    def coords(self, item, *coords):
+        self.coord_calls += 1
+        self.items[item]['coords'] = coords
+
+    def itemconfig(self, item, state=None):
+        self.config_calls += 1
+        self.items[item]['state'] = state
+
+def make_layer():
+    layer = BoxLayer(FakeCanvas(), ['cat', 'dog'])
+    # Two boxes, a polygon and a box with an unknown class: only the last gets no items
+    layer.set_boxes([0, 1, 0, 5], [[0.25, 0.25, 0.5, 0.5], [0.9, 0.9, 0.02, 0.02], [0.5, 0.5, 0.1, 0.1], [0.5, 0.5, 0.1, 0.1]], [None, None, [0.1, 0.1, 0.3, 0.1, 0.3, 0.3], None])
+    return layer
+
+def shown(layer, items):
+    return [layer.canvas.items[item]['state'] == tk.NORMAL for item in items]
+
+def test_set_boxes_creates_items_for_drawable_boxes():
+    layer = make_layer()
+    assert len(layer.canvas.items) == 6
+    assert layer.rects[2] is not None and layer.rects[3] is None
+
+def test_update_shows_visible_boxes_and_readable_labels():
+    layer = make_layer()
+    layer.update(1, (0, 0), (1000, 1000), (0, 0, 1000, 1000))
+    assert layer.canvas.items[layer.rects[0]]['coords'] == (0, 0, 500, 500)
+    assert shown(layer, layer.rects[:2]) == [True, True]
+    assert shown(layer, layer.texts[:2]) == [True, True]
+    # At half zoom the second box is 10 pixels wide, too small for its class name
+    layer.update(0.5, (0, 0), (1000, 1000), (0, 0, 1000, 1000))
+    assert shown(layer, layer.texts[:2]) == [True, False]
+
+def test_update_hides_boxes_outside_the_viewport():
+    layer = make_layer()
+    layer.update(1, (0, 0), (1000, 1000), (600, 600, 1000, 1000))
+    assert shown(layer, layer.rects[:2]) == [False, True]
+
+def test_unchanged_update_touches_no_items():
+    layer = make_layer()
+    layer.update(1, (0, 0), (1000, 1000), (0, 0, 1000, 1000))
+    calls = layer.canvas.coord_calls, layer.canvas.config_calls
+    layer.update(1, (0, 0), (1000, 1000), (0, 0, 1000, 1000))
+    assert (layer.canvas.coord_calls, layer.canvas.config_calls) == calls
+
+def test_hit_test():
+    layer = make_layer()
+    layer.update(1, (0, 0), (1000, 1000), (0, 0, 1000, 1000))
+    assert layer.hit_test(1, 250) == 0
+    assert layer.hit_test(400, 450) is None  # Inside a box, away from its outline
+    assert layer.hit_test(250, 250) == 2  # On the polygon's diagonal edge
+    assert layer.hit_test(890, 900) == 1
+    assert layer.hit_test(700, 100) is None
+
+def test_polygons_follow_the_zoom():
+    layer = make_layer()
+    layer.update(1, (10, 20), (1000, 1000), (0, 0, 1000, 1000))
+    # The polygon's item gets its own points; its label sits at the polygon's bounding box
+    assert layer.canvas.items[layer.rects[2]]['coords'] == (110.0, 120.0, 310.0, 120.0, 310.0, 320.0)
+    assert layer.canvas.items[layer.texts[2]]['coords'] == (110.0, 120.0)
+    layer.update(2, (0, 0), (1000, 1000), (0, 0, 2000, 2000))
+    assert layer.canvas.items[layer.rects[2]]['coords'] == (200.0, 200.0, 600.0, 200.0, 600.0, 600.0)
@@ -0,0 +1,49 @@
+import numpy as np
+from classes.ClassIndex import ClassIndex
+
+def build_index():
+    # Image 0: classes 0, 1, 1; image 1: nothing; image 2: class 1; image 3: classes 2 and -1
+    image_idx = np.array([0, 0, 0, 2, 3, 3], dtype=np.int32)
+    class_ids = np.array([0, 1, 1, 1, 2, -1], dtype=np.int32)
+    return ClassIndex().build(image_idx, class_ids)
+
+def as_lists(index):
+    return {class_id: image_ids.tolist() for class_id, image_ids in index.images_by_class.items()}
+
+def test_build():
+    index = build_index()
+    assert as_lists(index) == {0: [0], 1: [0, 2], 2: [3]}
+    assert index.image_counts() == {0: 1, 1: 2, 2: 1}
+    assert index.images(5).tolist() == []
+
+def test_build_empty():
+    index = ClassIndex().build(np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32))
+    assert index.images_by_class == {}
+
+def test_add_and_discard_keep_ids_sorted():
+    index = build_index()
+    index.add(1, 1)
+    index.add(1, 2)  # Already present
+    index.add(4, 7)
+    assert as_lists(index) == {0: [0], 1: [0, 1, 2], 2: [3], 4: [7]}
+    index.discard(1, 0)
+    index.discard(1, 5)  # Not present
+    index.discard(0, 0)
+    assert as_lists(index) == {1: [1, 2], 2: [3], 4: [7]}
+
+def test_update_image():
+    index = build_index()
+    # Image 0 loses class 0, keeps class 1 and gains class 2; negative ids are ignored
+    index.update_image(0, [0, 1, 1], [1, 2, -1])
+    assert as_lists(index) == {1: [0, 2], 2: [0, 3]}
+
+def test_remap_merges_and_drops():
+    index = build_index()
+    # 0 and 2 merge into 0, 1 is dropped; class 3 would keep its id
+    index.remap([0, -1, 0])
+    assert as_lists(index) == {0: [0, 3]}
+
+def test_remap_keeps_classes_outside_mapping():
+    index = build_index()
+    index.remap([1, 0])
+    assert as_lists(index) == {1: [0], 0: [0, 2], 2: [3]}
@@ -0,0 +1,79 @@
+import json
+import yaml
+from cli import main
+
+CLASSES = ['cat', 'dog', 'bird']
+LABELS = {
+    'a': ['0 0.5 0.5 0.2 0.2', '1 0.1 0.1 0.1 0.1'],
+    'b': ['2 0.1 0.1 0.3 0.1 0.3 0.3', 'not a label'],
+    'c': [],
+    'd': ['1 0.6 0.6 0.1 0.1', '1 0.7 0.7 0.1 0.1'],
+}
+
+def make_dataset(tmp_path):
+    (tmp_path / 'images').mkdir(parents=True)
+    (tmp_path / 'labels').mkdir()
+    for name, lines in LABELS.items():
+        (tmp_path / 'images' / f'{name}.jpg').write_bytes(b'')
+        (tmp_path / 'labels' / f'{name}.txt').write_text(''.join(line + '\n' for line in lines))
+    (tmp_path / 'data.yaml').write_text(yaml.dump({'names': CLASSES, 'nc': len(CLASSES)}))
+    return str(tmp_path)
+
+def run(tmp_path, *args):
+    output = tmp_path / 'result.json'
+    assert main(['--workers', '1', '--output', str(output)] + list(args)) == 0
+    return json.loads(output.read_text())
+
+def dataset_classes(dataset):
+    with open(f'{dataset}/data.yaml') as file:
+        return yaml.safe_load(file)['names']
+
+def label_classes(dataset, name):
+    with open(f'{dataset}/labels/{name}.txt') as file:
+        return [line.split()[0] for line in file.read().splitlines()]
+
+def test_stats(tmp_path):
+    result = run(tmp_path, 'stats', make_dataset(tmp_path / 'dataset'))
+    assert result['total_images'] == 4
+    assert result['total_bboxes'] == 5
+    assert result['percentage_no_bboxes_images'] == 25
+    assert result['invalid_lines'] == 1
+    assert [(entry['name'], entry['bboxes']) for entry in result['classes']] == [('cat', 1), ('dog', 3), ('bird', 1)]
+
+def test_rename_class(tmp_path):
+    dataset = make_dataset(tmp_path / 'dataset')
+    result = run(tmp_path, 'rename-class', dataset, 'dog', 'puppy')
+    assert result['classes'] == dataset_classes(dataset) == ['cat', 'puppy', 'bird']
+    assert result['changed_files'] == 0
+    assert label_classes(dataset, 'd') == ['1', '1']
+
+def test_rename_onto_existing_class_merges(tmp_path):
+    dataset = make_dataset(tmp_path / 'dataset')
+    result = run(tmp_path, 'rename-class', dataset, 'cat', 'bird')
+    assert dataset_classes(dataset) == ['dog', 'bird']
+    assert result['changed_files'] == 3
+    assert label_classes(dataset, 'a') == ['1', '0']
+    assert label_classes(dataset, 'b') == ['1', 'not']
+
+def test_merge_classes(tmp_path):
+    dataset = make_dataset(tmp_path / 'dataset')
+    run(tmp_path, 'merge-classes', dataset, 'cat', 'bird', '--into', 'dog')
+    # The merge target keeps its name even though cat has a lower id
+    assert dataset_classes(dataset) == ['dog']
+    assert label_classes(dataset, 'a') == ['0', '0']
+    assert label_classes(dataset, 'b') == ['0', 'not']
+
+def test_delete_class(tmp_path):
+    dataset = make_dataset(tmp_path / 'dataset')
+    result = run(tmp_path, 'delete-class', dataset, 'dog')
+    assert dataset_classes(dataset) == ['cat', 'bird']
+    assert result['changed_lines'] == 4
+    assert label_classes(dataset, 'a') == ['0']
+    assert label_classes(dataset, 'd') == []
+    assert label_classes(dataset, 'b') == ['1', 'not']
+
+def test_errors(tmp_path, capsys):
+    dataset = make_dataset(tmp_path / 'dataset')
+    assert main(['delete-class', dataset, 'horse']) == 1
+    assert "Unknown class 'horse'" in capsys.readouterr().err
+    assert main(['stats', str(tmp_path / 'missing')]) == 1
@@ -0,0 +1,23 @@
+from types import SimpleNamespace
+from classes.DatasetLoader import DatasetLoader
+
+class RecordingTask:
+    cancelled = False
+
+    def __init__(self):
+        self.posted = []
+
+    def post(self, callback, *args, key=None):
+        self.posted.append((callback, args))
+
+def test_missing_yaml_clears_class_names(tmp_path):
+    manager = SimpleNamespace(classes=['old'], splits={}, load_classes=lambda: None,
+                              stats_manager=SimpleNamespace(reset=lambda: None))
+    loader = DatasetLoader(manager)
+    loader.load_images_and_labels_dir = lambda task, splits, classes, cache: None
+    task = RecordingTask()
+    loader.load_dataset_job(task, str(tmp_path), None)
+    for callback, args in task.posted:
+        if callback == loader.on_classes:
+            callback(*args)
+    assert manager.classes == []
@@ -0,0 +1,105 @@
+import os
+import threading
+from types import SimpleNamespace
+import numpy as np
+from PIL import Image
+from classes.DatasetWatcher import DatasetWatcher
+from classes.ThumbnailCache import ThumbnailCache
+from utils.cache_utils import thumbnail_key
+from utils.split_utils import stat_splits
+from utils.label_utils import parse_label_batch, select_label_batch, ragged_indices
+
+TEXTS = ['0 0.5 0.5 0.2 0.2\n1 0.1 0.1 0.3 0.1 0.3 0.3\n', '', '2 0.5 0.5 0.1 0.1\n', '3 0.2 0.2 0.4 0.2 0.4 0.4 0.2 0.4\n']
+
+def make_dataset(tmp_path):
+    splits = {'train': (str(tmp_path / 'images' / 'train'), str(tmp_path / 'labels' / 'train'))}
+    for directory in splits['train']:
+        os.makedirs(directory)
+    for name in ('a', 'b'):
+        Image.new('RGB', (20, 20)).save(tmp_path / 'images' / 'train' / f'{name}.png')
+    (tmp_path / 'labels' / 'train' / 'a.txt').write_text('0 0.5 0.5 0.2 0.2\n')
+    return splits
+
+def start_state(splits):
+    image_stats, label_stats, _ = stat_splits(splits)
+    stems = {os.path.splitext(image)[0]: image for image in image_stats}
+    return image_stats, label_stats, stems
+
+def test_ragged_indices():
+    assert ragged_indices([5, 0, 9], [2, 0, 3]).tolist() == [5, 6, 9, 10, 11]
+    assert ragged_indices([], []).tolist() == []
+
+def test_select_label_batch():
+    batch = parse_label_batch(TEXTS)
+    counts, class_ids, boxes, seg_lengths, seg_coords, invalid = select_label_batch(batch, [3, 0, 1])
+    expected = parse_label_batch([TEXTS[3], TEXTS[0], TEXTS[1]])
+    assert counts.tolist() == expected[0].tolist() == [1, 2, 0]
+    assert class_ids.tolist() == [3, 0, 1]
+    assert np.array_equal(boxes, expected[2])
+    assert seg_lengths.tolist() == [8, 0, 6]
+    assert np.array_equal(seg_coords, expected[4])
+    assert len(select_label_batch(batch, [])[0]) == 0
+
+def test_collect_changes(tmp_path):
+    splits = make_dataset(tmp_path)
+    image_stats, label_stats, stems = start_state(splits)
+    watcher = DatasetWatcher(SimpleNamespace())
+
+    # b gains a label, c is added, a is deleted
+    (tmp_path / 'labels' / 'train' / 'b.txt').write_text('1 0.5 0.5 0.2 0.2\n')
+    Image.new('RGB', (20, 20)).save(tmp_path / 'images' / 'train' / 'c.png')
+    os.remove(tmp_path / 'images' / 'train' / 'a.png')
+    changes = watcher.collect_changes(splits, image_stats, label_stats, stems, {'train/a.png', 'train/c.png'}, {'train/b'}, False, None, threading.Event())
+    added, removed, modified, reparsed, batch = changes
+    assert (added, removed, modified, reparsed) == (['train/c.png'], ['train/a.png'], [], ['train/b.png', 'train/c.png'])
+    assert batch[0].tolist() == [1, 0]
+    assert batch[1].tolist() == [1]
+    assert sorted(image_stats) == ['train/b.png', 'train/c.png']
+    assert 'train/a' not in stems
+
+    # Nothing changed since the last pass
+    assert watcher.collect_changes(splits, image_stats, label_stats, stems, set(), set(), True, None, threading.Event()) is None
+
+def test_collect_changes_rescan_updates_thumbnails(tmp_path):
+    splits = make_dataset(tmp_path)
+    image_stats, label_stats, stems = start_state(splits)
+    (tmp_path / 'cache').mkdir()
+    cache = ThumbnailCache(str(tmp_path / 'cache'), (8, 8))
+    watcher = DatasetWatcher(SimpleNamespace())
+
+    Image.new('RGB', (30, 30), (255, 0, 0)).save(tmp_path / 'images' / 'train' / 'b.png')
+    os.utime(tmp_path / 'images' / 'train' / 'b.png', ns=(1, 1))
+    added, removed, modified, reparsed, _ = watcher.collect_changes(splits, image_stats, label_stats, stems, set(), set(), True, cache, threading.Event())
+    assert (added, removed, modified, reparsed) == ([], [], ['train/b.png'], [])
+    assert cache.lookup(thumbnail_key('train/b.png'), *image_stats['train/b.png']) is not None
+    cache.close()
+
+def test_collect_changes_after_the_cache_is_closed(tmp_path):
+    splits = make_dataset(tmp_path)
+    image_stats, label_stats, stems = start_state(splits)
+    (tmp_path / 'cache').mkdir()
+    cache = ThumbnailCache(str(tmp_path / 'cache'), (8, 8))
+    cache.close()  # As a new load does while the watcher is still running
+
+    Image.new('RGB', (20, 20)).save(tmp_path / 'images' / 'train' / 'c.png')
+    (tmp_path / 'images' / 'train' / 'd.png').write_bytes(b'not an image')
+    changes = DatasetWatcher(SimpleNamespace()).collect_changes(splits, image_stats, label_stats, stems, set(), set(), True, cache, threading.Event())
+    assert changes[0] == ['train/c.png', 'train/d.png']
+    assert cache.entries == {}
+
+class ImmediateScheduler:
+    def call_soon(self, callback, *args, key=None, task=None):
+        callback(*args)
+
+def test_failure_is_reported(tmp_path, capsys):
+    splits = make_dataset(tmp_path)
+    image_stats, label_stats, _ = start_state(splits)
+    status = SimpleNamespace(text=None)
+    status.config = lambda text: setattr(status, 'text', text)
+    watcher = DatasetWatcher(SimpleNamespace(scheduler=ImmediateScheduler(), status_label=status))
+    def fail(*args):
+        raise RuntimeError('disk went away')
+    watcher.collect_changes = fail
+    watcher.run(watcher.generation, threading.Event(), str(tmp_path), splits, image_stats, label_stats, None)
+    assert status.text == "File watcher stopped: disk went away"
+    assert 'RuntimeError' in capsys.readouterr().err
@@ -0,0 +1,41 @@
+import re
+import numpy as np
+import pytest
+from utils.filter_utils import build_name_index, parse_filter, match_names, narrows
+
+NAMES = ['Cat_01.jpg', 'cat_02.png', 'dog_01.jpg', 'train/bird.JPG', 'concat.jpg']
+
+def matches(query, candidates=None):
+    kind, pattern = parse_filter(query)
+    return [NAMES[i] for i in match_names(build_name_index(NAMES), kind, pattern, candidates)]
+
+def test_parse_filter():
+    assert parse_filter('Cat') == ('substring', 'cat')
+    assert parse_filter('*.jpg')[0] == 'glob'
+    assert parse_filter('re:^cat')[0] == 'regex'
+    with pytest.raises(re.error):
+        parse_filter('re:(')
+
+def test_substring_is_case_insensitive():
+    assert matches('CAT') == ['Cat_01.jpg', 'cat_02.png', 'concat.jpg']
+    assert matches('') == NAMES
+    assert matches('horse') == []
+
+def test_glob_matches_the_whole_name():
+    assert matches('*.jpg') == ['Cat_01.jpg', 'dog_01.jpg', 'train/bird.JPG', 'concat.jpg']
+    assert matches('cat_0?.*') == ['Cat_01.jpg', 'cat_02.png']
+
+def test_regex_searches_anywhere():
+    assert matches('re:_0[12]\\.') == ['Cat_01.jpg', 'cat_02.png', 'dog_01.jpg']
+    assert matches('re:^train/') == ['train/bird.JPG']
+
+def test_candidates_restrict_the_search():
+    candidates = np.array([1, 2, 4], dtype=np.int64)
+    assert matches('cat', candidates) == ['cat_02.png', 'concat.jpg']
+    assert matches('re:cat', candidates) == ['cat_02.png', 'concat.jpg']
+
+def test_narrows():
+    assert narrows(('substring', 'ca'), 'substring', 'cat')
+    assert not narrows(('substring', 'cat'), 'substring', 'ca')
+    assert not narrows(None, 'substring', 'cat')
+    assert not narrows(('glob', 'c*'), 'substring', 'cat')
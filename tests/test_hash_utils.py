@@ -0,0 +1,70 @@
+import numpy as np
+from PIL import Image
+from utils.hash_utils import chunk_masks, find_root, find_duplicate_groups, HASH_BITS
+from utils.image_utils import dhash, decode_thumbnail
+
+def brute_force_groups(hashes, max_distance):
+    # Connected components of the "within max_distance bits" graph, compared pair by pair
+    parent = list(range(len(hashes)))
+    for i in range(len(hashes)):
+        for j in range(i + 1, len(hashes)):
+            if bin(int(hashes[i]) ^ int(hashes[j])).count('1') <= max_distance:
+                parent[find_root(parent, j)] = find_root(parent, i)
+    groups = {}
+    for node in range(len(hashes)):
+        groups.setdefault(find_root(parent, node), []).append(node)
+    return sorted(group for group in groups.values() if len(group) > 1)
+
+def test_chunk_masks_cover_every_bit():
+    for max_distance in (0, 3, 4, 7):
+        chunks = chunk_masks(max_distance)
+        assert len(chunks) == max_distance + 1
+        covered = 0
+        for shift, mask in chunks:
+            assert covered & (mask << shift) == 0
+            covered |= mask << shift
+        assert covered == (1 << HASH_BITS) - 1
+
+def test_find_root_compresses_paths():
+    parent = [0, 0, 1, 2]
+    assert find_root(parent, 3) == 0
+    assert parent[3] in (0, 1)
+    assert find_root(parent, 0) == 0
+
+def test_exact_and_near_duplicates():
+    base = 0x0123456789ABCDEF
+    hashes = [base, 0xFFFF000000000000, base ^ 0b1011, base, base ^ (0b11111 << 40), 0]
+    assert find_duplicate_groups(hashes) == [[0, 2, 3]]
+    assert find_duplicate_groups(hashes, max_distance=5) == [[0, 2, 3, 4]]
+    assert find_duplicate_groups([]) == []
+
+def test_matches_brute_force():
+    rng = np.random.default_rng(0)
+    seeds = rng.integers(0, 2 ** 63, size=20, dtype=np.uint64)
+    # Clusters of nearby hashes chained through flips of a few random bits
+    hashes = []
+    for seed in seeds:
+        value = int(seed)
+        for _ in range(rng.integers(1, 5)):
+            hashes.append(value)
+            for bit in rng.choice(HASH_BITS, size=rng.integers(0, 4), replace=False):
+                value ^= 1 << int(bit)
+    hashes = np.array(hashes, dtype=np.uint64)
+    groups = find_duplicate_groups(hashes, max_distance=3)
+    assert sorted(sorted(group) for group in groups) == brute_force_groups(hashes, 3)
+    assert [len(group) for group in groups] == sorted((len(group) for group in groups), reverse=True)
+
+def test_dhash_ignores_scale():
+    gradient = Image.fromarray(np.tile(np.linspace(0, 255, 90).astype(np.uint8), (80, 1)))
+    assert dhash(gradient) == dhash(gradient.resize((45, 40)))
+    assert dhash(gradient) != dhash(gradient.transpose(Image.FLIP_LEFT_RIGHT))
+
+def test_decode_thumbnail(tmp_path):
+    path = tmp_path / 'a.png'
+    Image.new('RGB', (100, 50), (255, 0, 0)).save(path)
+    data, image_hash, image_size = decode_thumbnail(str(path))
+    assert len(data) == 40 * 40 * 4  # RGBA
+    assert isinstance(image_hash, int)
+    assert image_size == (100, 50)
+    (tmp_path / 'broken.jpg').write_bytes(b'not an image')
+    assert decode_thumbnail(str(tmp_path / 'broken.jpg')) == (None, None, None)
@@ -0,0 +1,55 @@
+import numpy as np
+from PIL import Image
+from classes.ImageCache import ImageCache
+
+def write_image(tmp_path, name, size=(10, 10), color=(0, 0, 255)):
+    path = str(tmp_path / name)
+    Image.new('RGB', size, color).save(path)
+    return path
+
+def test_get_reuses_decoded_image(tmp_path):
+    cache = ImageCache()
+    path = write_image(tmp_path, 'a.png')
+    assert cache.get(path) is cache.get(path)
+    assert cache.used == 10 * 10 * 3
+
+def test_budget_evicts_least_recently_used(tmp_path):
+    cache = ImageCache(budget=2 * 10 * 10 * 3)
+    paths = [write_image(tmp_path, f'{i}.png') for i in range(3)]
+    cache.get(paths[0])
+    cache.get(paths[1])
+    cache.get(paths[0])
+    cache.get(paths[2])
+    assert list(cache.images) == [paths[0], paths[2]]
+    assert cache.used == 2 * 10 * 10 * 3
+
+def test_image_larger_than_budget_is_not_kept(tmp_path):
+    cache = ImageCache(budget=100)
+    img = cache.get(write_image(tmp_path, 'a.png'))
+    assert img.size == (10, 10)
+    assert not cache.images and cache.used == 0
+
+def test_preview_is_keyed_by_boxes(tmp_path):
+    cache = ImageCache()
+    path = write_image(tmp_path, 'a.png', size=(40, 40))
+    class_ids = np.array([0], dtype=np.int32)
+    boxes = np.array([[0.5, 0.5, 0.5, 0.5]], dtype=np.float32)
+    preview = cache.get_preview(path, class_ids, boxes, ['cat'], size=(20, 20))
+    assert preview.size == (20, 20)
+    assert cache.get_preview(path, class_ids, boxes, ['cat'], size=(20, 20)) is preview
+    moved = cache.get_preview(path, class_ids, boxes * 0.5, ['cat'], size=(20, 20))
+    assert moved is not preview
+    # The cached source image is never drawn on
+    assert cache.get(path).getpixel((10, 10)) == (0, 0, 255)
+
+def test_discard_and_clear(tmp_path):
+    cache = ImageCache()
+    a, b = write_image(tmp_path, 'a.png'), write_image(tmp_path, 'b.png')
+    cache.get_preview(a, np.zeros(0, dtype=np.int32), np.zeros((0, 4), dtype=np.float32), [], size=(5, 5))
+    cache.get(b)
+    cache.discard(a)
+    assert list(cache.images) == [b]
+    assert not cache.previews
+    assert cache.used == 10 * 10 * 3
+    cache.clear()
+    assert not cache.images and cache.used == 0
@@ -0,0 +1,39 @@
+from PIL import Image
+from classes.ImagePyramid import ImagePyramid
+
+def make_pyramid(width=1000, height=600, tile_size=256):
+    return ImagePyramid(Image.new('RGB', (width, height)), tile_size=tile_size)
+
+def test_levels():
+    pyramid = make_pyramid()
+    assert [level.size for level in pyramid.levels] == [(1000, 600), (500, 300), (250, 150)]
+    assert pyramid.size == (1000, 600)
+    assert ImagePyramid(Image.new('P', (10, 10))).levels[0].mode == 'RGB'
+
+def test_level_for_zoom():
+    pyramid = make_pyramid()
+    assert pyramid.level_for_zoom(4) == 0
+    assert pyramid.level_for_zoom(1) == 0
+    assert pyramid.level_for_zoom(0.75) == 0
+    assert pyramid.level_for_zoom(0.5) == 1
+    assert pyramid.level_for_zoom(0.3) == 1
+    assert pyramid.level_for_zoom(0.01) == 2
+
+def test_tile_layout_covers_the_image():
+    pyramid = make_pyramid()
+    for zoom in (1, 0.6, 1.7):
+        tiles = list(pyramid.tile_layout(zoom, (0, 0, 10000, 10000)))
+        # Tiles meet edge to edge, so their areas add up to the scaled image
+        width = max(x + w for _, (x, _, w, _) in tiles)
+        height = max(y + h for _, (_, y, _, h) in tiles)
+        assert sum(w * h for _, (_, _, w, h) in tiles) == width * height
+        assert abs(width - 1000 * zoom) <= 1 and abs(height - 600 * zoom) <= 1
+
+def test_tile_layout_only_visible_tiles():
+    pyramid = make_pyramid()
+    keys = [key for key, _ in pyramid.tile_layout(1, (300, 0, 600, 200))]
+    assert keys == [(0, 1, 0), (0, 2, 0)]
+    assert list(pyramid.tile_layout(1, (2000, 2000, 2100, 2100))) == []
+    # At zoom 0.5 level 1 is used at its native size
+    tiles = list(pyramid.tile_layout(0.5, (0, 0, 100, 100)))
+    assert tiles == [((1, 0, 0), (0, 0, 256, 256))]
@@ -0,0 +1,91 @@
+from utils.label_rewrite import (remap_classes_in_label_files, merge_mapping, delete_mapping, remap_class_names, changed_class_ids,
+                                 rename_class_in_labels, merge_classes_in_labels, list_label_files)
+
+def write_label(path, lines):
+    path.write_text(''.join(line + '\n' for line in lines))
+    return str(path)
+
+def read_label(path):
+    with open(path) as file:
+        return file.read().splitlines()
+
+def test_remap_rewrites_and_drops(tmp_path):
+    first = write_label(tmp_path / 'a.txt', ['0 0.5 0.5 0.2 0.2', '1 0.1 0.1 0.1 0.1', '2 0.1 0.1 0.3 0.1 0.3 0.3'])
+    second = write_label(tmp_path / 'b.txt', ['2 0.25 0.25 0.1 0.1', 'not a label', '', '7 0.5 0.5 0.1 0.1'])
+    report = remap_classes_in_label_files([first, second], [1, -1, 0])
+
+    # Coordinates are kept as written; only the class token changes
+    assert read_label(first) == ['1 0.5 0.5 0.2 0.2', '0 0.1 0.1 0.3 0.1 0.3 0.3']
+    # Unparsable lines and ids outside the mapping are kept
+    assert read_label(second) == ['0 0.25 0.25 0.1 0.1', 'not a label', '7 0.5 0.5 0.1 0.1']
+    assert report['files'] == 2
+    assert report['changed_files'] == 2
+    assert report['changed_lines'] == 4
+
+def test_unchanged_files_are_not_rewritten(tmp_path):
+    path = write_label(tmp_path / 'a.txt', ['0 0.5 0.5 0.2 0.2', '', '3 0.1 0.1 0.1 0.1'])
+    mtime = (tmp_path / 'a.txt').stat().st_mtime_ns
+    report = remap_classes_in_label_files([path], [0, 2, 1])
+    assert report['changed_files'] == 0
+    assert (tmp_path / 'a.txt').stat().st_mtime_ns == mtime
+    assert (tmp_path / 'a.txt').read_text() == '0 0.5 0.5 0.2 0.2\n\n3 0.1 0.1 0.1 0.1\n'
+
+def test_missing_files_are_skipped(tmp_path):
+    present = write_label(tmp_path / 'a.txt', ['1 0.5 0.5 0.2 0.2'])
+    report = remap_classes_in_label_files([str(tmp_path / 'missing.txt'), present], [0, 0])
+    assert read_label(present) == ['0 0.5 0.5 0.2 0.2']
+    assert report['changed_files'] == 1
+
+def test_progress(tmp_path):
+    paths = [write_label(tmp_path / f'{i}.txt', ['0 0.5 0.5 0.2 0.2']) for i in range(5)]
+    calls = []
+    remap_classes_in_label_files(paths, [1], max_workers=2, progress=lambda done, total: calls.append((done, total)))
+    assert calls == [(done, 5) for done in range(1, 6)]
+    assert all(read_label(path) == ['1 0.5 0.5 0.2 0.2'] for path in paths)
+
+def test_merge_mapping():
+    # Classes 1 and 3 merge into 2; the remaining ids are compacted
+    mapping = merge_mapping(5, [1, 3], 2)
+    assert mapping == [0, 1, 1, 1, 2]
+    assert changed_class_ids(mapping) == [2, 3, 4]
+
+def test_delete_mapping():
+    mapping = delete_mapping(4, 1)
+    assert mapping == [0, -1, 1, 2]
+    assert remap_class_names(['a', 'b', 'c', 'd'], mapping) == ['a', 'c', 'd']
+
+def test_merge_classes_in_labels(tmp_path):
+    (tmp_path / 'labels').mkdir()
+    path = write_label(tmp_path / 'labels' / 'a.txt', ['0 0.5 0.5 0.2 0.2', '1 0.1 0.1 0.1 0.1', '2 0.3 0.3 0.1 0.1'])
+    report = merge_classes_in_labels({'': (str(tmp_path / 'images'), str(tmp_path / 'labels'))}, 0, 2, 3)
+    assert read_label(path) == ['1 0.5 0.5 0.2 0.2', '0 0.1 0.1 0.1 0.1', '1 0.3 0.3 0.1 0.1']
+    assert report['changed_lines'] == 3
+
+def test_rename_class_in_labels(tmp_path):
+    (tmp_path / 'labels').mkdir()
+    path = write_label(tmp_path / 'labels' / 'a.txt', ['0 0.5 0.5 0.2 0.2', '1 0.1 0.1 0.1 0.1'])
+    splits = {'': (str(tmp_path / 'images'), str(tmp_path / 'labels'))}
+    # A plain rename leaves the files alone
+    assert rename_class_in_labels(splits, 0, 'kitten', ['kitten', 'dog'])['changed_files'] == 0
+    # Renaming to the name of another class moves its annotations to that id
+    rename_class_in_labels(splits, 0, 'dog', ['cat', 'dog'])
+    assert read_label(path) == ['1 0.5 0.5 0.2 0.2', '1 0.1 0.1 0.1 0.1']
+
+def test_remap_class_names_prefers_merge_target():
+    mapping = merge_mapping(3, [0], 2)
+    assert remap_class_names(['cat', 'dog', 'bird'], mapping) == ['dog', 'cat']
+    assert remap_class_names(['cat', 'dog', 'bird'], mapping, [2]) == ['dog', 'bird']
+
+def test_remap_in_worker_processes(tmp_path):
+    paths = [write_label(tmp_path / f'{i}.txt', [f'{i % 3} 0.5 0.5 0.2 0.2']) for i in range(6)]
+    report = remap_classes_in_label_files(paths, [2, 1, 0], max_workers=2, use_processes=True)
+    assert report['changed_files'] == 4
+    assert read_label(paths[3]) == ['2 0.5 0.5 0.2 0.2']
+
+def test_list_label_files_covers_every_split(tmp_path):
+    for split in ('train', 'val'):
+        (tmp_path / 'labels' / split).mkdir(parents=True)
+        write_label(tmp_path / 'labels' / split / 'a.txt', [])
+    (tmp_path / 'labels' / 'train' / 'notes.md').write_text('')
+    splits = {split: (str(tmp_path / 'images' / split), str(tmp_path / 'labels' / split)) for split in ('train', 'val', 'test')}
+    assert sorted(list_label_files(splits)) == [str(tmp_path / 'labels' / 'train' / 'a.txt'), str(tmp_path / 'labels' / 'val' / 'a.txt')]
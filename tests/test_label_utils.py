@@ -0,0 +1,99 @@
+import numpy as np
+from utils.label_utils import parse_label_lines, parse_label_batch, format_label_line, split_label_lines
+from utils.file_utils import iter_label_texts
+
+BOX_FILE = '0 0.5 0.5 0.2 0.2\n1 0.25 0.25 0.1 0.1\n'
+POLYGON_FILE = '2 0.1 0.1 0.3 0.1 0.3 0.3\n0 0.5 0.5 0.2 0.2\n'
+BAD_FILE = 'not a label\n1 0.5 0.5\n\n3 0.4 0.4 0.1 0.1\n'
+
+def split_batch(batch):
+    # Per-file (class_ids, boxes, seg_lengths, seg_coords, invalid) of a parse_label_batch result
+    counts, class_ids, boxes, seg_lengths, seg_coords, invalid = batch
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    seg_offsets = np.concatenate(([0], np.cumsum(seg_lengths)))
+    files = []
+    for i in range(len(counts)):
+        start, end = offsets[i], offsets[i + 1]
+        coords = seg_coords[seg_offsets[start]:seg_offsets[end]]
+        files.append((class_ids[start:end].tolist(), boxes[start:end], seg_lengths[start:end].tolist(), coords, int(invalid[i])))
+    return files
+
+def assert_matches_lines(texts):
+    # The batch parser must agree with parsing each file line by line
+    files = split_batch(parse_label_batch(texts))
+    assert len(files) == len(texts)
+    for text, (class_ids, boxes, seg_lengths, seg_coords, invalid) in zip(texts, files):
+        expected = parse_label_lines(text.splitlines())
+        assert class_ids == expected[0]
+        # The line parser leaves polygon boxes at zero; the batch fills in their bounding boxes
+        box_rows = np.array(expected[2]) == 0
+        assert np.allclose(boxes[box_rows], np.array(expected[1], dtype=np.float32).reshape(-1, 4)[box_rows])
+        assert np.all(boxes[~box_rows, 2:] > 0)
+        assert seg_lengths == expected[2]
+        assert np.allclose(seg_coords, expected[3])
+        assert invalid == expected[4]
+
+def test_parse_label_lines():
+    class_ids, boxes, seg_lengths, seg_coords, invalid = parse_label_lines(BAD_FILE.splitlines() + POLYGON_FILE.splitlines())
+    assert class_ids == [3, 2, 0]
+    assert seg_lengths == [0, 6, 0]
+    assert seg_coords == [0.1, 0.1, 0.3, 0.1, 0.3, 0.3]
+    assert invalid == 2
+
+def test_fast_path_only():
+    counts, class_ids, boxes, seg_lengths, seg_coords, invalid = parse_label_batch([BOX_FILE, '', BOX_FILE])
+    assert counts.tolist() == [2, 0, 2]
+    assert class_ids.tolist() == [0, 1, 0, 1]
+    assert boxes.shape == (4, 4)
+    assert not seg_lengths.any()
+    assert len(seg_coords) == 0
+    assert not invalid.any()
+
+def test_mixed_fast_and_slow_files():
+    assert_matches_lines([BOX_FILE, POLYGON_FILE, '', BAD_FILE, BOX_FILE])
+
+def test_non_numeric_tokens_fall_back():
+    # A bad token in a 5-token line sends every file of the batch to the line parser
+    assert_matches_lines([BOX_FILE, '0 0.5 0.5 0.2 x\n1 0.1 0.1 0.1 0.1\n', BOX_FILE])
+
+def test_non_integer_class_ids_are_invalid():
+    assert_matches_lines(['1.5 0.5 0.5 0.2 0.2\n0 0.1 0.1 0.1 0.1\n', BOX_FILE])
+    _, class_ids, _, _, _, invalid = parse_label_batch(['1.5 0.5 0.5 0.2 0.2\n0 0.1 0.1 0.1 0.1\n'])
+    assert class_ids.tolist() == [0]
+    assert invalid.tolist() == [1]
+    # Whole-valued floats are rejected too, as int() rejects them line by line
+    assert_matches_lines(['1.0 0.5 0.5 0.2 0.2\n', BOX_FILE])
+    _, class_ids, _, _, _, invalid = parse_label_batch(['1.0 0.5 0.5 0.2 0.2\n0 0.1 0.1 0.1 0.1\n'])
+    assert class_ids.tolist() == [0]
+    assert invalid.tolist() == [1]
+
+def test_empty_batch():
+    counts, class_ids, boxes, seg_lengths, seg_coords, invalid = parse_label_batch([])
+    assert len(counts) == len(class_ids) == len(seg_lengths) == len(invalid) == 0
+    assert boxes.shape == (0, 4)
+
+def test_format_label_line():
+    assert format_label_line(3, [0.5, 0.25, 0.1, 0.2]) == '3 0.500000 0.250000 0.100000 0.200000'
+    assert format_label_line(1, [0, 0, 0, 0], [0.1, 0.2, 0.3, 0.4, 0.5, 0.6]) == '1 0.100000 0.200000 0.300000 0.400000 0.500000 0.600000'
+
+def test_split_label_lines():
+    lines = ['0 0.5 0.5 0.2 0.2', 'not a label', '', '  ', '1 0.1 0.1 0.3 0.1 0.3 0.3\r', '2 0.5 0.5']
+    annotations, rejected = split_label_lines(lines)
+    # Kept as written, not reformatted
+    assert annotations == ['0 0.5 0.5 0.2 0.2', '1 0.1 0.1 0.3 0.1 0.3 0.3']
+    assert rejected == ['not a label', '2 0.5 0.5']
+    assert len(annotations) == len(parse_label_lines(lines)[0])
+
+def test_iter_label_texts(tmp_path):
+    images = [f'{i}.jpg' for i in range(7)]
+    label_files = {}
+    for i in range(0, 7, 2):
+        path = tmp_path / f'{i}.txt'
+        path.write_text(f'{i} 0.5 0.5 0.1 0.1\n')
+        label_files[str(i)] = str(path)
+    label_files['5'] = str(tmp_path / 'deleted.txt')  # Listed but gone: read as empty
+
+    batches = list(iter_label_texts(images, label_files, max_workers=2, batch_size=3))
+    assert [batch_images for batch_images, _ in batches] == [images[0:3], images[3:6], images[6:7]]
+    texts = [text for _, batch_texts in batches for text in batch_texts]
+    assert texts == [f'{i} 0.5 0.5 0.1 0.1\n' if i % 2 == 0 else '' for i in range(7)]
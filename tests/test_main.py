@@ -0,0 +1,23 @@
+from types import SimpleNamespace
+from main import YOLODatasetManager
+
+def make_manager():
+    # Skips __init__, which needs a display
+    calls = []
+    manager = object.__new__(YOLODatasetManager)
+    manager.scheduler = SimpleNamespace(shutdown=lambda: calls.append('shutdown'))
+    manager.thumbnail_cache = None
+    manager.root = SimpleNamespace(destroy=lambda: calls.append('destroy'))
+    return manager, calls
+
+def test_close_does_not_build_the_watcher():
+    manager, calls = make_manager()
+    manager.on_close()
+    assert 'watcher' not in manager.__dict__
+    assert calls == ['shutdown', 'destroy']
+
+def test_close_stops_a_built_watcher():
+    manager, calls = make_manager()
+    manager.watcher = SimpleNamespace(stop=lambda: calls.append('stop'))
+    manager.on_close()
+    assert calls == ['stop', 'shutdown', 'destroy']
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+import numpy as np
+from classes.AnnotationStore import AnnotationStore
+from classes.ImageMetrics import ImageMetrics
+from utils.metrics_utils import annotation_metrics, file_metrics, sort_order, range_mask
+
+LABELS = {
+    'a.jpg': ['0 0.5 0.5 0.2 0.5', '0 0.2 0.2 0.1 0.1', '1 0.7 0.7 0.4 0.4'],
+    'b.jpg': [],
+    'c.jpg': ['2 0.5 0.5 1.0 0.5'],
+}
+
+def test_annotation_metrics():
+    store = AnnotationStore().build(list(LABELS), LABELS)
+    metrics = annotation_metrics(store)
+    assert metrics['boxes'].tolist() == [3, 0, 1]
+    assert metrics['classes'].tolist() == [2, 0, 1]
+    assert np.allclose(metrics['min_area'][[0, 2]], [0.01, 0.5])
+    assert np.allclose(metrics['mean_area'][[0, 2]], [(0.1 + 0.01 + 0.16) / 3, 0.5])
+    # No boxes: unknown areas
+    assert np.isnan(metrics['min_area'][1]) and np.isnan(metrics['mean_area'][1])
+
+def test_annotation_metrics_empty_store():
+    metrics = annotation_metrics(AnnotationStore().build(['a.jpg'], {}))
+    assert metrics['boxes'].tolist() == [0]
+    assert np.isnan(metrics['min_area'][0])
+
+def test_file_metrics():
+    metrics = file_metrics([(2048, 400, 200), None, (1024, None, None)])
+    assert metrics['file_size'][[0, 2]].tolist() == [2, 1]
+    assert metrics['aspect'][0] == 2
+    assert metrics['megapixels'][0] == 0.08
+    assert np.isnan(metrics['aspect'][1]) and np.isnan(metrics['megapixels'][2])
+
+def test_sort_order_puts_unknown_values_last():
+    values = np.array([3, np.nan, 1, 2, np.nan])
+    assert sort_order(values).tolist() == [2, 3, 0, 1, 4]
+    assert sort_order(values, ascending=False).tolist() == [0, 3, 2, 1, 4]
+
+def test_range_mask():
+    values = np.array([1, 5, np.nan, 10])
+    assert range_mask(values).tolist() == [True, True, True, True]
+    assert range_mask(values, low=5).tolist() == [False, True, False, True]
+    assert range_mask(values, high=5).tolist() == [True, True, False, False]
+    assert range_mask(values, 2, 9).tolist() == [False, True, False, False]
+
+def test_image_metrics_follow_store_changes():
+    store = AnnotationStore().build(list(LABELS), LABELS)
+    metrics = ImageMetrics(SimpleNamespace(annotations=store, thumbnail_cache=None))
+    assert metrics.get('boxes').tolist() == [3, 0, 1]
+    store.set_labels(store.image_id('b.jpg'), ['1 0.5 0.5 0.1 0.1'])
+    assert metrics.get('boxes').tolist() == [3, 1, 1]
+    assert np.isnan(metrics.get('file_size')).all()
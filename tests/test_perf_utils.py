@@ -0,0 +1,74 @@
+import json
+import pytest
+from utils import perf_utils
+from utils.perf_utils import span, timed, record, summary, format_summary, export_json, export_chrome_trace, NULL_SPAN
+
+@pytest.fixture(autouse=True)
+def recorder():
+    perf_utils.reset()
+    yield
+    perf_utils.set_enabled(False)
+    perf_utils.reset()
+
+def test_disabled_records_nothing():
+    @timed('work')
+    def work(value):
+        return value + 1
+    assert work(1) == 2
+    assert span('stage') is NULL_SPAN
+    with span('stage'):
+        pass
+    assert summary() == {}
+
+def test_enabled_records_spans_and_calls():
+    perf_utils.set_enabled(True)
+    @timed('work')
+    def work():
+        raise ValueError
+    with pytest.raises(ValueError):
+        work()  # Failing calls are still timed
+    with span('stage'):
+        pass
+    with span('stage'):
+        pass
+    stats = summary()
+    assert stats['work']['count'] == 1
+    assert stats['stage']['count'] == 2
+
+def test_summary_percentiles():
+    for milliseconds in range(1, 101):
+        record('parse', 0, milliseconds / 1000)
+    record('save', 0, 1.0)
+    stats = summary()
+    assert list(stats) == ['parse', 'save']  # Slowest total first
+    parse = stats['parse']
+    assert parse['count'] == 100
+    assert parse['p50'] == pytest.approx(50.5)
+    assert parse['p95'] == pytest.approx(95.05)
+    assert parse['max'] == pytest.approx(100)
+    assert parse['total'] == pytest.approx(5050)
+    lines = format_summary(stats)
+    assert lines[1].split() == ['parse', '100', '50.50', '95.05', '100.00']
+
+def test_samples_are_bounded(monkeypatch):
+    monkeypatch.setattr(perf_utils, 'MAX_SAMPLES', 3)
+    for seconds in (5, 1, 1, 1):
+        record('stage', 0, seconds)
+    stats = summary()['stage']
+    # Percentiles cover the kept samples; the count and total cover every call
+    assert stats['max'] == pytest.approx(1000)
+    assert stats['count'] == 4
+    assert stats['total'] == pytest.approx(8000)
+
+def test_exports(tmp_path):
+    start = perf_utils.origin + 0.5
+    record('load.stat', start, start + 0.25)
+    export_json(str(tmp_path / 'summary.json'))
+    assert json.loads((tmp_path / 'summary.json').read_text())['load.stat']['count'] == 1
+
+    export_chrome_trace(str(tmp_path / 'trace.json'))
+    trace = json.loads((tmp_path / 'trace.json').read_text())
+    event, = trace['traceEvents']
+    assert event['name'] == 'load.stat' and event['ph'] == 'X'
+    assert event['ts'] == pytest.approx(500000)
+    assert event['dur'] == pytest.approx(250000)
@@ -0,0 +1,81 @@
+import numpy as np
+from PIL import Image
+from classes.AnnotationStore import AnnotationStore
+from utils.polygon_utils import (offsets_from_lengths, vertex_counts, polygon_bounds, polygon_boxes, polygon_areas, scale_polygons,
+                                 polygon_stats)
+from utils.metrics_utils import annotation_metrics
+from utils.stats_utils import summarize_polygons
+from utils.image_utils import mask_overlay, class_color, render_preview
+
+# A square, a triangle and a concave L shape as flat x, y lists
+SQUARE = [0.1, 0.1, 0.5, 0.1, 0.5, 0.5, 0.1, 0.5]
+TRIANGLE = [0.0, 0.0, 0.4, 0.0, 0.0, 0.2]
+L_SHAPE = [0, 0, 2, 0, 2, 1, 1, 1, 1, 2, 0, 2]
+
+def flat(*polygons):
+    return offsets_from_lengths([len(polygon) for polygon in polygons]), np.concatenate([np.asarray(polygon, dtype=np.float64) for polygon in polygons])
+
+def test_bounds_and_boxes():
+    offsets, coords = flat(SQUARE, TRIANGLE)
+    assert vertex_counts(offsets).tolist() == [4, 3]
+    assert np.allclose(polygon_bounds(offsets, coords), [[0.1, 0.1, 0.5, 0.5], [0, 0, 0.4, 0.2]])
+    assert np.allclose(polygon_boxes(offsets, coords), [[0.3, 0.3, 0.4, 0.4], [0.2, 0.1, 0.4, 0.2]])
+    assert polygon_bounds(np.zeros(1, dtype=np.int64), np.zeros(0)).shape == (0, 4)
+
+def test_areas():
+    offsets, coords = flat(SQUARE, TRIANGLE, L_SHAPE, SQUARE[::-1])
+    # Winding order does not matter, concave shapes are handled
+    assert np.allclose(polygon_areas(offsets, coords), [0.16, 0.04, 3, 0.16])
+    assert len(polygon_areas(np.zeros(1, dtype=np.int64), np.zeros(0))) == 0
+
+def test_scale_polygons():
+    offsets, coords = flat(SQUARE, TRIANGLE)
+    square, triangle = scale_polygons(offsets, coords, (100, 200), (5, 0))
+    assert square.tolist() == [15, 20, 55, 20, 55, 100, 15, 100]
+    assert triangle.tolist() == [5, 0, 45, 0, 5, 40]
+
+def test_store_polygon_figures():
+    labels = {
+        'a.jpg': ['0 ' + ' '.join(map(str, SQUARE)), '1 0.5 0.5 0.2 0.2'],
+        'b.jpg': ['1 0.5 0.5 0.2 0.2'],
+        'c.jpg': ['2 ' + ' '.join(map(str, TRIANGLE)), '2 ' + ' '.join(map(str, SQUARE))],
+    }
+    store = AnnotationStore().build(list(labels), labels)
+    rows, image_ids, vertices, areas = polygon_stats(store)
+    assert rows.tolist() == [0, 3, 4]
+    assert image_ids.tolist() == [0, 2, 2]
+    assert vertices.tolist() == [4, 3, 4]
+    assert np.allclose(areas, [0.16, 0.04, 0.16])
+    # Polygon rows carry their bounding box like plain boxes do
+    assert np.allclose(store.boxes[0], [0.3, 0.3, 0.4, 0.4])
+
+    metrics = annotation_metrics(store)
+    assert metrics['polygons'].tolist() == [1, 0, 2]
+    assert metrics['vertices'].tolist() == [4, 0, 4]
+    assert np.allclose(metrics['mask_area'][[0, 2]], [0.16, 0.2])
+    assert np.isnan(metrics['mask_area'][1])
+
+    summary = summarize_polygons(store)
+    assert summary['count'] == 3 and summary['max_vertices'] == 4
+    assert abs(summary['min_area'] - 0.04) < 1e-6
+    assert summarize_polygons(AnnotationStore().build(['a.jpg'], {}))['count'] == 0
+
+def test_mask_overlay():
+    offsets, coords = flat(SQUARE)
+    overlay = mask_overlay((100, 100), scale_polygons(offsets, coords, (100, 100)), [3])
+    assert overlay.mode == 'RGBA'
+    assert overlay.getpixel((30, 30))[:3] == class_color(3)
+    assert overlay.getpixel((80, 80)) == (0, 0, 0, 0)
+    assert class_color(0) != class_color(1)
+
+def test_render_preview_draws_polygons():
+    img = Image.new('RGB', (50, 50), (0, 0, 0))
+    segments = (np.array([8, 0]), np.array(SQUARE, dtype=np.float32))
+    class_ids = np.array([0, 0])
+    boxes = np.array([[0.3, 0.3, 0.4, 0.4], [0.8, 0.8, 0.1, 0.1]], dtype=np.float32)
+    preview = render_preview(img, class_ids, boxes, ['cat'], size=(100, 100), segments=segments, show_masks=True)
+    assert preview.size == (100, 100)
+    assert preview.getpixel((30, 30)) != (0, 0, 0)  # Filled mask
+    assert preview.getpixel((5, 50)) == (0, 0, 0)
+    assert preview.getpixel((10, 50)) == (255, 0, 0)  # Polygon outline
+    assert img.getpixel((30, 30)) == (0, 0, 0)  # Source image untouched
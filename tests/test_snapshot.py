@@ -0,0 +1,118 @@
+import os
+import numpy as np
+from classes.AnnotationStore import AnnotationStore
+from classes.DatasetSnapshot import DatasetSnapshot, STORE_ARRAYS
+from classes.DatasetLoader import DatasetLoader
+
+CLASSES = ['cat', 'dog', 'bird']
+
+class RecordingTask:
+    cancelled = False
+
+    def __init__(self):
+        self.posts = []
+
+    def post(self, callback, *args, key=None):
+        self.posts.append((callback, args))
+
+def write_labels(labels_dir, labels):
+    label_files = {}
+    for image, lines in labels.items():
+        path = os.path.join(labels_dir, os.path.splitext(image)[0] + '.txt')
+        with open(path, 'w') as file:
+            file.write(''.join(line + '\n' for line in lines))
+        label_files[os.path.splitext(image)[0]] = path
+    return label_files
+
+def label_stats(images, label_files):
+    stats = [os.stat(label_files[os.path.splitext(image)[0]]) for image in images]
+    return np.array([stat.st_mtime_ns for stat in stats], dtype=np.int64), np.array([stat.st_size for stat in stats], dtype=np.int64)
+
+def image_labels(store):
+    return {name: store.label_lines(store.image_id(name)) for name in store.names if name is not None}
+
+def test_save_and_load(tmp_path):
+    labels = {'a.jpg': ['0 0.5 0.5 0.2 0.2', 'bad'], 'b.jpg': ['2 0.1 0.1 0.3 0.1 0.3 0.3'], 'c.jpg': []}
+    store = AnnotationStore().build(list(labels), labels)
+    snapshot = DatasetSnapshot(str(tmp_path))
+    snapshot.save(store, CLASSES, [1, 2, 3], [10, 20, 30])
+
+    loaded, classes, mtimes, sizes = snapshot.load()
+    assert classes == CLASSES
+    assert mtimes.tolist() == [1, 2, 3]
+    assert sizes.tolist() == [10, 20, 30]
+    assert loaded.names == store.names
+    assert loaded.invalid_counts.tolist() == [1, 0, 0]
+    assert image_labels(loaded) == image_labels(store)
+    assert loaded.images_with_class(2) == ['b.jpg']
+
+def test_load_without_snapshot(tmp_path):
+    assert DatasetSnapshot(str(tmp_path)).load() is None
+
+def test_interrupted_save_is_ignored(tmp_path):
+    store = AnnotationStore().build(['a.jpg'], {'a.jpg': ['0 0.5 0.5 0.2 0.2']})
+    snapshot = DatasetSnapshot(str(tmp_path))
+    snapshot.save(store, CLASSES, [1], [10])
+    os.remove(os.path.join(snapshot.snapshot_dir, 'meta.json'))
+    assert snapshot.load() is None
+
+def test_reopen_reparses_only_changed_files(tmp_path):
+    labels_dir = tmp_path / 'labels'
+    labels_dir.mkdir()
+    labels = {
+        'a.jpg': ['0 0.5 0.5 0.2 0.2'],
+        'b.jpg': ['1 0.5 0.5 0.2 0.2', '1 0.2 0.2 0.1 0.1'],
+        'c.jpg': ['2 0.1 0.1 0.3 0.1 0.3 0.3'],
+    }
+    label_files = write_labels(str(labels_dir), labels)
+    images = list(labels)
+    store = AnnotationStore().build(images, labels)
+    snapshot = DatasetSnapshot(str(tmp_path / 'cache'))
+    snapshot.save(store, CLASSES, *label_stats(images, label_files))
+
+    # c.jpg is deleted, b.jpg edited and d.jpg added since the snapshot
+    del labels['c.jpg']
+    os.remove(label_files.pop('c'))
+    labels['b.jpg'] = ['2 0.5 0.5 0.2 0.2']
+    labels['d.jpg'] = ['0 0.3 0.3 0.1 0.1', 'bad']
+    label_files.update(write_labels(str(labels_dir), {image: labels[image] for image in ('b.jpg', 'd.jpg')}))
+    images = list(labels)
+
+    loader = DatasetLoader(None)
+    task = RecordingTask()
+    reopened, changed = loader.load_labels_from_snapshot(task, snapshot, images, label_files, *label_stats(images, label_files))
+    assert changed
+    assert sorted(name for name in reopened.names if name is not None) == sorted(images)
+    assert image_labels(reopened) == image_labels(AnnotationStore().build(images, labels))
+    assert reopened.invalid_counts[reopened.ids['d.jpg']] == 1
+    assert reopened.images_with_class(1) == []
+    assert sorted(reopened.images_with_class(0)) == ['a.jpg', 'd.jpg']
+
+def test_reopen_unchanged(tmp_path):
+    labels_dir = tmp_path / 'labels'
+    labels_dir.mkdir()
+    labels = {'a.jpg': ['0 0.5 0.5 0.2 0.2'], 'b.jpg': ['1 0.5 0.5 0.2 0.2']}
+    label_files = write_labels(str(labels_dir), labels)
+    images = list(labels)
+    stats = label_stats(images, label_files)
+    snapshot = DatasetSnapshot(str(tmp_path / 'cache'))
+    snapshot.save(AnnotationStore().build(images, labels), CLASSES, *stats)
+
+    reopened, changed = DatasetLoader(None).load_labels_from_snapshot(RecordingTask(), snapshot, images, label_files, *stats)
+    assert not changed
+    assert image_labels(reopened) == image_labels(AnnotationStore().build(images, labels))
+
+def test_save_over_a_loaded_snapshot(tmp_path):
+    labels = {'a.jpg': ['0 0.5 0.5 0.2 0.2'], 'b.jpg': ['1 0.1 0.1 0.3 0.1 0.3 0.3']}
+    snapshot = DatasetSnapshot(str(tmp_path))
+    snapshot.save(AnnotationStore().build(list(labels), labels), CLASSES, [1, 2], [10, 20])
+    store, _, _, _ = snapshot.load()
+    assert isinstance(store.class_ids, np.memmap)
+
+    # Saving releases the maps of the files it replaces
+    store.set_labels(store.image_id('a.jpg'), ['2 0.5 0.5 0.2 0.2'])
+    snapshot.save(store, CLASSES, [3, 2], [11, 20])
+    assert not any(isinstance(getattr(store, name), np.memmap) for name in STORE_ARRAYS)
+    reloaded, _, mtimes, _ = snapshot.load()
+    assert mtimes.tolist() == [3, 2]
+    assert image_labels(reloaded) == image_labels(store)
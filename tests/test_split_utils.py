@@ -0,0 +1,50 @@
+import os
+from utils.split_utils import (labels_dir_for, resolve_splits, split_of, file_name_of, image_key, get_image_path, get_label_path,
+                               split_indices, stat_splits)
+
+def test_image_keys():
+    assert image_key('train', 'a.jpg') == 'train/a.jpg'
+    assert image_key('', 'a.jpg') == 'a.jpg'
+    assert split_of('train/a.jpg') == 'train' and file_name_of('train/a.jpg') == 'a.jpg'
+    assert split_of('a.jpg') == '' and file_name_of('a.jpg') == 'a.jpg'
+
+def test_labels_dir_for():
+    assert labels_dir_for(os.path.join('data', 'images', 'train')) == os.path.join('data', 'labels', 'train')
+    # Only the last 'images' component is replaced
+    assert labels_dir_for(os.path.join('images', 'x', 'images')) == os.path.join('images', 'x', 'labels')
+    assert labels_dir_for(os.path.join('data', 'train')) == os.path.join('data', 'train', 'labels')
+
+def test_resolve_splits(tmp_path):
+    for split in ('train', 'val'):
+        (tmp_path / 'root' / 'images' / split).mkdir(parents=True)
+    data = {'path': 'root', 'train': 'images/train', 'val': ['images/val', 'images/train'], 'test': 'images/missing'}
+    splits = resolve_splits(str(tmp_path), data)
+    root = tmp_path / 'root'
+    # A directory shared by two splits is loaded once; missing directories are skipped
+    assert splits == {
+        'train': (str(root / 'images' / 'train'), str(root / 'labels' / 'train')),
+        'val': (str(root / 'images' / 'val'), str(root / 'labels' / 'val')),
+    }
+
+def test_resolve_splits_falls_back_to_flat_layout(tmp_path):
+    splits = resolve_splits(str(tmp_path), {'names': ['cat']})
+    assert splits == {'': (os.path.join(str(tmp_path), 'images'), os.path.join(str(tmp_path), 'labels'))}
+
+def test_paths_and_indices():
+    splits = {'train': ('ds/images/train', 'ds/labels/train'), 'val': ('ds/images/val', 'ds/labels/val')}
+    assert get_image_path(splits, 'val/a.jpg') == os.path.join('ds/images/val', 'a.jpg')
+    assert get_label_path(splits, 'train/b.c.png') == os.path.join('ds/labels/train', 'b.c.txt')
+    assert split_indices(['val/a.jpg', None, 'train/b.jpg', 'test/c.jpg'], ['train', 'val']).tolist() == [1, -1, 0, -1]
+
+def test_stat_splits(tmp_path):
+    for split in ('train', 'val'):
+        (tmp_path / 'images' / split).mkdir(parents=True)
+        (tmp_path / 'labels' / split).mkdir(parents=True)
+        (tmp_path / 'images' / split / 'a.jpg').write_bytes(b'')
+    (tmp_path / 'images' / 'train' / 'notes.md').write_text('')
+    (tmp_path / 'labels' / 'val' / 'a.txt').write_text('0 0.5 0.5 0.1 0.1\n')
+    splits = {split: (str(tmp_path / 'images' / split), str(tmp_path / 'labels' / split)) for split in ('train', 'val')}
+    image_stats, label_stats, label_files = stat_splits(splits)
+    assert sorted(image_stats) == ['train/a.jpg', 'val/a.jpg']
+    assert list(label_stats) == ['val/a']
+    assert label_files == {'val/a': str(tmp_path / 'labels' / 'val' / 'a.txt')}
@@ -0,0 +1,132 @@
+from types import SimpleNamespace
+import numpy as np
+from classes.AnnotationStore import AnnotationStore
+from classes.StatsManager import StatsManager
+
+CLASSES = ['cat', 'dog', 'bird']
+LABELS = {
+    'a.jpg': ['0 0.5 0.5 0.2 0.2', '1 0.25 0.25 0.1 0.1'],
+    'b.jpg': ['2 0.1 0.1 0.3 0.1 0.3 0.3'],
+    'c.jpg': [],
+    'd.jpg': ['1 0.6 0.6 0.1 0.1', '1 0.7 0.7 0.1 0.1', '7 0.4 0.4 0.2 0.2'],
+}
+
+def make_stats(labels=LABELS, splits=None):
+    manager = SimpleNamespace(annotations=AnnotationStore().build(list(labels), labels), classes=list(CLASSES), splits=splits or {}, stats_text=None)
+    stats = StatsManager(manager)
+    stats.refresh_display = lambda: None  # No Tk text widget here
+    stats.update_stats()
+    return stats
+
+def aggregates(stats):
+    return (np.asarray(stats.class_counts).tolist(), np.asarray(stats.total_images).tolist(), np.asarray(stats.total_bboxes).tolist(),
+            np.asarray(stats.bbox_sq_sum).tolist(), np.asarray(stats.empty_images).tolist())
+
+def recomputed(stats):
+    fresh = StatsManager(stats.manager)
+    fresh.refresh_display = lambda: None
+    fresh.update_stats()
+    return aggregates(fresh)
+
+def test_update_stats():
+    stats = make_stats()
+    class_counts, total_images, total_bboxes, bbox_sq_sum, empty_images = aggregates(stats)
+    # Class 7 is unknown and not counted per class, but still counts as a box
+    assert np.ravel(class_counts).tolist() == [1, 3, 1]
+    assert np.sum(total_images) == 4
+    assert np.sum(total_bboxes) == 6
+    assert np.sum(bbox_sq_sum) == 4 + 1 + 0 + 9
+    assert np.sum(empty_images) == 1
+
+def test_image_changed_matches_recompute():
+    stats = make_stats()
+    store = stats.manager.annotations
+    image_id = store.image_id('a.jpg')
+    old_class_ids = store.class_ids[store.rows(image_id)].copy()
+    store.set_labels(image_id, ['2 0.5 0.5 0.2 0.2', '2 0.1 0.1 0.1 0.1', '2 0.3 0.3 0.1 0.1'])
+    stats.image_changed(old_class_ids, store.class_ids[store.rows(image_id)])
+    assert aggregates(stats) == recomputed(stats)
+
+def test_added_and_removed_images_match_recompute():
+    stats = make_stats()
+    store = stats.manager.annotations
+    image_id = store.add_image('e.jpg', ['1 0.5 0.5 0.2 0.2'])
+    stats.image_changed([], store.class_ids[store.rows(image_id)], was_present=False)
+    old_class_ids = store.class_ids[store.rows(store.image_id('d.jpg'))].copy()
+    store.remove_image('d.jpg')
+    stats.image_changed(old_class_ids, [], is_present=False)
+    store.add_image('f.jpg')
+    stats.image_changed([], [], was_present=False)
+    assert aggregates(stats) == recomputed(stats)
+
+def test_format_lines():
+    lines = make_stats().format_lines()
+    assert "Total Images: 4" in lines
+    assert "Total BBoxes: 6" in lines
+    assert "Average BBoxes per Image: 1.50" in lines
+    assert "Percentage of Images with No BBoxes: 25.00%" in lines
+    # Classes are listed largest first
+    class_lines = [line for line in lines if ' : ' in line]
+    assert [line.split()[0] for line in class_lines] == ['dog', 'cat', 'bird']
+
+def test_add_batch_matches_update_stats():
+    stats = make_stats()
+    store = stats.manager.annotations
+    streamed = StatsManager(stats.manager)
+    streamed.refresh_display = lambda: None
+    streamed.reset()
+    for first, end in ((0, 1), (1, 4)):
+        rows = slice(int(store.image_offsets[first]), int(store.image_offsets[end]))
+        streamed.add_batch(np.diff(store.image_offsets[first:end + 1]), store.class_ids[rows], np.zeros(end - first, dtype=np.int64))
+    assert aggregates(streamed) == aggregates(stats)
+
+SPLIT_LABELS = {
+    'train/a.jpg': ['0 0.5 0.5 0.2 0.2', '1 0.25 0.25 0.1 0.1'],
+    'train/b.jpg': [],
+    'val/c.jpg': ['1 0.6 0.6 0.1 0.1'],
+    'val/d.jpg': ['1 0.7 0.7 0.1 0.1', '2 0.4 0.4 0.2 0.2'],
+}
+
+def test_split_aggregates():
+    stats = make_stats(SPLIT_LABELS, {'train': ('images/train', 'labels/train'), 'val': ('images/val', 'labels/val')})
+    assert stats.split_names == ['train', 'val']
+    assert stats.total_images.tolist() == [2, 2]
+    assert stats.total_bboxes.tolist() == [2, 3]
+    assert stats.class_counts.tolist() == [[1, 1, 0], [0, 2, 1]]
+    lines = stats.format_lines()
+    assert "Images per Split:" in lines
+    assert [line for line in lines if line.startswith('dog ')][0].endswith("train  50.00% | val  66.67%")
+
+def test_split_image_changed_matches_recompute():
+    stats = make_stats(SPLIT_LABELS, {'train': ('images/train', 'labels/train'), 'val': ('images/val', 'labels/val')})
+    store = stats.manager.annotations
+    image_id = store.image_id('val/c.jpg')
+    old_class_ids = store.class_ids[store.rows(image_id)].copy()
+    store.set_labels(image_id, [])
+    stats.image_changed(old_class_ids, [], split=stats.split_index('val/c.jpg'))
+    assert aggregates(stats) == recomputed(stats)
+    assert stats.empty_images.tolist() == [1, 1]
+
+class FakeText:
+    def __init__(self):
+        self.text = ''
+
+    def config(self, **kwargs):
+        pass
+
+    def delete(self, start, end):
+        self.text = ''
+
+    def insert(self, index, text):
+        self.text += text
+
+def test_redraw_leaves_unbuilt_chart_alone():
+    stats = make_stats()
+    stats.manager.stats_text = FakeText()
+    stats.redraw()
+    assert 'class_chart' not in stats.manager.__dict__
+    refreshed = []
+    stats.manager.class_chart = SimpleNamespace(refresh=lambda: refreshed.append(True))
+    stats.lines = []
+    stats.redraw()
+    assert refreshed == [True]
@@ -0,0 +1,85 @@
+import threading
+from classes.TaskScheduler import TaskScheduler
+
+class FakeRoot:
+    # Stands in for the Tk root: after() calls are recorded, not scheduled
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, delay, callback, *args):
+        self.scheduled.append((delay, callback, args))
+
+def make_scheduler(**kwargs):
+    return TaskScheduler(FakeRoot(), **kwargs)
+
+def run_job(scheduler, job, *args, **kwargs):
+    task = scheduler.submit(job, *args, **kwargs)
+    task.future.result(timeout=5)
+    scheduler.drain()
+    return task
+
+def test_results_run_on_drain():
+    scheduler = make_scheduler()
+    calls = []
+    def job(task, value):
+        task.post(calls.append, ('progress', value))
+        return value * 2
+    task = scheduler.submit(job, 21, on_done=lambda result: calls.append(('done', result)))
+    task.future.result(timeout=5)
+    assert calls == []  # Nothing runs on the worker thread
+    scheduler.drain()
+    assert calls == [('progress', 21), ('done', 42)]
+    scheduler.shutdown()
+
+def test_keyed_posts_are_coalesced():
+    scheduler = make_scheduler()
+    calls = []
+    def job(task):
+        for i in range(5):
+            task.post(calls.append, i, key='progress')
+        task.post(calls.append, 'other')
+    run_job(scheduler, job)
+    assert calls == [4, 'other']
+    scheduler.shutdown()
+
+def test_new_job_with_same_key_cancels_the_old_one():
+    scheduler = make_scheduler()
+    calls = []
+    started, release = threading.Event(), threading.Event()
+    def slow_job(task):
+        started.set()
+        release.wait(5)
+        task.post(calls.append, 'old')
+        return 'old'
+    old = scheduler.submit(slow_job, key='load', on_done=calls.append)
+    started.wait(5)
+    new = scheduler.submit(lambda task: 'new', key='load', on_done=calls.append)
+    assert old.cancelled and not new.cancelled
+    release.set()
+    old.future.result(timeout=5)
+    new.future.result(timeout=5)
+    scheduler.drain()
+    # Posts of the cancelled job are dropped
+    assert calls == ['new']
+    assert scheduler.tasks == {}
+    scheduler.shutdown()
+
+def test_errors_reach_the_handler():
+    errors = []
+    scheduler = make_scheduler(on_error=lambda error: errors.append(('default', str(error))))
+    def failing(task):
+        raise ValueError('broken')
+    run_job(scheduler, failing, on_error=lambda error: errors.append(('own', str(error))))
+    run_job(scheduler, failing)
+    assert errors == [('own', 'broken'), ('default', 'broken')]
+    scheduler.shutdown()
+
+def test_drain_reschedules_itself():
+    scheduler = make_scheduler()
+    root = scheduler.root
+    scheduler.drain()
+    assert root.scheduled[-1][1] == scheduler.drain
+    scheduler.call_soon(lambda: None)
+    scheduler.drain()
+    assert root.scheduled[-1][0] < root.scheduled[-2][0]  # Busy frames drain sooner than idle ones
+    scheduler.shutdown()
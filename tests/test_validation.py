@@ -0,0 +1,70 @@
+import numpy as np
+from classes.AnnotationStore import AnnotationStore
+from utils import validation_utils
+from utils.validation_utils import validate_store, find_unpaired_files, issue_counts, ISSUE_TYPES
+
+def issues(store, num_classes, **kwargs):
+    # Sorted (issue name, image, annotation index) triples of a report
+    report = validate_store(store, num_classes, **kwargs)
+    return sorted((ISSUE_TYPES[code], store.names[image_id], int(annotation)) for code, image_id, annotation in zip(report['issue'], report['image_id'], report['annotation']))
+
+def test_clean_dataset():
+    labels = {'a.jpg': ['0 0.5 0.5 0.2 0.2', '1 0.2 0.2 0.1 0.1'], 'b.jpg': [], 'c.jpg': ['1 0.1 0.1 0.3 0.1 0.3 0.3']}
+    store = AnnotationStore().build(list(labels), labels)
+    assert issues(store, 2) == []
+
+def test_issue_types():
+    labels = {
+        'a.jpg': ['0 0.5 0.5 0.2 0.2', 'bad line', '5 0.5 0.5 0.2 0.2'],
+        'b.jpg': ['0 0.5 0.5 0 0.2', '1 0.95 0.5 0.2 0.2'],
+        'c.jpg': ['0 0.5 0.5 0.2 0.2', '0 0.5 0.5 0.2 0.2', '0 0.501 0.5 0.2 0.2', '1 0.5 0.5 0.2 0.2'],
+    }
+    store = AnnotationStore().build(list(labels), labels)
+    assert issues(store, 2) == [
+        ('degenerate_box', 'b.jpg', 0),
+        ('duplicate_box', 'c.jpg', 1),
+        ('invalid_line', 'a.jpg', -1),
+        ('out_of_bounds', 'b.jpg', 1),
+        ('overlapping_box', 'c.jpg', 2),
+        ('unknown_class', 'a.jpg', 1),
+    ]
+
+def test_overlap_threshold():
+    labels = {'a.jpg': ['0 0.5 0.5 0.2 0.2', '0 0.52 0.5 0.2 0.2']}
+    store = AnnotationStore().build(list(labels), labels)
+    assert issues(store, 1) == []
+    assert issues(store, 1, iou_threshold=0.5) == [('overlapping_box', 'a.jpg', 1)]
+
+def test_chunks_and_removed_images(monkeypatch):
+    # Many small chunks and several workers find the same issues as one pass
+    rng = np.random.default_rng(0)
+    labels = {}
+    for i in range(200):
+        lines = [f"{rng.integers(0, 4)} {rng.uniform(0.2, 0.8):.3f} {rng.uniform(0.2, 0.8):.3f} 0.1 0.1" for _ in range(rng.integers(0, 6))]
+        if i % 7 == 0 and lines:
+            lines.append(lines[0])
+        labels[f'{i}.jpg'] = lines
+    store = AnnotationStore().build(list(labels), labels)
+    store.remove_images(['0.jpg', '7.jpg'])
+
+    expected = issues(store, 3, max_workers=1)
+    monkeypatch.setattr(validation_utils, 'CHUNK_ROWS', 5)
+    assert issues(store, 3, max_workers=4) == expected
+    assert any(issue == 'duplicate_box' for issue, _, _ in expected)
+    assert all(image not in ('0.jpg', '7.jpg') for _, image, _ in expected)
+
+def test_unpaired_files_and_counts():
+    images = ['train/a.jpg', 'train/b.png', 'val/c.jpg']
+    missing, orphans = find_unpaired_files(images, ['train/a', 'val/c', 'val/d'])
+    assert missing == ['train/b.png']
+    assert orphans == ['val/d']
+
+    store = AnnotationStore().build(['a.jpg'], {'a.jpg': ['0 0.5 0.5 0.2 0.2', '0 0.5 0.5 0.2 0.2', 'bad']})
+    report = validate_store(store, 1)
+    report['missing_labels'], report['orphan_labels'] = missing, orphans
+    counts = issue_counts(report)
+    assert counts['duplicate_box'] == 1
+    assert counts['invalid_line'] == 1
+    assert counts['missing_label'] == 1
+    assert counts['orphan_label'] == 1
+    assert sum(counts.values()) == 4
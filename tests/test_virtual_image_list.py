@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+from classes.VirtualImageList import VirtualImageList, PAGE_SIZE
+
+class FakeTree:
+    # Just enough of ttk.Treeview: ordered top-level items and a selection
+    def __init__(self):
+        self.items = []
+        self.texts = {}
+        self.selected = ()
+        self.idle = []
+
+    def configure(self, **kwargs):
+        pass
+
+    def get_children(self):
+        return tuple(self.items)
+
+    def insert(self, parent, index, iid, text=''):
+        assert iid not in self.texts
+        self.items.insert(len(self.items) if index == 'end' else index, iid)
+        self.texts[iid] = text
+
+    def delete(self, *iids):
+        for iid in iids:
+            self.items.remove(iid)
+            del self.texts[iid]
+        self.selected = tuple(iid for iid in self.selected if iid in self.texts)
+
+    def selection(self):
+        return self.selected
+
+    def selection_set(self, iid):
+        self.selected = (iid,)
+
+    def after_idle(self, callback):
+        self.idle.append(callback)
+
+def make_list(rows):
+    image_list = VirtualImageList(SimpleNamespace(image_listbox=FakeTree(), thumbnail_cache=None))
+    image_list.set_rows(rows)
+    return image_list
+
+def test_rename_shown_row():
+    image_list = make_list(['a.jpg', 'b.jpg', 'c.jpg'])
+    tree = image_list.tree
+    tree.selection_set('b.jpg')
+    image_list.with_icon.add('b.jpg')
+    image_list.rename('b.jpg', 'z.jpg')
+    assert image_list.rows == ['a.jpg', 'z.jpg', 'c.jpg']
+    assert image_list.position('z.jpg') == 1 and image_list.position('b.jpg') is None
+    assert tree.items == ['a.jpg', 'z.jpg', 'c.jpg']
+    assert tree.texts['z.jpg'] == 'z.jpg'
+    assert tree.selection() == ('z.jpg',)
+    # The new item has no icon yet
+    assert 'b.jpg' not in image_list.with_icon and 'z.jpg' not in image_list.with_icon
+    # Later list updates see the renamed row as already shown
+    image_list.update_rows(['z.jpg', 'c.jpg'])
+    assert tree.items == ['z.jpg', 'c.jpg']
+
+def test_rename_row_not_yet_inserted():
+    rows = [f'{i}.jpg' for i in range(PAGE_SIZE + 5)]
+    image_list = make_list(rows)
+    image_list.rename(rows[-1], 'z.jpg')
+    assert image_list.rows[-1] == 'z.jpg'
+    assert 'z.jpg' not in image_list.tree.texts
+    image_list.insert_page()
+    assert image_list.tree.items[-1] == 'z.jpg'
+
+def test_rename_unknown_row():
+    image_list = make_list(['a.jpg'])
+    image_list.rename('x.jpg', 'y.jpg')
+    assert image_list.rows == ['a.jpg']
+    assert image_list.tree.items == ['a.jpg']
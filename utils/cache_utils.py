@@ -0,0 +1,32 @@
+import os
+import hashlib
+import tempfile
+
+CACHE_ROOT_NAME = 'yolo_dataset_manager'
+
+def get_cache_dir(dataset_dir):
+    # One cache directory per dataset, under the user's cache directory
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    dataset_key = hashlib.sha1(os.path.abspath(dataset_dir).encode('utf-8')).hexdigest()[:16]
+    cache_dir = os.path.join(cache_home, CACHE_ROOT_NAME, dataset_key)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+    except OSError:
+        # No writable cache home; keep the cache for this session only
+        cache_dir = tempfile.mkdtemp(prefix=CACHE_ROOT_NAME + '-')
+    return cache_dir
+
+def stat_files(directory):
+    # A single scandir pass; DirEntry.stat() is served from the directory listing where the OS allows it
+    stats = {}
+    if not os.path.isdir(directory):
+        return stats
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file():
+                st = entry.stat()
+                stats[entry.name] = (st.st_mtime_ns, st.st_size)
+    return stats
+
+def thumbnail_key(image_name):
+    return 'images/' + image_name
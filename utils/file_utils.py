@@ -1,29 +1,66 @@
 import os
 import yaml
-from tkinter import messagebox
+from concurrent.futures import ThreadPoolExecutor
 
 def load_yaml(yaml_path):
+    return load_yaml_data(yaml_path)['names']
+
+def load_yaml_data(yaml_path):
     with open(yaml_path, 'r') as file:
-        data = yaml.safe_load(file)
-    return data['names']
+        return yaml.safe_load(file)
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+LABEL_BATCH_SIZE = 1024  # Label files read and parsed per streamed batch
+
+def scan_images(images_dir):
+    with os.scandir(images_dir) as entries:
+        return [entry.name for entry in entries if entry.name.endswith(IMAGE_EXTENSIONS)]
+
+def scan_label_files(labels_dir):
+    # One scandir pass replaces an os.path.exists call per image
+    with os.scandir(labels_dir) as entries:
+        return {entry.name[:-4]: entry.path for entry in entries if entry.name.endswith('.txt')}
+
+def read_text(path):
+    if path is None:
+        return ''
+    try:
+        with open(path, 'r') as file:
+            return file.read()
+    except OSError:
+        return ''
+
+def iter_label_texts(images, label_files, max_workers=None, batch_size=LABEL_BATCH_SIZE):
+    # Yields (images, texts) batches in image order while a thread pool keeps reading ahead
+    paths = [label_files.get(os.path.splitext(image)[0]) for image in images]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        texts = executor.map(read_text, paths)
+        for start in range(0, len(images), batch_size):
+            batch_images = images[start:start + batch_size]
+            yield batch_images, [next(texts) for _ in batch_images]
 
 def load_images_and_labels(images_dir, labels_dir):
     if not os.path.exists(images_dir) or not os.path.exists(labels_dir):
-        messagebox.showerror("Error", "Images or Labels directory not found.")
-        return [], {}, {}
+        raise FileNotFoundError("Images or Labels directory not found.")
 
-    images = [f for f in os.listdir(images_dir) if f.endswith(('.png', '.jpg', '.jpeg'))]
+    images = scan_images(images_dir)
+    label_files = scan_label_files(labels_dir)
     image_labels = {}
-    for image in images:
-        label_path = os.path.join(labels_dir, os.path.splitext(image)[0] + '.txt')
-        if os.path.exists(label_path):
-            with open(label_path, 'r') as f:
-                image_labels[image] = [line.strip() for line in f.readlines()]
-        else:
-            image_labels[image] = []
+    for batch_images, texts in iter_label_texts(images, label_files):
+        for image, text in zip(batch_images, texts):
+            image_labels[image] = [line.strip() for line in text.splitlines()]
 
     return images, image_labels
 
+def write_atomic(path, data, mode='w'):
+    # Write to a sibling temp file and rename it over the target, so a crash never leaves a truncated file
+    tmp_path = path + '.tmp'
+    with open(tmp_path, mode) as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
 def truncate_name(name, max_length):
     if len(name) > max_length:
         return name[:max_length-3] + '...'
@@ -36,42 +73,10 @@ def delete_files(image_paths, label_paths):
         if os.path.exists(label_path):
             os.remove(label_path)
 
-def rename_file(dataset_dir, old_image_name, new_image_name, image_labels):
-    old_img_path = os.path.join(dataset_dir, 'images', old_image_name)
-    new_img_path = os.path.join(dataset_dir, 'images', new_image_name)
+def rename_file(old_img_path, new_img_path, old_label_path, new_label_path):
     os.rename(old_img_path, new_img_path)
-
-    old_label_path = os.path.join(dataset_dir, 'labels', os.path.splitext(old_image_name)[0] + '.txt')
-    new_label_path = os.path.join(dataset_dir, 'labels', os.path.splitext(new_image_name)[0] + '.txt')
-    os.rename(old_label_path, new_label_path)
-
-    image_labels[new_image_name] = image_labels.pop(old_image_name)
-
-def rename_class_in_labels(dataset_dir, class_index, new_class_name, classes):
-    labels_dir = os.path.join(dataset_dir, 'labels')
-    for label_file in os.listdir(labels_dir):
-        label_path = os.path.join(labels_dir, label_file)
-        with open(label_path, 'r') as file:
-            lines = file.readlines()
-        with open(label_path, 'w') as file:
-            for line in lines:
-                parts = line.split()
-                if int(parts[0]) == class_index:
-                    parts[0] = str(classes.index(new_class_name))
-                file.write(' '.join(parts) + '\n')
-
-def merge_classes_in_labels(dataset_dir, old_class_index, new_class_index):
-    labels_dir = os.path.join(dataset_dir, 'labels')
-    for label_file in os.listdir(labels_dir):
-        label_path = os.path.join(labels_dir, label_file)
-        with open(label_path, 'r') as file:
-            lines = file.readlines()
-        with open(label_path, 'w') as file:
-            for line in lines:
-                parts = line.split()
-                if int(parts[0]) == old_class_index:
-                    parts[0] = str(new_class_index)
-                file.write(' '.join(parts) + '\n')
+    if os.path.exists(old_label_path):
+        os.rename(old_label_path, new_label_path)
 
 def update_yaml(yaml_path, classes):
     with open(yaml_path, 'r') as file:
@@ -0,0 +1,35 @@
+import re
+import fnmatch
+import numpy as np
+
+REGEX_PREFIX = 're:'
+GLOB_CHARS = '*?['
+
+def build_name_index(names):
+    # Lowercased names as one NumPy string array, so substring search runs vectorized
+    return np.array([name.lower() for name in names], dtype=np.str_)
+
+def parse_filter(query):
+    # Returns (kind, pattern): a plain substring, a glob matched against the whole name, or a
+    # regular expression after the 're:' prefix. Raises re.error for an invalid expression.
+    if query.startswith(REGEX_PREFIX):
+        return 'regex', re.compile(query[len(REGEX_PREFIX):], re.IGNORECASE)
+    if any(char in query for char in GLOB_CHARS):
+        return 'glob', re.compile(fnmatch.translate(query.lower()))
+    return 'substring', query.lower()
+
+def match_names(index, kind, pattern, candidates=None):
+    # Indices of the names matching the filter, in index order. candidates restricts the
+    # search to earlier matches, e.g. when a substring query has only grown longer.
+    if candidates is None:
+        candidates = np.arange(len(index))
+    if kind == 'substring':
+        if not pattern:
+            return candidates
+        return candidates[np.char.find(index[candidates], pattern) >= 0]
+    match = pattern.search if kind == 'regex' else pattern.match
+    return np.array([i for i in candidates if match(index[i])], dtype=np.int64)
+
+def narrows(previous, kind, pattern):
+    # Whether every match of (kind, pattern) is also a match of the previous filter
+    return previous is not None and previous[0] == kind == 'substring' and pattern.startswith(previous[1])
@@ -0,0 +1,50 @@
+import numpy as np
+
+HASH_BITS = 64
+MAX_HASH_DISTANCE = 4  # Hamming distance up to which two images count as near-duplicates
+
+def chunk_masks(max_distance):
+    # Splits the hash into max_distance + 1 bit ranges. By the pigeonhole principle, two hashes
+    # within max_distance bits of each other agree exactly on at least one of these ranges.
+    edges = np.linspace(0, HASH_BITS, max_distance + 2).astype(int)
+    return [(int(start), (1 << int(end - start)) - 1) for start, end in zip(edges[:-1], edges[1:])]
+
+def find_root(parent, node):
+    while parent[node] != node:
+        parent[node] = parent[parent[node]]
+        node = parent[node]
+    return node
+
+def find_duplicate_groups(hashes, max_distance=MAX_HASH_DISTANCE):
+    # Groups indices of `hashes` whose perceptual hashes are within max_distance bits, using a
+    # multi-index hash table: candidates must share one exact bit range, so only hashes in the
+    # same bucket of some range are ever compared. Returns lists of indices, largest groups first.
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    unique, inverse = np.unique(hashes, return_inverse=True)
+    parent = list(range(len(unique)))
+
+    for shift, mask in chunk_masks(max_distance):
+        keys = (unique >> np.uint64(shift)) & np.uint64(mask)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        active = np.arange(len(order))
+        offset = 1
+        while len(active):
+            # Compare every hash with the ones `offset` places after it in the same bucket
+            active = active[active + offset < len(order)]
+            active = active[sorted_keys[active] == sorted_keys[active + offset]]
+            first, second = order[active], order[active + offset]
+            close = np.bitwise_count(unique[first] ^ unique[second]) <= max_distance
+            for a, b in zip(first[close], second[close]):
+                root_a, root_b = find_root(parent, int(a)), find_root(parent, int(b))
+                if root_a != root_b:
+                    parent[root_b] = root_a
+            offset += 1
+
+    roots = np.array([find_root(parent, node) for node in range(len(unique))], dtype=np.int64)
+    labels = roots[inverse.ravel()] if len(unique) else np.zeros(0, dtype=np.int64)
+    order = np.argsort(labels, kind='stable')
+    boundaries = np.flatnonzero(np.diff(labels[order])) + 1
+    groups = [group.tolist() for group in np.split(order, boundaries) if len(group) > 1]
+    groups.sort(key=len, reverse=True)
+    return groups
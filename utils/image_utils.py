@@ -1,5 +1,12 @@
-from PIL import Image, ImageDraw, ImageTk
+import colorsys
+import numpy as np
+from PIL import Image, ImageDraw
+from utils.polygon_utils import offsets_from_lengths, polygon_bounds, scale_polygons
+from utils.perf_utils import timed
 
+MASK_ALPHA = 100  # Opacity of filled polygon masks, out of 255
+
+@timed('thumbnail.create')
 def create_thumbnail(img, size=(40, 40)):
     img.thumbnail(size, Image.LANCZOS)
     background = Image.new('RGBA', size, (255, 255, 255, 0))
@@ -8,6 +15,31 @@ def create_thumbnail(img, size=(40, 40)):
     background.paste(img, offset)
     return background
 
+def dhash(img):
+    # 64-bit difference hash: one bit per horizontally adjacent pixel pair of a 9x8 grayscale copy
+    pixels = np.asarray(img.convert('L').resize((9, 8), Image.BILINEAR), dtype=np.int16)
+    return int(np.packbits(pixels[:, 1:] > pixels[:, :-1]).view('>u8')[0])
+
+def decode_thumbnail(img_path, size=(40, 40)):
+    # Runs in a worker process, so it only returns plain bytes and ints that pickle cheaply.
+    # Returns (thumbnail bytes, perceptual hash, (width, height)), or Nones if the image can't be read.
+    try:
+        with Image.open(img_path) as img:
+            image_size = img.size  # Full resolution; draft() shrinks it
+            # JPEG draft mode lets libjpeg decode at 1/2, 1/4 or 1/8 scale
+            img.draft('RGB', (size[0] * 2, size[1] * 2))
+            if img.mode not in ('RGB', 'RGBA', 'L'):
+                img = img.convert('RGBA')
+            image_hash = dhash(img)  # Before create_thumbnail, which shrinks img in place
+            return create_thumbnail(img, size).tobytes(), image_hash, image_size
+    except (OSError, ValueError):
+        return None, None, None
+
+def thumbnail_from_bytes(data, size=(40, 40)):
+    if data is None:
+        return Image.new('RGBA', size, (255, 255, 255, 0))
+    return Image.frombytes('RGBA', size, data)
+
 def draw_bbox(draw, bbox, image_size, class_id, class_name):
     x_center, y_center, width, height = bbox
     img_width, img_height = image_size
@@ -21,14 +53,50 @@ def draw_bbox(draw, bbox, image_size, class_id, class_name):
         draw.rectangle([left, top, right, bottom], outline="red", width=2)
         draw.text((left, top), class_name, fill="red")
 
-def convert_polygon_to_bbox(polygon):
-    # Function to convert polygon points to bounding box coordinates
-    xs = polygon[::2]
-    ys = polygon[1::2]
-    x_min, x_max = min(xs), max(xs)
-    y_min, y_max = min(ys), max(ys)
-    x_center = (x_min + x_max) / 2
-    y_center = (y_min + y_max) / 2
-    width = x_max - x_min
-    height = y_max - y_min
-    return [x_center, y_center, width, height]
+def class_color(class_id):
+    # Distinct, stable RGB colour per class id; golden-ratio steps spread neighbouring ids apart
+    red, green, blue = colorsys.hsv_to_rgb((class_id * 0.618034) % 1.0, 0.75, 1.0)
+    return int(red * 255), int(green * 255), int(blue * 255)
+
+def mask_overlay(size, polygons, class_ids):
+    # One transparent RGBA image with every polygon filled in its class colour, to composite
+    # over the image in a single step. polygons are flat pixel coordinate arrays.
+    overlay = Image.new('RGBA', size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+    for points, class_id in zip(polygons, class_ids):
+        if len(points) >= 6:
+            draw.polygon(points.tolist(), fill=class_color(class_id) + (MASK_ALPHA,))
+    return overlay
+
+@timed('preview.render')
+def render_preview(img, class_ids, boxes, class_names, size=(400, 400), segments=None, show_masks=False):
+    # Boxes are drawn after resizing, so the source image (possibly shared through a cache) is never modified.
+    # segments is (seg_lengths per row, flat coords) as from AnnotationStore.image_segments; polygon
+    # rows are outlined instead of boxed, and filled with show_masks.
+    preview = img.convert('RGB') if img.mode != 'RGB' else img
+    preview = preview.resize(size, Image.LANCZOS, reducing_gap=2.0)
+    class_ids = np.asarray(class_ids)
+    known = (class_ids >= 0) & (class_ids < len(class_names))  # Skip labels with unknown classes
+    is_polygon = np.zeros(len(class_ids), dtype=bool)
+    if segments is not None:
+        seg_lengths, seg_coords = segments
+        is_polygon = np.asarray(seg_lengths) > 0
+    if is_polygon.any():
+        offsets = offsets_from_lengths(seg_lengths[is_polygon])
+        polygons = scale_polygons(offsets, seg_coords, size)
+        polygon_ids = class_ids[is_polygon]
+        shown = known[is_polygon]
+        if show_masks:
+            overlay = mask_overlay(size, [points for points, keep in zip(polygons, shown) if keep], polygon_ids[shown])
+            preview = Image.alpha_composite(preview.convert('RGBA'), overlay).convert('RGB')
+        draw = ImageDraw.Draw(preview)
+        corners = polygon_bounds(offsets, seg_coords)[:, :2] * size
+        for points, class_id, corner, keep in zip(polygons, polygon_ids, corners, shown):
+            if keep:
+                draw.polygon(points.tolist(), outline="red", width=2)
+                draw.text(tuple(corner), class_names[class_id], fill="red")
+    draw = ImageDraw.Draw(preview)
+    for class_id, bbox, polygon, keep in zip(class_ids, boxes, is_polygon, known):
+        if keep and not polygon:
+            draw_bbox(draw, bbox, size, class_id, class_names[class_id])
+    return preview
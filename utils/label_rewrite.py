@@ -0,0 +1,121 @@
+import os
+import time
+from itertools import repeat
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from utils.file_utils import write_atomic
+from utils.perf_utils import timed
+
+REMAP_CHUNKSIZE = 256  # Label files handed to a worker process per round trip
+
+# A class remap is a sequence where mapping[old_id] is the new id, or -1 to delete those
+# annotations. Ids outside the mapping, and lines that don't start with an integer, are kept.
+
+def merge_mapping(num_classes, merged_ids, target_id):
+    # Merge several classes into target_id, dropping the merged classes and compacting the ids
+    merged = set(merged_ids) - {target_id}
+    mapping = []
+    next_id = 0
+    for class_id in range(num_classes):
+        if class_id in merged:
+            mapping.append(-2)  # Resolved to the target's new id below
+        else:
+            mapping.append(next_id)
+            next_id += 1
+    return [mapping[target_id] if new_id == -2 else new_id for new_id in mapping]
+
+def delete_mapping(num_classes, class_id):
+    return [-1 if old_id == class_id else old_id - (old_id > class_id) for old_id in range(num_classes)]
+
+def remap_class_names(classes, mapping, preferred_ids=()):
+    # Where several classes map to one id, a preferred class (such as a merge target) keeps its name
+    new_classes = [None] * (max(mapping, default=-1) + 1)
+    for old_id in list(preferred_ids) + list(range(len(mapping))):
+        new_id = mapping[old_id]
+        if new_id >= 0 and new_classes[new_id] is None:
+            new_classes[new_id] = classes[old_id]
+    return new_classes
+
+def changed_class_ids(mapping):
+    return [old_id for old_id, new_id in enumerate(mapping) if new_id != old_id]
+
+@timed('rewrite.file')
+def remap_label_file(label_path, mapping):
+    # Returns the number of annotation lines changed or deleted; untouched files are not rewritten
+    if not os.path.exists(label_path):
+        return 0
+    with open(label_path, 'r') as file:
+        lines = file.read().splitlines()
+
+    changed = 0
+    new_lines = []
+    for line in lines:
+        parts = line.split(maxsplit=1)
+        if not parts:
+            continue  # Drop blank lines
+        try:
+            class_id = int(parts[0])
+        except ValueError:
+            new_lines.append(line)
+            continue
+        new_id = mapping[class_id] if 0 <= class_id < len(mapping) else class_id
+        if new_id == class_id:
+            new_lines.append(line)
+            continue
+        changed += 1
+        if new_id >= 0:
+            new_lines.append(f"{new_id} {parts[1]}" if len(parts) > 1 else str(new_id))
+
+    if changed:
+        write_atomic(label_path, ''.join(line + '\n' for line in new_lines))
+    return changed
+
+@timed('rewrite.total')
+def remap_classes_in_label_files(label_paths, mapping, max_workers=None, progress=None, use_processes=False):
+    # Rewrites label files on a thread pool, or a process pool for very large headless runs;
+    # progress(done, total) is called on the calling thread
+    label_paths = list(label_paths)
+    mapping = list(mapping)
+    start = time.perf_counter()
+    changed_files = 0
+    changed_lines = 0
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with executor_class(max_workers=max_workers) as executor:
+        results = executor.map(remap_label_file, label_paths, repeat(mapping), chunksize=REMAP_CHUNKSIZE)
+        for done, changed in enumerate(results, start=1):
+            changed_lines += changed
+            changed_files += changed > 0
+            if progress is not None:
+                progress(done, len(label_paths))
+
+    seconds = time.perf_counter() - start
+    return {
+        'files': len(label_paths),
+        'changed_files': changed_files,
+        'changed_lines': changed_lines,
+        'seconds': seconds,
+        'files_per_second': len(label_paths) / seconds if seconds > 0 else 0,
+    }
+
+def list_label_files(splits):
+    label_paths = []
+    for _, labels_dir in splits.values():
+        if os.path.isdir(labels_dir):
+            with os.scandir(labels_dir) as entries:
+                label_paths.extend(entry.path for entry in entries if entry.name.endswith('.txt') and entry.is_file())
+    return label_paths
+
+def rename_class_in_labels(splits, class_index, new_class_name, classes, label_paths=None, progress=None):
+    # A rename keeps the class id, so this only rewrites files if the name now maps to another id
+    mapping = list(range(len(classes)))
+    mapping[class_index] = classes.index(new_class_name)
+    if not changed_class_ids(mapping):
+        return remap_classes_in_label_files([], mapping)
+    if label_paths is None:
+        label_paths = list_label_files(splits)
+    return remap_classes_in_label_files(label_paths, mapping, progress=progress)
+
+def merge_classes_in_labels(splits, old_class_index, new_class_index, num_classes, label_paths=None, progress=None):
+    mapping = merge_mapping(num_classes, [old_class_index], new_class_index)
+    if label_paths is None:
+        label_paths = list_label_files(splits)
+    return remap_classes_in_label_files(label_paths, mapping, progress=progress)
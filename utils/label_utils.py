@@ -0,0 +1,140 @@
+import numpy as np
+from utils.polygon_utils import offsets_from_lengths, polygon_boxes
+from utils.file_utils import read_text
+from utils.perf_utils import timed
+
+def ragged_indices(starts, lengths):
+    # Flat indices of the ranges [starts[i], starts[i] + lengths[i]) concatenated in order
+    lengths = np.asarray(lengths, dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+    return np.repeat(np.asarray(starts, dtype=np.int64) - offsets, lengths) + np.arange(lengths.sum(), dtype=np.int64)
+
+def parse_label_lines(lines):
+    # Returns (class_ids, boxes, seg_lengths, seg_coords, invalid) as flat Python lists.
+    # Polygon rows append their points to `seg_coords` and get a zero box; parse_label_batch
+    # fills in the bounding boxes of a whole batch of polygons at once.
+    class_ids = []
+    boxes = []
+    seg_lengths = []
+    seg_coords = []
+    invalid = 0
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue  # Blank lines are not annotations
+        try:
+            class_id = int(parts[0])
+            coords = [float(part) for part in parts[1:]]
+        except ValueError:
+            invalid += 1
+            continue
+        if len(coords) == 4:
+            boxes.append(coords)
+            seg_lengths.append(0)
+        elif len(coords) >= 6 and len(coords) % 2 == 0:
+            boxes.append([0.0, 0.0, 0.0, 0.0])
+            seg_lengths.append(len(coords))
+            seg_coords.extend(coords)
+        else:
+            invalid += 1
+            continue
+        class_ids.append(class_id)
+    return class_ids, boxes, seg_lengths, seg_coords, invalid
+
+def split_label_lines(lines):
+    # (annotation lines, rejected lines) of one label file, both as written; blank lines are dropped
+    annotations = []
+    rejected = []
+    for line in lines:
+        if line.strip():
+            (rejected if parse_label_lines([line])[4] else annotations).append(line.rstrip('\r\n'))
+    return annotations, rejected
+
+def format_label_line(class_id, box, segment=None):
+    if segment is not None and len(segment):
+        return f"{class_id} " + ' '.join(f"{value:.6f}" for value in segment)
+    x_center, y_center, width, height = box
+    return f"{class_id} {x_center:.6f} {y_center:.6f} {width:.6f} {height:.6f}"
+
+@timed('labels.parse')
+def parse_label_batch(texts):
+    # Parses many label files at once into (counts, class_ids, boxes, seg_lengths, seg_coords, invalid).
+    # Files made only of 5-token box lines are converted with one NumPy call for the whole batch;
+    # anything else (polygons, malformed lines) goes through parse_label_lines.
+    counts = np.zeros(len(texts), dtype=np.int64)
+    invalid = np.zeros(len(texts), dtype=np.int32)
+    fast_files = []
+    fast_tokens = []
+    slow_files = {}
+    for i, text in enumerate(texts):
+        line_tokens = [tokens for tokens in (line.split() for line in text.splitlines()) if tokens]
+        if all(len(tokens) == 5 for tokens in line_tokens):
+            fast_files.append(i)
+            counts[i] = len(line_tokens)
+            for tokens in line_tokens:
+                fast_tokens.extend(tokens)
+        else:
+            slow_files[i] = text
+
+    fast_ids = np.zeros(0, dtype=np.int32)
+    fast_rows = np.zeros((0, 5), dtype=np.float64)
+    if fast_tokens:
+        try:
+            # Class ids convert like int() does, so "1.0" is rejected here as it is line by line
+            fast_ids = np.array(fast_tokens[0::5], dtype=np.int64).astype(np.int32)
+            fast_rows = np.array(fast_tokens, dtype=np.float64).reshape(-1, 5)
+        except ValueError:
+            # Rare: a token is not a number; parse these files line by line instead
+            slow_files.update((i, texts[i]) for i in fast_files)
+            fast_files = []
+            fast_ids = np.zeros(0, dtype=np.int32)
+            fast_rows = np.zeros((0, 5), dtype=np.float64)
+
+    if not slow_files:
+        return (counts, fast_ids, fast_rows[:, 1:].astype(np.float32),
+                np.zeros(len(fast_rows), dtype=np.int64), np.zeros(0, dtype=np.float32), invalid)
+
+    fast_offsets = np.concatenate(([0], np.cumsum(counts[fast_files]))).astype(np.int64)
+    fast_position = {i: n for n, i in enumerate(fast_files)}
+    class_ids, boxes, seg_lengths, seg_coords = [], [], [], []
+    for i in range(len(texts)):
+        if i in fast_position:
+            start, end = fast_offsets[fast_position[i]], fast_offsets[fast_position[i] + 1]
+            rows = fast_rows[start:end]
+            class_ids.append(fast_ids[start:end])
+            boxes.append(rows[:, 1:].astype(np.float32))
+            seg_lengths.append(np.zeros(len(rows), dtype=np.int64))
+            continue
+        ids, file_boxes, lengths, coords, invalid[i] = parse_label_lines(slow_files[i].splitlines())
+        counts[i] = len(ids)
+        class_ids.append(np.array(ids, dtype=np.int32))
+        boxes.append(np.array(file_boxes, dtype=np.float32).reshape(-1, 4))
+        seg_lengths.append(np.array(lengths, dtype=np.int64))
+        seg_coords.append(np.array(coords, dtype=np.float32))
+
+    seg_coords = np.concatenate(seg_coords) if seg_coords else np.zeros(0, dtype=np.float32)
+    boxes, seg_lengths = np.concatenate(boxes), np.concatenate(seg_lengths)
+    polygons = seg_lengths > 0
+    if polygons.any():
+        boxes[polygons] = polygon_boxes(offsets_from_lengths(seg_lengths[polygons]), seg_coords)
+    return (counts, np.concatenate(class_ids), boxes, seg_lengths, seg_coords, invalid)
+
+def parse_label_files(paths):
+    # Reads and parses one batch of label files; a missing path (None) is an image without labels.
+    # Module-level so process pools can run it.
+    return parse_label_batch([read_text(path) for path in paths])
+
+def concat_label_batches(batches):
+    if not batches:
+        return parse_label_batch([])
+    return tuple(np.concatenate(column) for column in zip(*batches))
+
+def select_label_batch(batch, indices):
+    # The parse_label_batch result restricted to the files at `indices`, in that order
+    counts, class_ids, boxes, seg_lengths, seg_coords, invalid = batch
+    indices = np.asarray(indices, dtype=np.int64)
+    row_starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+    rows = ragged_indices(row_starts[indices], counts[indices])
+    seg_starts = np.concatenate(([0], np.cumsum(seg_lengths)[:-1])).astype(np.int64)
+    coords = ragged_indices(seg_starts[rows], seg_lengths[rows])
+    return counts[indices], class_ids[rows], boxes[rows], seg_lengths[rows], seg_coords[coords], invalid[indices]
@@ -0,0 +1,73 @@
+import numpy as np
+from utils.polygon_utils import polygon_stats
+
+# Per-image metrics the image list can sort and range-filter on: key -> label shown in the UI
+METRICS = {
+    'boxes': "Box count",
+    'min_area': "Min box area",
+    'mean_area': "Mean box area",
+    'classes': "Class count",
+    'polygons': "Polygon count",
+    'vertices': "Max polygon vertices",
+    'mask_area': "Mask area",
+    'aspect': "Aspect ratio",
+    'file_size': "File size (KB)",
+    'megapixels': "Resolution (MP)",
+}
+
+def annotation_metrics(store):
+    # Arrays indexed by image id. Box areas are normalized (1.0 is the whole image); images
+    # without boxes get NaN areas, which sort last and fail every range filter.
+    num_images = len(store.names)
+    counts = np.diff(store.image_offsets)
+    areas = store.boxes[:, 2].astype(np.float64) * store.boxes[:, 3]
+    min_area = np.full(num_images, np.nan)
+    has_boxes = counts > 0
+    if len(areas):
+        min_area[has_boxes] = np.minimum.reduceat(areas, store.image_offsets[:-1][has_boxes])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_area = np.bincount(store.image_idx, weights=areas, minlength=num_images) / counts
+    # Distinct (image, class) pairs; a plain sort is much faster than np.unique here
+    pairs = np.sort(store.image_idx.astype(np.int64) << 32 | store.class_ids.astype(np.int64) & 0xFFFFFFFF)
+    first = np.concatenate(([True], pairs[1:] != pairs[:-1])) if len(pairs) else np.zeros(0, dtype=bool)
+    class_counts = np.bincount(pairs[first] >> 32, minlength=num_images)
+    # Polygon figures; mask area is the summed polygon area, NaN for images without polygons
+    _, polygon_images, vertices, polygon_areas = polygon_stats(store)
+    polygons = np.bincount(polygon_images, minlength=num_images)
+    max_vertices = np.zeros(num_images, dtype=np.int64)
+    np.maximum.at(max_vertices, polygon_images, vertices)
+    mask_area = np.full(num_images, np.nan)
+    mask_area[polygons > 0] = np.bincount(polygon_images, weights=polygon_areas, minlength=num_images)[polygons > 0]
+    return {
+        'boxes': counts.astype(np.float64),
+        'min_area': min_area,
+        'mean_area': mean_area,
+        'classes': class_counts.astype(np.float64),
+        'polygons': polygons.astype(np.float64),
+        'vertices': max_vertices.astype(np.float64),
+        'mask_area': mask_area,
+    }
+
+def file_metrics(infos):
+    # infos[i] is (file size, width, height) with None for unknown values, or None
+    values = np.array([info if info is not None else (None, None, None) for info in infos], dtype=np.float64).reshape(-1, 3)
+    file_size, width, height = values.T
+    with np.errstate(invalid='ignore', divide='ignore'):
+        aspect = width / height
+    return {
+        'aspect': aspect,
+        'file_size': file_size / 1024,
+        'megapixels': width * height / 1e6,
+    }
+
+def sort_order(values, ascending=True):
+    # Stable argsort with NaN (unknown) values last in either direction
+    return np.argsort(values if ascending else -values, kind='stable')
+
+def range_mask(values, low=None, high=None):
+    mask = ~np.isnan(values) if low is not None or high is not None else np.ones(len(values), dtype=bool)
+    if low is not None:
+        mask &= values >= low
+    if high is not None:
+        mask &= values <= high
+    return mask
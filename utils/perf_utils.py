@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import threading
+import functools
+from collections import deque
+
+# Process-wide timing recorder for hot paths. Off by default; while off, span() returns a shared
+# no-op context manager and @timed adds one global check per call, so instrumentation can stay
+# in place permanently. Worker processes do not record; their stages are timed from the parent.
+
+MAX_SAMPLES = 10000  # Durations kept per name for the percentiles
+MAX_EVENTS = 200000  # Spans kept for trace export
+
+enabled = False
+lock = threading.Lock()
+samples = {}
+counts = {}  # Calls and total seconds per name, over all calls rather than the kept samples
+totals = {}
+events = deque(maxlen=MAX_EVENTS)
+origin = time.perf_counter()
+
+class NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SPAN = NullSpan()
+
+class Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, self.start, time.perf_counter())
+        return False
+
+def set_enabled(on):
+    global enabled
+    enabled = on
+
+def span(name):
+    return Span(name) if enabled else NULL_SPAN
+
+def timed(name):
+    # Decorator recording every call of the function under `name`
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, start, time.perf_counter())
+        return wrapper
+    return decorate
+
+def record(name, start, end):
+    with lock:
+        durations = samples.get(name)
+        if durations is None:
+            durations = samples[name] = deque(maxlen=MAX_SAMPLES)
+            counts[name] = 0
+            totals[name] = 0.0
+        durations.append(end - start)
+        counts[name] += 1
+        totals[name] += end - start
+        events.append((name, start, end - start, threading.get_ident()))
+
+def reset():
+    with lock:
+        samples.clear()
+        counts.clear()
+        totals.clear()
+        events.clear()
+
+def percentile(ordered, fraction):
+    # Linear interpolation between the closest ranks, like numpy.percentile's default
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def summary():
+    # {name: {'count', 'p50', 'p95', 'max', 'total'}} in milliseconds, slowest total first.
+    # Percentiles and max cover the last MAX_SAMPLES calls.
+    with lock:
+        snapshot = {name: (sorted(durations), counts[name], totals[name]) for name, durations in samples.items()}
+    result = {}
+    for name, (durations, count, total) in snapshot.items():
+        result[name] = {
+            'count': count,
+            'p50': percentile(durations, 0.5) * 1000,
+            'p95': percentile(durations, 0.95) * 1000,
+            'max': durations[-1] * 1000,
+            'total': total * 1000,
+        }
+    return dict(sorted(result.items(), key=lambda item: -item[1]['total']))
+
+def format_summary(stats):
+    lines = [f"{'stage':<32}{'calls':>7}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}"]
+    for name, row in stats.items():
+        lines.append(f"{name:<32}{row['count']:>7}{row['p50']:>9.2f}{row['p95']:>9.2f}{row['max']:>9.2f}")
+    return lines
+
+def export_json(path):
+    with open(path, 'w') as file:
+        json.dump(summary(), file, indent=2)
+
+def export_chrome_trace(path):
+    # Complete ('X') events in microseconds, loadable in chrome://tracing or Perfetto
+    with lock:
+        spans = list(events)
+    pid = os.getpid()
+    trace = [
+        {'name': name, 'ph': 'X', 'ts': (start - origin) * 1e6, 'dur': duration * 1e6, 'pid': pid, 'tid': thread}
+        for name, start, duration, thread in spans
+    ]
+    with open(path, 'w') as file:
+        json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, file)
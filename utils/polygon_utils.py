@@ -0,0 +1,50 @@
+import numpy as np
+
+# Polygons are kept as one flat float array of x, y pairs plus offsets into it, in floats:
+# polygon i is coords[offsets[i]:offsets[i + 1]]. Every polygon needs at least one point.
+# The functions below handle all polygons of a batch, an image or the whole store at once.
+
+def offsets_from_lengths(lengths):
+    return np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+
+def vertex_counts(offsets):
+    return np.diff(offsets) // 2
+
+def polygon_bounds(offsets, coords):
+    # (n, 4) x_min, y_min, x_max, y_max per polygon
+    starts = offsets[:-1] // 2
+    if not len(starts):
+        return np.zeros((0, 4), dtype=np.float64)
+    points = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    return np.concatenate((np.minimum.reduceat(points, starts, axis=0), np.maximum.reduceat(points, starts, axis=0)), axis=1)
+
+def polygon_boxes(offsets, coords):
+    # (n, 4) YOLO boxes (x_center, y_center, width, height) bounding each polygon
+    x_min, y_min, x_max, y_max = polygon_bounds(offsets, coords).T
+    return np.stack(((x_min + x_max) / 2, (y_min + y_max) / 2, x_max - x_min, y_max - y_min), axis=1)
+
+def polygon_areas(offsets, coords):
+    # Shoelace area per polygon, in the units of coords squared (normalized labels: 1.0 is the image)
+    starts = offsets[:-1] // 2
+    if not len(starts):
+        return np.zeros(0, dtype=np.float64)
+    x, y = np.asarray(coords, dtype=np.float64).reshape(-1, 2).T
+    following = np.arange(1, len(x) + 1)
+    following[offsets[1:] // 2 - 1] = starts  # Each polygon's last point closes onto its first
+    return np.abs(np.add.reduceat(x * y[following] - x[following] * y, starts)) / 2
+
+def scale_polygons(offsets, coords, scale, shift=(0, 0)):
+    # Per-polygon arrays of flat x, y pixel coordinates: point * scale + shift, for drawing
+    points = np.asarray(coords, dtype=np.float64).reshape(-1, 2) * scale + shift
+    return np.split(points.ravel(), offsets[1:-1])
+
+def store_polygons(store):
+    # (rows, offsets) of the store's polygon rows; offsets index store.seg_coords
+    lengths = np.diff(store.seg_offsets)
+    rows = np.flatnonzero(lengths > 0)
+    return rows, offsets_from_lengths(lengths[rows])
+
+def polygon_stats(store):
+    # Per polygon row of the store: (rows, image ids, vertex counts, areas)
+    rows, offsets = store_polygons(store)
+    return rows, store.image_idx[rows], vertex_counts(offsets), polygon_areas(offsets, store.seg_coords)
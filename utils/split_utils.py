@@ -0,0 +1,90 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from utils.cache_utils import stat_files
+from utils.file_utils import IMAGE_EXTENSIONS
+
+SPLITS = ('train', 'val', 'test')
+
+# A dataset is a dict of split name -> (images_dir, labels_dir). Images of a split are keyed
+# "split/file.jpg"; a plain images/ + labels/ dataset has the single split '' and bare file names.
+
+def labels_dir_for(images_dir):
+    # Same convention as YOLO: the last 'images' path component becomes 'labels'
+    parts = os.path.normpath(images_dir).split(os.sep)
+    if 'images' in parts:
+        index = len(parts) - 1 - parts[::-1].index('images')
+        parts[index] = 'labels'
+    else:
+        parts.append('labels')
+    return os.sep.join(parts)
+
+def resolve_splits(dataset_dir, data):
+    # Follows the train/val/test entries of data.yaml, relative to its 'path' entry if that exists.
+    # Falls back to dataset_dir/images and dataset_dir/labels when no split directory is found.
+    root = dataset_dir
+    if data.get('path'):
+        candidate = os.path.join(dataset_dir, str(data['path']))
+        if os.path.isdir(candidate):
+            root = candidate
+
+    splits = {}
+    seen = set()
+    for split in SPLITS:
+        entries = data.get(split) or []
+        if isinstance(entries, str):
+            entries = [entries]
+        for number, entry in enumerate(entries):
+            images_dir = os.path.normpath(os.path.join(root, str(entry)))
+            if not os.path.isdir(images_dir) or images_dir in seen:
+                continue  # Image list .txt files are not supported; a directory shared by splits loads once
+            seen.add(images_dir)
+            splits[split if number == 0 else f"{split}{number + 1}"] = (images_dir, labels_dir_for(images_dir))
+    if not splits:
+        splits[''] = (os.path.join(dataset_dir, 'images'), os.path.join(dataset_dir, 'labels'))
+    return splits
+
+def split_of(image_name):
+    return image_name.split('/', 1)[0] if '/' in image_name else ''
+
+def file_name_of(image_name):
+    return image_name.rsplit('/', 1)[-1]
+
+def image_key(split, file_name):
+    return f"{split}/{file_name}" if split else file_name
+
+def get_image_path(splits, image_name):
+    return os.path.join(splits[split_of(image_name)][0], file_name_of(image_name))
+
+def get_label_path(splits, image_name):
+    return os.path.join(splits[split_of(image_name)][1], os.path.splitext(file_name_of(image_name))[0] + '.txt')
+
+def split_indices(names, split_names):
+    # Index into split_names for every image name; removed images (None) get -1
+    import numpy as np  # Deferred: main imports this module for its path helpers at startup
+    position = {split: i for i, split in enumerate(split_names)}
+    return np.array([-1 if name is None else position.get(split_of(name), -1) for name in names], dtype=np.int64)
+
+def stat_split(split, images_dir, labels_dir):
+    image_stats = {}
+    if os.path.isdir(images_dir):
+        image_stats = {image_key(split, name): stat for name, stat in stat_files(images_dir).items() if name.endswith(IMAGE_EXTENSIONS)}
+    label_stats = {}
+    label_files = {}
+    if os.path.isdir(labels_dir):
+        for name, stat in stat_files(labels_dir).items():
+            if name.endswith('.txt'):
+                label_stats[image_key(split, name[:-4])] = stat
+                label_files[image_key(split, name[:-4])] = os.path.join(labels_dir, name)
+    return image_stats, label_stats, label_files
+
+def stat_splits(splits):
+    # Scans every split concurrently. Returns (image_stats, label_stats, label_files) where image
+    # stats are keyed by image key and label stats and paths by the image key without extension.
+    image_stats, label_stats, label_files = {}, {}, {}
+    with ThreadPoolExecutor() as executor:
+        results = list(executor.map(lambda item: stat_split(item[0], *item[1]), splits.items()))
+    for split_images, split_labels, split_files in results:
+        image_stats.update(split_images)
+        label_stats.update(split_labels)
+        label_files.update(split_files)
+    return image_stats, label_stats, label_files
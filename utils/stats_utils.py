@@ -0,0 +1,83 @@
+import numpy as np
+from utils.polygon_utils import polygon_stats
+
+def summarize_stats(total_images, total_bboxes, bbox_sq_sum, empty_images):
+    average_bboxes_per_image = total_bboxes / total_images if total_images > 0 else 0
+    variance = bbox_sq_sum / total_images - average_bboxes_per_image ** 2 if total_images > 0 else 0
+    return {
+        'total_images': total_images,
+        'total_bboxes': total_bboxes,
+        'average_bboxes_per_image': average_bboxes_per_image,
+        'std_bboxes_per_image': float(np.sqrt(max(variance, 0))),
+        'percentage_no_bboxes_images': (empty_images / total_images) * 100 if total_images > 0 else 0,
+    }
+
+def split_aggregates(bboxes_per_image, image_splits, num_splits):
+    # Running totals the stats are derived from, per split:
+    # (total_images, total_bboxes, bbox_sq_sum, empty_images), each an array indexed by split
+    bboxes_per_image = np.asarray(bboxes_per_image, dtype=np.int64)
+    def per_split(weights=None):
+        return np.bincount(image_splits, weights=weights, minlength=num_splits).astype(np.int64)
+    return (per_split(), per_split(bboxes_per_image), per_split(bboxes_per_image * bboxes_per_image),
+            per_split((bboxes_per_image == 0).astype(np.int64)))
+
+def split_class_counts(row_splits, class_ids, num_splits, num_classes):
+    # (num_splits, num_classes) annotation counts; rows with unknown classes are ignored
+    valid = (class_ids >= 0) & (class_ids < num_classes) & (row_splits >= 0)
+    flat = row_splits[valid].astype(np.int64) * num_classes + class_ids[valid]
+    return np.bincount(flat, minlength=num_splits * num_classes).reshape(num_splits, num_classes).astype(np.int64)
+
+def store_split_aggregates(store, image_splits, num_splits, num_classes):
+    # One pass over the store: per-split image aggregates and class counts.
+    # image_splits holds the split index of every image id (see split_utils.split_indices).
+    aggregates = split_aggregates(store.boxes_per_image(), image_splits[store.alive], num_splits)
+    class_counts = split_class_counts(image_splits[store.image_idx], store.class_ids, num_splits, num_classes)
+    return aggregates, class_counts
+
+def class_stats(classes, class_counts, total_bboxes):
+    return [
+        {'id': class_id, 'name': name, 'bboxes': int(count), 'percentage': (int(count) / total_bboxes) * 100 if total_bboxes > 0 else 0}
+        for class_id, (name, count) in enumerate(zip(classes, class_counts))
+    ]
+
+def summarize_polygons(store):
+    # Segmentation figures over every polygon annotation; areas are normalized (1.0 is the image)
+    _, _, vertices, areas = polygon_stats(store)
+    if not len(vertices):
+        return {'count': 0, 'mean_vertices': 0, 'max_vertices': 0, 'mean_area': 0, 'min_area': 0}
+    return {
+        'count': len(vertices),
+        'mean_vertices': float(vertices.mean()),
+        'max_vertices': int(vertices.max()),
+        'mean_area': float(areas.mean()),
+        'min_area': float(areas.min()),
+    }
+
+def compute_stats(store, classes, split_names=('',), image_splits=None):
+    # The same numbers the stats pane shows, as a JSON-serializable dict, with a 'splits' entry
+    # per split when the dataset has named splits
+    if image_splits is None:
+        image_splits = np.zeros(len(store.alive), dtype=np.int64)
+    aggregates, class_counts = store_split_aggregates(store, image_splits, len(split_names), len(classes))
+    stats = summarize_stats(*(int(values.sum()) for values in aggregates))
+    stats['num_classes'] = len(classes)
+    stats['invalid_lines'] = int(store.invalid_counts[store.alive].sum())
+    stats['classes'] = class_stats(classes, class_counts.sum(axis=0), stats['total_bboxes'])
+    stats['polygons'] = summarize_polygons(store)
+    if list(split_names) != ['']:
+        stats['splits'] = {}
+        for index, split in enumerate(split_names):
+            split_stats = summarize_stats(*(int(values[index]) for values in aggregates))
+            split_stats['classes'] = class_stats(classes, class_counts[index], split_stats['total_bboxes'])
+            stats['splits'][split] = split_stats
+    return stats
+
+def ranked_class_counts(class_counts, top_k=0):
+    # Class ids by descending count (ties keep id order) and their counts. With top_k > 0 only
+    # the top_k classes are kept; the rest are returned as (other_classes, other_total).
+    class_counts = np.asarray(class_counts, dtype=np.int64)
+    order = np.argsort(-class_counts, kind='stable')
+    if top_k <= 0 or top_k >= len(order):
+        return order, class_counts[order], 0, 0
+    tail = order[top_k:]
+    return order[:top_k], class_counts[order[:top_k]], len(tail), int(class_counts[tail].sum())
@@ -0,0 +1,105 @@
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+ISSUE_TYPES = ('invalid_line', 'unknown_class', 'degenerate_box', 'out_of_bounds', 'duplicate_box', 'overlapping_box', 'missing_label', 'orphan_label')
+ISSUE_CODES = {name: code for code, name in enumerate(ISSUE_TYPES)}
+IOU_THRESHOLD = 0.9  # Same-class boxes of one image overlapping more than this are near-duplicates
+BOUNDS_TOLERANCE = 1e-4  # Slack for coordinates rounded to six decimals
+CHUNK_ROWS = 65536  # Annotations validated per worker task
+
+def box_corners(boxes):
+    x_center, y_center, width, height = np.asarray(boxes, dtype=np.float64).reshape(-1, 4).T
+    return np.stack((x_center - width / 2, y_center - height / 2, x_center + width / 2, y_center + height / 2), axis=1)
+
+def find_overlaps(image_idx, class_ids, xyxy, candidates, iou_threshold=IOU_THRESHOLD):
+    # Sweep over boxes sorted by (image, class, left edge): row i is compared with i+1, i+2, ...
+    # until the next box starts right of its right edge or belongs to another image or class.
+    # Returns (duplicate rows, overlapping rows); the later box of each pair is the one flagged.
+    order = candidates[np.lexsort((xyxy[candidates, 0], class_ids[candidates], image_idx[candidates]))]
+    images, classes, boxes = image_idx[order], class_ids[order], xyxy[order]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    count = len(order)
+    duplicate = np.zeros(count, dtype=bool)
+    overlapping = np.zeros(count, dtype=bool)
+    active = np.arange(count)
+    offset = 1
+    while len(active):
+        active = active[active + offset < count]
+        other = active + offset
+        same = (images[active] == images[other]) & (classes[active] == classes[other]) & (boxes[other, 0] < boxes[active, 2])
+        active, other = active[same], other[same]
+        if len(active):
+            width = np.minimum(boxes[active, 2], boxes[other, 2]) - boxes[other, 0]
+            height = np.minimum(boxes[active, 3], boxes[other, 3]) - np.maximum(boxes[active, 1], boxes[other, 1])
+            intersection = np.maximum(width, 0) * np.maximum(height, 0)
+            iou = intersection / (areas[active] + areas[other] - intersection)
+            exact = np.all(boxes[active] == boxes[other], axis=1)
+            duplicate[other[exact]] = True
+            overlapping[other[~exact & (iou > iou_threshold)]] = True
+        offset += 1
+    return order[duplicate], order[overlapping]
+
+def validate_rows(image_idx, class_ids, boxes, num_classes, iou_threshold=IOU_THRESHOLD):
+    # Returns (issue codes, row indices) for one chunk of annotation rows
+    xyxy = box_corners(boxes)
+    finite = np.isfinite(xyxy).all(axis=1)
+    degenerate = ~finite | (xyxy[:, 2] <= xyxy[:, 0]) | (xyxy[:, 3] <= xyxy[:, 1])
+    out_of_bounds = ~degenerate & ((xyxy[:, :2] < -BOUNDS_TOLERANCE).any(axis=1) | (xyxy[:, 2:] > 1 + BOUNDS_TOLERANCE).any(axis=1))
+    unknown = (class_ids < 0) | (class_ids >= num_classes)
+    duplicate, overlapping = find_overlaps(image_idx, class_ids, xyxy, np.flatnonzero(~degenerate), iou_threshold)
+
+    found = [
+        ('unknown_class', np.flatnonzero(unknown)),
+        ('degenerate_box', np.flatnonzero(degenerate)),
+        ('out_of_bounds', np.flatnonzero(out_of_bounds)),
+        ('duplicate_box', duplicate),
+        ('overlapping_box', overlapping),
+    ]
+    codes = np.concatenate([np.full(len(rows), ISSUE_CODES[name], dtype=np.int8) for name, rows in found])
+    rows = np.concatenate([rows for _, rows in found]).astype(np.int64)
+    return codes, rows
+
+def validate_store(store, num_classes, iou_threshold=IOU_THRESHOLD, max_workers=None):
+    # Validates every annotation of an AnnotationStore in chunks of whole images on a thread pool
+    # (NumPy releases the GIL for the heavy parts). Returns parallel arrays
+    # {'issue', 'image_id', 'annotation'}, where annotation is the index within the image, or -1.
+    offsets = store.image_offsets
+    image_slots = len(offsets) - 1  # Includes removed images, which have no rows
+    bounds = [0]
+    while bounds[-1] < image_slots:
+        # Chunks end on an image boundary so duplicates are never split across chunks
+        next_image = int(np.searchsorted(offsets, offsets[bounds[-1]] + CHUNK_ROWS, side='right')) - 1
+        bounds.append(min(image_slots, max(bounds[-1] + 1, next_image)))
+
+    def validate_chunk(first_image, end_image):
+        start, end = int(offsets[first_image]), int(offsets[end_image])
+        codes, rows = validate_rows(store.image_idx[start:end], store.class_ids[start:end], store.boxes[start:end], num_classes, iou_threshold)
+        return codes, rows + start
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(validate_chunk, bounds[:-1], bounds[1:]))
+
+    invalid_images = np.flatnonzero(store.invalid_counts > 0)
+    codes = [np.full(len(invalid_images), ISSUE_CODES['invalid_line'], dtype=np.int8)] + [codes for codes, _ in results]
+    rows = np.concatenate([rows for _, rows in results]) if results else np.zeros(0, dtype=np.int64)
+    image_ids = store.image_idx[rows].astype(np.int64)
+    return {
+        'issue': np.concatenate(codes),
+        'image_id': np.concatenate((invalid_images, image_ids)),
+        'annotation': np.concatenate((np.full(len(invalid_images), -1, dtype=np.int64), rows - offsets[image_ids])),
+    }
+
+def find_unpaired_files(images, label_stems):
+    # Returns (images without a label file, label stems without an image)
+    image_stems = {os.path.splitext(image)[0] for image in images}
+    label_stems = set(label_stems)
+    missing = [image for image in images if os.path.splitext(image)[0] not in label_stems]
+    orphans = sorted(label_stems - image_stems)
+    return missing, orphans
+
+def issue_counts(report):
+    counts = np.bincount(report['issue'], minlength=len(ISSUE_TYPES))
+    counts[ISSUE_CODES['missing_label']] = len(report.get('missing_labels', ()))
+    counts[ISSUE_CODES['orphan_label']] = len(report.get('orphan_labels', ()))
+    return {name: int(count) for name, count in zip(ISSUE_TYPES, counts)}